@@ -0,0 +1,246 @@
+# agents/audit_service.py
+# 상주형 진단 서비스의 작업 큐 + warm 워커 풀 — 프로세스가 살아있는 동안 retriever/클라이언트/보고서 스타일을 재사용
+import datetime
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+WORKERS = int(os.getenv("AUDIT_WORKERS", "4"))           # 동시에 진행할 진단 수
+MAX_QUEUE = int(os.getenv("AUDIT_MAX_QUEUE", "100"))     # 대기 작업 상한 (초과 시 제출 거절)
+MAX_JOBS = int(os.getenv("AUDIT_MAX_JOBS", "1000"))      # 메모리에 보관할 작업 수 (끝난 작업부터 정리)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+RESULT_FIELDS = ["service_info", "risk_factors", "initial_assessment", "final_assessment", "avg_score",
+                 "final_avg_score", "human_feedback", "recommendations", "stage_timings",
+                 "resumed_stages", "trace_paths"]
+
+
+class QueueFull(Exception):
+    """대기 작업이 MAX_QUEUE에 도달해 새 작업을 받을 수 없음"""
+
+
+class Job:
+    """진단 작업 1건 (job_id = run_id = report_id → 실패 시 같은 id로 체크포인트에서 재개, 보고서 파일은 작업마다 분리)"""
+
+    def __init__(self, service_name: str, service_info: Any = None, feedback_policy: str = "auto",
+                 use_cache: bool = True, job_id: str = None, resume: bool = False):
+        self.id = job_id or f"{datetime.datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
+        self.service_name = service_name
+        self.service_info = service_info
+        self.feedback_policy = feedback_policy
+        self.use_cache = use_cache
+        self.resume = resume
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.report_paths: Optional[List[str]] = None
+        self.error = None
+        self.attempts = 0
+
+    def to_dict(self, position: int = None) -> Dict[str, Any]:
+        def _iso(t):
+            return datetime.datetime.fromtimestamp(t).isoformat(timespec="seconds") if t else None
+
+        out = {
+            "job_id": self.id,
+            "service_name": self.service_name,
+            "status": self.status,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "elapsed_sec": round((self.finished_at or time.time()) - self.started_at, 2)
+            if self.started_at else None,
+            "attempts": self.attempts,
+            "report_available": bool(self.report_paths) and any(p and os.path.exists(p) for p in self.report_paths),
+            "error": self.error,
+        }
+        if position is not None:
+            out["queue_position"] = position
+        if self.result is not None:
+            out["result"] = self.result
+        return out
+
+
+def warm_up() -> Dict[str, Any]:
+    """
+    워커가 첫 작업을 받기 전에 무거운 모듈/인덱스/클라이언트/폰트를 로드
+    - 실패한 항목은 경고만 남기고 첫 사용 시 다시 시도 (예: 벡터스토어 미생성)
+    - 반환: {항목: 소요 초 또는 오류 문자열}
+    """
+    from agents import model_clients
+    from agents.context_packer import get_encoder
+    from agents.rag_retriever import warm_backend
+    from agents.report_builder import get_styles
+
+    steps = [
+        ("retriever", warm_backend),
+        ("model_clients", model_clients.get_openai_client),
+        ("tokenizer", get_encoder),
+        ("report_styles", get_styles),
+    ]
+    timings = {}
+    for name, fn in steps:
+        t0 = time.perf_counter()
+        try:
+            fn()
+            timings[name] = round(time.perf_counter() - t0, 3)
+        except Exception as e:
+            print(f"⚠️ warm-up 실패 ({name}): {e}")
+            timings[name] = f"error: {e}"
+    print(f"🔥 warm-up 완료: {timings}")
+    return timings
+
+
+class AuditService:
+    """
+    진단 작업 큐 + 상주 워커 스레드
+    - submit(): 작업을 큐에 넣고 바로 반환 (큐가 가득 차면 QueueFull)
+    - 워커는 run_audit를 비대화형으로 실행하고 결과/보고서 경로를 작업에 기록
+    - 모든 워커가 같은 프로세스에서 실행되므로 retriever·연결 풀·폰트/스타일 캐시를 공유
+    """
+
+    def __init__(self, workers: int = WORKERS, max_queue: int = MAX_QUEUE, max_jobs: int = MAX_JOBS):
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queue)
+        self._jobs: Dict[str, Job] = {}
+        self._order: List[str] = []
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.warm: Dict[str, Any] = {}
+        self.started_at = None
+
+    # === 수명 주기 ===
+    def start(self, warm: bool = True) -> "AuditService":
+        if warm:
+            self.warm = warm_up()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"audit-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self.started_at = time.time()
+        return self
+
+    def stop(self, wait: bool = True):
+        """대기 중인 작업은 버리지 않고 처리한 뒤 워커 종료"""
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for t in self._threads:
+                t.join()
+        from agents.report_builder import shutdown_report_pool
+        shutdown_report_pool(wait=wait)
+
+    # === 작업 제출/조회 ===
+    def submit(self, service_name: str, service_info: Any = None, feedback_policy: str = "auto",
+               use_cache: bool = True) -> Job:
+        job = Job(service_name, service_info, feedback_policy, use_cache)
+        self._enqueue(job)
+        return job
+
+    def retry(self, job_id: str) -> Job:
+        """
+        실패했거나 보고서 파일이 없는 작업을 같은 id로 다시 큐에 넣음 (체크포인트에서 완료된 단계 건너뜀)
+        - 상태 확인/변경/큐 삽입을 _lock 안에서 한 번에 처리 → 동시 재시도 요청이 같은 작업을 두 번 넣지 않음
+        """
+        from agents.report_builder import reports_ready
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job.status in (QUEUED, RUNNING) or (job.status == SUCCEEDED and reports_ready(job.report_paths)):
+                raise ValueError(f"재시도할 수 없는 상태입니다 ({job.status})")
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull()  # 상태는 그대로 (나중에 다시 재시도 가능)
+            job.status, job.error, job.resume = QUEUED, None, True
+            job.finished_at = None
+        return job
+
+    def _enqueue(self, job: Job):
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull()
+            self._jobs[job.id] = job
+            self._order.append(job.id)
+            self._evict()
+
+    def _evict(self):
+        """보관 작업 수가 max_jobs를 넘으면 끝난 작업부터 오래된 순으로 삭제 (_lock 안에서 호출)"""
+        excess = len(self._order) - self.max_jobs
+        if excess <= 0:
+            return
+        for jid in list(self._order):
+            if excess <= 0:
+                break
+            if self._jobs[jid].status in (SUCCEEDED, FAILED):
+                self._order.remove(jid)
+                del self._jobs[jid]
+                excess -= 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> Optional[int]:
+        """대기 중인 작업의 큐 순번 (0부터)"""
+        if job.status != QUEUED:
+            return None
+        with self._queue.mutex:
+            pending = [j for j in self._queue.queue if j is not None]
+        return pending.index(job) if job in pending else None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = [self._jobs[jid] for jid in self._order[-limit:]]
+        return [j.to_dict() for j in reversed(jobs)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {}
+            for j in self._jobs.values():
+                counts[j.status] = counts.get(j.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "jobs": counts,
+            "uptime_sec": round(time.time() - self.started_at, 1) if self.started_at else None,
+            "warm_up": self.warm,
+        }
+
+    # === 워커 ===
+    def _worker(self):
+        from agents.report_builder import reports_ready
+        from main import run_audit
+
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                job.status, job.started_at, job.attempts = RUNNING, time.time(), job.attempts + 1
+            print(f"🛠️ [{threading.current_thread().name}] 작업 시작: {job.id} ({job.service_name})")
+            try:
+                state = run_audit(job.service_name, job.service_info, interactive=False,
+                                  feedback_policy=job.feedback_policy, use_cache=job.use_cache,
+                                  run_id=job.id, resume=job.resume, report_id=job.id)
+                result = {k: state.get(k) for k in RESULT_FIELDS}
+                paths = list(state["report_paths"]) if state.get("report_paths") else None
+                status, error = ((SUCCEEDED, None) if reports_ready(paths) else
+                                 (FAILED, "보고서 파일 일부가 생성되지 않았습니다 (retry로 보고서만 다시 생성)"))
+            except Exception as e:
+                print(f"🚨 작업 실패: {job.id} — {e}")
+                result, paths, status, error = job.result, job.report_paths, FAILED, f"{type(e).__name__}: {e}"
+            # 종료 상태는 한 번에 기록 → retry가 중간 상태(예: FAILED인데 finished_at 없음)를 보지 않음
+            with self._lock:
+                job.result, job.report_paths = result, paths
+                job.status, job.error, job.finished_at = status, error, time.time()
@@ -0,0 +1,130 @@
+# agents/bm25_index.py
+# 가이드라인 청크에 대한 BM25 역색인 — 임베딩 호출 없이 리스크 키워드 질의를 처리 (한/영 토크나이저)
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence
+
+BM25_PATH = os.path.join("data", "bm25", "index.json")
+
+_TOKEN_RE = re.compile(r"[가-힣]+|[a-z0-9]+")
+_EN_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    한/영 혼합 토크나이저
+    - 영문/숫자: 소문자 단어 (불용어 제외)
+    - 한글: 어절 전체 + 음절 bigram (조사가 붙은 "프라이버시가"도 "프라이버시"와 매칭되도록)
+    """
+    tokens = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        if tok[0] >= "가":
+            tokens.append(tok)
+            if len(tok) > 1:
+                tokens += [tok[i:i + 2] for i in range(len(tok) - 1)]
+        elif tok not in _EN_STOPWORDS and len(tok) > 1:
+            tokens.append(tok)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 역색인 (postings: term → [[문서 번호, tf], ...])"""
+
+    def __init__(self, ids, contents, metadatas, postings, doc_lens, k1=1.5, b=0.75):
+        self.ids = ids
+        self.contents = contents
+        self.metadatas = metadatas
+        self.postings = postings
+        self.doc_lens = doc_lens
+        self.k1 = k1
+        self.b = b
+        n = len(ids)
+        self.avgdl = (sum(doc_lens) / n) if n else 0.0
+        self.idf = {
+            t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for t, p in postings.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: Sequence[str], contents: Sequence[str], metadatas: Sequence[dict]):
+        postings = defaultdict(list)
+        doc_lens = []
+        for i, content in enumerate(contents):
+            tf = Counter(tokenize(content))
+            doc_lens.append(sum(tf.values()))
+            for term, cnt in tf.items():
+                postings[term].append([i, cnt])
+        return cls(list(ids), list(contents), [m or {} for m in metadatas], dict(postings), doc_lens)
+
+    def save(self, path: str = BM25_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": self.ids, "contents": self.contents, "metadatas": self.metadatas,
+                "postings": self.postings, "doc_lens": self.doc_lens, "k1": self.k1, "b": self.b,
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = BM25_PATH):
+        with open(path, encoding="utf-8") as f:
+            d = json.load(f)
+        return cls(d["ids"], d["contents"], d["metadatas"], d["postings"], d["doc_lens"], d["k1"], d["b"])
+
+    def search(self, query: str, k: int = 5) -> List[Dict]:
+        """질의 1건 BM25 top-k (score 높은 순)"""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[doc] / (self.avgdl or 1))
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        top = sorted(scores.items(), key=lambda x: -x[1])[:k]
+        return [{
+            "id": self.ids[i],
+            "content": self.contents[i],
+            "metadata": self.metadatas[i],
+            "score": s,
+            "distance": 1.0 / (1.0 + s),  # 벡터 검색 결과와 같이 작을수록 관련도 높음
+        } for i, s in top]
+
+    def search_batch(self, queries: Sequence[str], k: int = 5) -> List[List[Dict]]:
+        return [self.search(q, k) for q in queries]
+
+
+def fuse_hits(dense: List[Dict], lexical: List[Dict], k: int, alpha: float = 0.5) -> List[Dict]:
+    """
+    벡터 검색 결과와 BM25 결과를 점수 융합 (하이브리드)
+    - 벡터: 거리를 후보 내 min-max 정규화해 유사도로 변환
+    - BM25: 후보 내 최댓값으로 정규화
+    - fused = alpha * 벡터 + (1 - alpha) * BM25
+    """
+    merged: Dict[str, Dict] = {}
+    if dense:
+        dists = [h["distance"] for h in dense]
+        lo, hi = min(dists), max(dists)
+        for h in dense:
+            sim = 1.0 if hi == lo else (hi - h["distance"]) / (hi - lo)
+            merged[h["id"]] = dict(h, dense=sim, lexical=0.0)
+    if lexical:
+        top = max(h["score"] for h in lexical) or 1.0
+        for h in lexical:
+            item = merged.setdefault(h["id"], dict(h, dense=0.0))
+            item["lexical"] = h["score"] / top
+
+    for item in merged.values():
+        item["score"] = alpha * item["dense"] + (1 - alpha) * item["lexical"]
+        item["distance"] = 1.0 - item["score"]
+    return sorted(merged.values(), key=lambda x: -x["score"])[:k]
@@ -0,0 +1,52 @@
+# agents/categories.py
+# 평가 항목 이름 정규화 — "프라이버시 (Privacy)", "개인정보" 등 표기가 달라도 같은 대표 항목으로 인식 (완전 일치만)
+import re
+from typing import List, Optional
+
+# 평가 항목별 동의어 (대표 항목 이름 자체도 동의어로 취급)
+CATEGORY_ALIASES = {
+    "공정성": ["공정", "fairness", "차별", "discrimination"],
+    "편향성": ["편향", "bias"],
+    "투명성": ["투명", "transparency"],
+    "설명가능성": ["설명가능", "설명 가능", "explainability", "설명불가"],
+    "책임성": ["책임", "accountability"],
+    "프라이버시": ["개인정보", "privacy", "데이터 보호"],
+    "안전성": ["안전", "safety", "robustness", "견고"],
+    "사회적 영향": ["사회적", "social", "인권"],
+    "지속가능성": ["지속가능", "sustainability", "환경"],
+    "인간 감독": ["감독", "human oversight", "oversight", "통제"],
+}
+
+_TOKEN_SPLIT = re.compile(r"[\s/·,&:]+|\band\b|및")
+
+
+def _key(term: str) -> str:
+    return re.sub(r"\s+", "", term.lower())  # "설명 가능성" == "설명가능성"
+
+
+# 동의어(공백 제거, 소문자) → 대표 항목
+_ALIAS_INDEX = {_key(t): cat for cat, aliases in CATEGORY_ALIASES.items() for t in [cat] + aliases}
+
+
+def names(label: str) -> List[str]:
+    """평가 항목 이름의 비교용 표기들 — "공정성 (Fairness)" → ["공정성", "fairness"]"""
+    label = label.lower()
+    inner = re.findall(r"\(([^)]*)\)", label)
+    base = re.sub(r"\([^)]*\)", "", label).strip()
+    return [n for n in [base] + [i.strip() for i in inner] if n]
+
+
+def canonical(label: str) -> Optional[str]:
+    """
+    항목 이름 → CATEGORY_ALIASES의 대표 항목 (없거나 모호하면 None)
+    - 괄호 앞/안의 이름 전체가 동의어와 일치하면 그 항목
+    - 아니면 이름을 단어 단위로 나눠 동의어와 일치하는 단어가 가리키는 항목이 하나뿐일 때만 그 항목
+      ("데이터 편향" → 편향성, "AI" / "데이터" / "공정성 및 투명성" → None)
+    """
+    parts = names(label or "")
+    for n in parts:
+        if _key(n) in _ALIAS_INDEX:
+            return _ALIAS_INDEX[_key(n)]
+    found = {_ALIAS_INDEX[_key(tok)] for n in parts for tok in _TOKEN_SPLIT.split(n)
+             if tok and _key(tok) in _ALIAS_INDEX}
+    return found.pop() if len(found) == 1 else None
@@ -0,0 +1,189 @@
+# agents/checkpoint.py
+# 단계별 체크포인트 — run_id마다 각 단계가 state에 반영한 갱신 dict를 압축 JSON으로 저장하고, 재개 시 완료 단계를 건너뜀
+import datetime
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+CHECKPOINT_DIR = os.path.join("outputs", "checkpoints")
+# CHECKPOINTS=off 이면 체크포인트를 남기지 않음 (재개 불가)
+ENABLED = os.getenv("CHECKPOINTS", "on").lower() not in ("0", "off", "false", "no")
+TTL_DAYS = float(os.getenv("CHECKPOINT_TTL_DAYS", "7"))  # 이보다 오래된 체크포인트는 정리
+
+
+def _path(run_id: str, directory: str = CHECKPOINT_DIR) -> str:
+    return os.path.join(directory, f"{run_id}.json.gz")
+
+
+def _jsonable(updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """JSON으로 저장 가능한 갱신 dict면 그대로 (튜플은 리스트로), 아니면 None (Future 등 → 재개 시 다시 실행)"""
+    try:
+        return json.loads(json.dumps(updates, ensure_ascii=False))
+    except (TypeError, ValueError):
+        return None
+
+
+class Checkpoint:
+    """
+    run 1개의 체크포인트 (outputs/checkpoints/<run_id>.json.gz)
+    - meta: 재개에 필요한 실행 설정 (service_name, service_info, interactive, feedback_policy, use_cache)
+    - stages: {단계 이름: {"updates", "elapsed_sec", "finished_at"}} — 단계가 끝날 때마다 원자적으로 다시 씀
+    - status: "running" | "failed" | "partial" (실행은 끝났지만 pending 단계가 완료로 기록되지 않음) | "completed"
+    """
+
+    def __init__(self, run_id: str, meta: Dict[str, Any] = None, directory: str = CHECKPOINT_DIR):
+        self.run_id = run_id
+        self.directory = directory
+        self.path = _path(run_id, directory)
+        self.meta = dict(meta or {})
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.status = "running"
+        self.error = None
+        self.pending: List[str] = []
+        self.attempts = 1
+        self.created_at = datetime.datetime.now().isoformat(timespec="seconds")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, run_id: str, directory: str = CHECKPOINT_DIR) -> Optional["Checkpoint"]:
+        path = _path(run_id, directory)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        ckpt = cls(run_id, data.get("meta"), directory)
+        ckpt.stages = data.get("stages") or {}
+        ckpt.status = data.get("status", "running")
+        ckpt.error = data.get("error")
+        ckpt.pending = data.get("pending") or []
+        ckpt.attempts = data.get("attempts", 1)
+        ckpt.created_at = data.get("created_at", ckpt.created_at)
+        return ckpt
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "meta": self.meta,
+            "status": self.status,
+            "error": self.error,
+            "pending": self.pending,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "stages": self.stages,
+        }
+
+    def save(self):
+        """임시 파일에 쓰고 교체 (쓰는 도중 중단되어도 이전 체크포인트 유지)"""
+        if not ENABLED:
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+
+    def record(self, stage: str, updates: Dict[str, Any], elapsed_sec: float = None) -> bool:
+        """
+        단계 완료 기록 후 저장 — 저장할 수 없는 값이 있으면 기록하지 않고 False
+        - 실행 후에 완료된 pending 단계(백그라운드 보고서 등)를 기록하면 남은 pending이 없을 때 completed로 전환
+        """
+        data = _jsonable(updates or {})
+        if data is None:
+            return False
+        self.stages[stage] = {
+            "updates": data,
+            "elapsed_sec": elapsed_sec,
+            "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        if stage in self.pending:
+            self.pending.remove(stage)
+            if not self.pending and self.status == "partial":
+                self.status = "completed"
+        self.save()
+        return True
+
+    def mark(self, status: str, error: str = None):
+        self.status = status
+        self.error = error
+        self.save()
+
+    def finish(self, pending: List[str] = None):
+        """실행 종료 — 완료로 기록되지 않은 단계가 있으면 partial"""
+        self.pending = list(pending or [])
+        self.mark("partial" if self.pending else "completed")
+
+    def completed(self) -> List[str]:
+        return list(self.stages)
+
+    def restore(self, state: Dict[str, Any], order: List[str]) -> List[str]:
+        """완료된 단계의 갱신을 단계 정의 순서대로 state에 다시 적용하고 복원한 단계 이름 반환"""
+        restored = []
+        for name in order:
+            entry = self.stages.get(name)
+            if entry is not None:
+                state.update(entry["updates"])
+                restored.append(name)
+        return restored
+
+
+def start_checkpoint(run_id: str, meta: Dict[str, Any], resume: bool = False,
+                     directory: str = CHECKPOINT_DIR) -> Checkpoint:
+    """새 체크포인트 생성, resume=True면 기존 체크포인트를 이어 씀 (없으면 새로 시작)"""
+    ckpt = Checkpoint.load(run_id, directory) if resume else None
+    if ckpt is None:
+        if resume:
+            print(f"⚠️ 체크포인트 없음 ({run_id}) → 처음부터 실행")
+        ckpt = Checkpoint(run_id, meta, directory)
+    else:
+        ckpt.attempts += 1
+        ckpt.status, ckpt.error, ckpt.pending = "running", None, []
+    ckpt.save()
+    return ckpt
+
+
+def list_checkpoints(directory: str = CHECKPOINT_DIR) -> List[Dict[str, Any]]:
+    """저장된 체크포인트 요약 (최근 수정 순)"""
+    if not os.path.isdir(directory):
+        return []
+    out = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json.gz"):
+            continue
+        run_id = name[: -len(".json.gz")]
+        try:
+            ckpt = Checkpoint.load(run_id, directory)
+        except (OSError, ValueError, EOFError):
+            continue
+        out.append({
+            "run_id": run_id,
+            "service_name": ckpt.meta.get("service_name"),
+            "status": ckpt.status,
+            "stages": ckpt.completed(),
+            "pending": ckpt.pending,
+            "attempts": ckpt.attempts,
+            "error": ckpt.error,
+            "mtime": os.path.getmtime(_path(run_id, directory)),
+        })
+    return sorted(out, key=lambda c: -c["mtime"])
+
+
+def prune_checkpoints(max_age_days: float = TTL_DAYS, directory: str = CHECKPOINT_DIR) -> int:
+    """max_age_days보다 오래된 체크포인트(와 남은 임시 파일) 삭제, 삭제 수 반환"""
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
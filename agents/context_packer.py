@@ -0,0 +1,160 @@
+# agents/context_packer.py
+# 토큰 예산 기반 RAG 문맥 구성 — 근접 중복 청크 제거 + 리스크별 균형 선택 + 모델 토크나이저 기준 정확한 예산 채우기
+import os
+import re
+import threading
+from typing import Dict, List
+
+DEDUPE_THRESHOLD = float(os.getenv("CONTEXT_DEDUPE_THRESHOLD", "0.8"))  # 문자 5-gram Jaccard 유사도
+MIN_TAIL_TOKENS = 48  # 남은 예산이 이보다 작으면 잘라서라도 채우지 않음
+SHINGLE = 5
+
+_LOCK = threading.Lock()
+_ENCODERS = {}
+_HANGUL = re.compile(r"[가-힣]")
+
+
+class _ApproxEncoder:
+    """
+    tiktoken(또는 인코딩 파일)을 쓸 수 없을 때의 보수적 근사치
+    - 한글 음절 1자 ≈ 1토큰, 그 외 문자 4자 ≈ 1토큰 (실제보다 약간 많게 세어 예산 초과를 막음)
+    """
+
+    exact = False
+
+    def count(self, text: str) -> int:
+        hangul = len(_HANGUL.findall(text))
+        return hangul + (len(text) - hangul + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.count(text) <= max_tokens:
+            return text
+        lo, hi = 0, len(text)
+        while lo < hi:  # 예산 안에 들어가는 가장 긴 접두사 (이분 탐색)
+            mid = (lo + hi + 1) // 2
+            if self.count(text[:mid]) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo]
+
+
+class _TiktokenEncoder:
+    exact = True
+
+    def __init__(self, enc):
+        self.enc = enc
+
+    def count(self, text: str) -> int:
+        return len(self.enc.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        ids = self.enc.encode(text)
+        return text if len(ids) <= max_tokens else self.enc.decode(ids[:max_tokens])
+
+
+def get_encoder(model: str = "gpt-4o-mini"):
+    """모델별 토크나이저 (프로세스당 1회 로드, 실패 시 근사 인코더)"""
+    with _LOCK:
+        if model not in _ENCODERS:
+            try:
+                import tiktoken
+                try:
+                    enc = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    enc = tiktoken.get_encoding("o200k_base")
+                _ENCODERS[model] = _TiktokenEncoder(enc)
+            except Exception as e:
+                print(f"⚠️ {model} 토크나이저 로드 실패 → 근사 토큰 수 사용 ({type(e).__name__})")
+                _ENCODERS[model] = _ApproxEncoder()
+        return _ENCODERS[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    return get_encoder(model).count(text or "")
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    """문자 수가 아닌 토큰 수 기준 자르기"""
+    return get_encoder(model).truncate(text or "", max(max_tokens, 0))
+
+
+def _shingles(text: str) -> set:
+    norm = re.sub(r"\s+", " ", text.lower()).strip()
+    if len(norm) <= SHINGLE:
+        return {norm}
+    return {norm[i:i + SHINGLE] for i in range(len(norm) - SHINGLE + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _label(chunk: dict) -> str:
+    meta = chunk.get("metadata") or {}
+    source = os.path.basename(str(meta.get("source", ""))) or "guideline"
+    page = meta.get("page")
+    return f"[{source} p.{page}]" if page is not None else f"[{source}]"
+
+
+def pack_context(chunks: List[dict], budget_tokens: int, model: str = "gpt-4o-mini",
+                 dedupe_threshold: float = DEDUPE_THRESHOLD) -> Dict:
+    """
+    검색 청크(retrieve_guidelines의 policy_chunks)로 토큰 예산에 맞는 문맥 구성
+    - 근접 중복 제거: 이미 고른 청크와 문자 5-gram Jaccard ≥ dedupe_threshold면 제외
+    - 리스크 균형: risk별로 거리(distance) 오름차순 줄을 세우고 돌아가며 1개씩 선택
+    - 예산 채우기: 다음 청크가 통째로 안 들어가면 남은 토큰만큼 잘라서 마지막에 추가
+    - 반환: {"text", "tokens", "budget", "chunk_ids", "duplicates", "per_risk", "exact"}
+    """
+    enc = get_encoder(model)
+    queues: Dict[str, List[dict]] = {}
+    for c in sorted(chunks or [], key=lambda c: c.get("distance", 0.0)):
+        if (c.get("content") or "").strip():
+            queues.setdefault(c.get("risk") or "기타", []).append(c)
+
+    sep_tokens = enc.count("\n\n")
+    picked, picked_shingles = [], []
+    per_risk: Dict[str, int] = {}
+    duplicates = 0
+    used = 0
+    tail = None
+
+    while any(queues.values()) and used < budget_tokens:
+        for risk in list(queues):
+            queue = queues[risk]
+            while queue:
+                c = queue.pop(0)
+                sh = _shingles(c["content"])
+                if any(_jaccard(sh, other) >= dedupe_threshold for other in picked_shingles):
+                    duplicates += 1
+                    continue
+                piece = f"{_label(c)} {c['content'].strip()}"
+                cost = enc.count(piece) + (sep_tokens if picked else 0)
+                if used + cost <= budget_tokens:
+                    picked.append((c, piece))
+                    picked_shingles.append(sh)
+                    per_risk[risk] = per_risk.get(risk, 0) + 1
+                    used += cost
+                elif tail is None:
+                    tail = (c, piece)  # 예산이 남으면 잘라서 채울 후보 (관련도 순 첫 번째)
+                break
+
+    remaining = budget_tokens - used - (sep_tokens if picked else 0)
+    if tail and remaining >= MIN_TAIL_TOKENS:
+        c, piece = tail
+        piece = enc.truncate(piece, remaining)
+        picked.append((c, piece))
+        per_risk[c.get("risk") or "기타"] = per_risk.get(c.get("risk") or "기타", 0) + 1
+
+    text = "\n\n".join(p for _, p in picked)
+    return {
+        "text": text,
+        "tokens": enc.count(text),
+        "budget": budget_tokens,
+        "chunk_ids": [c.get("id") for c, _ in picked],
+        "duplicates": duplicates,
+        "per_risk": per_risk,
+        "exact": enc.exact,
+    }
@@ -0,0 +1,97 @@
+# agents/crawl_cache.py
+# 서비스 크롤링 캐시 — 검색 결과 (질의, max_results), 페이지 본문 (URL + ETag/Last-Modified)
+# (요약은 프롬프트 기준 LLM 응답 캐시(agents/llm_cache.py)가 담당)
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from agents.disk_cache import DiskCache
+
+CACHE_PATH = os.path.join("data", "cache", "crawl.sqlite")
+SEARCH_FRESH_SEC = float(os.getenv("CRAWL_SEARCH_FRESH_SEC", str(24 * 3600)))  # 검색 결과 재사용 기간
+PAGE_FRESH_SEC = float(os.getenv("CRAWL_PAGE_FRESH_SEC", str(3600)))          # 재검증 없이 쓰는 기간
+MAX_BYTES = int(os.getenv("CRAWL_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+_LOCK = threading.Lock()
+_CACHE = None
+
+
+def get_crawl_cache() -> DiskCache:
+    global _CACHE
+    with _LOCK:
+        if _CACHE is None:
+            _CACHE = DiskCache(CACHE_PATH, max_bytes=MAX_BYTES)
+        return _CACHE
+
+
+def _sha(*parts) -> str:
+    return hashlib.sha256("\0".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _get_json(key: str) -> Optional[dict]:
+    raw = get_crawl_cache().get(key)
+    return json.loads(raw.decode("utf-8")) if raw is not None else None
+
+
+def _put_json(key: str, value: dict):
+    get_crawl_cache().set(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+# === 검색 결과 ===
+def get_search(query: str, max_results: int):
+    """신선도 기간 안의 검색 결과만 반환"""
+    entry = _get_json(f"search:{_sha(query, max_results)}")
+    if entry and time.time() - entry["fetched_at"] <= SEARCH_FRESH_SEC:
+        return entry["results"]
+    return None
+
+
+def put_search(query: str, max_results: int, results):
+    _put_json(f"search:{_sha(query, max_results)}", {"fetched_at": time.time(), "results": results})
+
+
+# === 페이지 본문 ===
+def get_page(url: str) -> Optional[dict]:
+    """{"text", "etag", "last_modified", "fetched_at", "budget"} 또는 None"""
+    return _get_json(f"page:{url}")
+
+
+def covers(entry: dict, share: int) -> bool:
+    """캐시된 본문이 요청한 몫만큼을 담고 있는지 (budget=None이면 페이지 전체를 읽은 것)"""
+    return entry.get("budget") is None or entry["budget"] >= share
+
+
+def is_fresh(entry: dict) -> bool:
+    return time.time() - entry["fetched_at"] <= PAGE_FRESH_SEC
+
+
+def conditional_headers(entry: Optional[dict]) -> dict:
+    """재검증 요청 헤더 (If-None-Match / If-Modified-Since)"""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def put_page(url: str, text: str, etag: str = None, last_modified: str = None, budget: int = None):
+    """budget: 이 글자 수에서 읽기를 멈췄다면 그 값, 페이지 끝까지 읽었다면 None"""
+    _put_json(f"page:{url}", {
+        "text": text, "etag": etag, "last_modified": last_modified,
+        "fetched_at": time.time(), "budget": budget,
+    })
+
+
+def touch_page(url: str, entry: dict):
+    """304 Not Modified 응답 → 본문은 그대로 두고 신선도만 갱신"""
+    entry = dict(entry, fetched_at=time.time())
+    _put_json(f"page:{url}", entry)
+
+
+def crawl_cache_stats() -> dict:
+    return get_crawl_cache().stats()
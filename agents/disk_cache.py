@@ -0,0 +1,144 @@
+# agents/disk_cache.py
+# SQLite 기반 디스크 캐시 (키-값, LRU 크기 제한, 선택적 TTL, 적중률 통계)
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    value       BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at);
+"""
+
+
+class DiskCache:
+    """
+    프로세스/스레드 간 공유 가능한 디스크 캐시
+    - max_entries / max_bytes 초과 시 가장 오래 사용되지 않은 항목부터 삭제 (LRU)
+    - ttl(초)이 지정되면 생성 후 ttl이 지난 항목은 miss로 처리
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000,
+                 max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """존재하고 만료되지 않은 항목만 반환 (접근 시각 갱신)"""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, bytes] = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            expired = []
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM entries "
+                    f"WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self._expired(created_at, now):
+                        expired.append(key)
+                    else:
+                        found[key] = value
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                    [(now, k) for k in found]
+                )
+            if expired:
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in expired])
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: bytes):
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, bytes]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(k, sqlite3.Binary(v), len(v), now, now) for k, v in items.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self):
+        """크기 제한 초과분을 LRU 순서로 삭제 (lock 안에서 호출)"""
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if self.max_entries and count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        if self.max_bytes and total > self.max_bytes:
+            excess = total - self.max_bytes
+            victims, freed = [], 0
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at ASC"
+            ):
+                victims.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """적중/미스 횟수, 적중률, 현재 항목 수와 용량"""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+        }
@@ -0,0 +1,86 @@
+# agents/embedding_cache.py
+# (모델, 텍스트 해시) 기준 임베딩 디스크 캐시 — 인덱싱(tools/embed_guidelines.py)과 검색(rag_retriever) 공용
+import asyncio
+import hashlib
+import os
+import threading
+from array import array
+from typing import List
+
+from agents import model_clients, tracing
+from agents.disk_cache import DiskCache
+
+CACHE_PATH = os.path.join("data", "cache", "embeddings.sqlite")
+MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+_LOCK = threading.Lock()
+_SHARED = {}
+
+
+def _key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings:
+    """
+    임베딩 클라이언트 앞단의 캐시
+    - 캐시에 없는 텍스트만 모아 한 번에 underlying.embed_documents 호출
+    - 벡터는 float32 바이트로 저장
+    - langchain_core Embeddings 인터페이스는 첫 생성 시 가상 하위 클래스로 등록 (import 시점 로드 비용 회피)
+    """
+
+    def __init__(self, underlying, model: str, cache: DiskCache):
+        self.underlying = underlying
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [_key(self.model, t) for t in texts]
+        found = self.cache.get_many(keys)
+
+        missing = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in missing:
+                missing[k] = t
+
+        if missing:
+            with tracing.span("embed", "embed", model=self.model, texts=len(missing),
+                              chars=sum(len(t) for t in missing.values())):
+                texts_to_embed = list(missing.values())
+                vectors = model_clients.embed(self.model, texts_to_embed,
+                                              lambda: self.underlying.embed_documents(texts_to_embed))
+            fresh = {k: array("f", v).tobytes() for k, v in zip(missing, vectors)}
+            self.cache.set_many(fresh)
+            found.update(fresh)
+
+        out = []
+        for k in keys:
+            vec = array("f")
+            vec.frombytes(found[k])
+            out.append(vec.tolist())
+        return out
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.to_thread(self.embed_query, text)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+def get_cached_embeddings(model: str = "text-embedding-3-small") -> CachedEmbeddings:
+    """모델별 캐시 임베딩 클라이언트 (프로세스당 1개 공유)"""
+    with _LOCK:
+        if model not in _SHARED:
+            from langchain_core.embeddings import Embeddings
+
+            Embeddings.register(CachedEmbeddings)
+            cache = DiskCache(CACHE_PATH, max_entries=MAX_ENTRIES)
+            underlying = model_clients.get_embeddings_client(model)
+            _SHARED[model] = CachedEmbeddings(underlying, model, cache)
+        return _SHARED[model]
@@ -0,0 +1,108 @@
+# agents/html_extract.py
+# 스트리밍 <p> 본문 추출기 — 응답을 조각 단위로 받아 문단 텍스트만 모으고, 예산을 채우면 즉시 중단
+import codecs
+import re
+from html.parser import HTMLParser
+
+_SKIP_TAGS = {"script", "style", "noscript", "template"}
+SNIFF_BYTES = 4096  # Content-Type에 charset이 없을 때 <meta>를 찾아볼 앞부분 크기
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.I)
+_CHARSET_ALIASES = {"euc-kr": "cp949", "ks_c_5601-1987": "cp949", "x-windows-949": "cp949"}  # cp949는 EUC-KR의 상위 집합
+
+
+def sniff_encoding(head: bytes, default: str = "utf-8") -> str:
+    """
+    응답 앞부분으로 문자 인코딩 추정 (HTTP 헤더에 charset이 없을 때)
+    - <meta charset="..."> / <meta http-equiv="Content-Type" content="...; charset=..."> 우선
+    - 없으면 UTF-8로 디코딩되는지 확인하고, 아니면 한국어 페이지에 흔한 CP949로 간주
+    """
+    m = _META_CHARSET.search(head[:SNIFF_BYTES])
+    if m:
+        name = m.group(1).decode("ascii", "ignore").lower()
+        name = _CHARSET_ALIASES.get(name, name)
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            pass
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head)  # 끝에서 잘린 멀티바이트 문자는 허용
+        return default
+    except UnicodeDecodeError:
+        return "cp949"
+
+
+class ParagraphExtractor(HTMLParser):
+    """
+    BeautifulSoup(...).find_all("p") + get_text()와 같은 결과를 DOM 없이 점진적으로 생성
+    - feed_bytes()로 바이트 조각을 넣고, done이 True가 되면 읽기를 멈추면 됨
+    - budget: 모을 최대 문자 수 (None이면 제한 없음)
+    """
+
+    def __init__(self, budget: int = None, encoding: str = "utf-8"):
+        super().__init__(convert_charrefs=True)
+        self.budget = budget
+        self.paragraphs = []
+        self.length = 0
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        self._in_p = 0
+        self._skip = 0
+        self._buf = []
+        self._buf_len = 0
+
+    @property
+    def done(self) -> bool:
+        return self.budget is not None and self.length >= self.budget
+
+    def feed_bytes(self, chunk: bytes):
+        self.bytes_read += len(chunk)
+        self.feed(self._decoder.decode(chunk))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag == "p":
+            if self._in_p:
+                self._flush()  # 닫히지 않은 <p> 뒤의 새 <p>는 이전 문단을 닫음
+            self._in_p = 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag == "p" and self._in_p:
+            self._flush()
+            self._in_p = 0
+
+    def handle_data(self, data):
+        if self._in_p and not self._skip and not self.done:
+            self._buf.append(data)
+            self._buf_len += len(data)
+            if self.budget is not None and self.length + self._buf_len >= self.budget:
+                self._flush()  # 긴 문단 하나로 예산이 차는 경우에도 즉시 중단되도록
+
+    def _flush(self):
+        if not self._buf:
+            return
+        text = "".join(self._buf)
+        self._buf = []
+        self._buf_len = 0
+        if self.budget is not None:
+            text = text[: max(self.budget - self.length, 0)]
+        self.paragraphs.append(text)
+        self.length += len(text) + 1
+
+    def text(self) -> str:
+        """지금까지 모은 문단을 공백으로 연결 (열린 문단 포함, 예산 초과분 절단)"""
+        self._flush()
+        joined = " ".join(self.paragraphs)
+        return joined[: self.budget] if self.budget is not None else joined
+
+
+def extract_paragraphs_stream(chunks, budget: int = None, encoding: str = "utf-8") -> str:
+    """동기 바이트 조각 이터러블에서 문단 텍스트 추출 (예산 도달 시 나머지는 읽지 않음)"""
+    parser = ParagraphExtractor(budget, encoding)
+    for chunk in chunks:
+        parser.feed_bytes(chunk)
+        if parser.done:
+            break
+    return parser.text()
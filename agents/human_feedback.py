@@ -24,3 +24,28 @@ def collect_feedback(risk_assessment: Dict) -> str:
 
     print(f"\n🧩 피드백 수집 완료 → '{feedback}'\n")
     return feedback
+
+
+def auto_feedback(risk_assessment: Dict, threshold: float = 4) -> str:
+    """
+    비대화형(배치) 모드용 피드백 정책
+    - 점수가 threshold 이상인 항목을 모아 재검색/재평가용 피드백 문장을 자동 생성
+    - 해당 항목이 없으면 빈 문자열 반환 (재평가 생략)
+    """
+    high = []
+    for key, value in risk_assessment.items():
+        if not isinstance(value, dict):
+            continue
+        try:
+            score = float(value.get("score", 0))
+        except (TypeError, ValueError):
+            continue
+        if score >= threshold:
+            high.append(f"{key}({score:g}점)")
+
+    if not high:
+        return ""
+
+    feedback = f"고위험 항목 우선 재검토 필요: {', '.join(high)}"
+    print(f"\n🤖 자동 피드백 정책 적용 → '{feedback}'\n")
+    return feedback
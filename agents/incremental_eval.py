@@ -0,0 +1,85 @@
+# agents/incremental_eval.py
+# 피드백 기반 부분 재평가 — 피드백이 언급한 항목만 재검색/재평가하고 기존 평가 결과에 병합
+from typing import Dict, List
+
+from agents.categories import CATEGORY_ALIASES, canonical, names
+from agents.rag_retriever import retrieve_guidelines
+from agents.risk_evaluator import evaluate_risks
+
+
+def _terms_of(key: str) -> List[str]:
+    cat = canonical(key)
+    terms = names(key)
+    if cat:
+        terms += [cat.lower()] + [a.lower() for a in CATEGORY_ALIASES[cat]]
+    return list(dict.fromkeys(t for t in terms if len(t) > 1))
+
+
+def affected_categories(feedback: str, assessment: Dict) -> List[str]:
+    """피드백이 언급한 기존 평가 항목 이름 목록 (항목 이름 또는 동의어가 피드백에 등장)"""
+    text = (feedback or "").lower()
+    return [k for k in (assessment or {}) if k.lower() != "summary"
+            and any(t in text for t in _terms_of(k))]
+
+
+def affected_risk_factors(risk_factors: List[str], categories: List[str], feedback: str) -> List[str]:
+    """영향 항목과 관련된 리스크 키워드 (키워드에 항목 동의어가 포함되거나 피드백에 직접 등장)"""
+    terms = [t for c in categories for t in _terms_of(c)]
+    text = (feedback or "").lower()
+    return [rf for rf in (risk_factors or [])
+            if rf.lower() in text or any(t in rf.lower() for t in terms)]
+
+
+def merge_assessment(prior: Dict, partial: Dict, categories: List[str]) -> Dict:
+    """
+    부분 재평가 결과를 기존 평가에 병합
+    - 영향 항목만 갱신 (표기가 달라도 대표 항목이 같으면 같은 항목으로 간주)
+    - 영향 항목이 아닌 재평가 결과는 버림 (기존 점수 유지)
+    """
+    merged = dict(prior)
+    for cat in categories:
+        target = canonical(cat) or cat
+        for k, v in partial.items():
+            if k.lower() == cat.lower() or (canonical(k) or k) == target:
+                merged[cat] = v
+                break
+    return merged
+
+
+def reevaluate_incremental(state: Dict, use_cache: bool = True, on_score=None):
+    """
+    피드백이 언급한 항목만 재검색/재평가
+    - 영향 항목의 리스크 키워드만 피드백을 붙여 재검색하고, 나머지 키워드의 기존 검색 청크는 재사용
+    - 영향 항목만 평가하도록 요청한 뒤 기존 risk_assessment에 병합
+    - 반환: state 갱신 dict, 영향 항목을 특정할 수 없으면 None (호출 측에서 전체 재평가)
+    """
+    feedback = state.get("human_feedback")
+    prior = state.get("risk_assessment") or {}
+    categories = affected_categories(feedback, prior)
+    if not categories:
+        return None
+
+    risk_factors = state.get("risk_factors") or []
+    touched = affected_risk_factors(risk_factors, categories, feedback) or categories
+    print(f"🎯 피드백 영향 항목: {', '.join(categories)} → 부분 재평가 "
+          f"(재검색 질의 {len(touched)}/{len(risk_factors)}건)")
+
+    # === 영향 키워드만 재검색, 나머지 청크 재사용 ===
+    st = retrieve_guidelines({"risk_factors": touched, "human_feedback": feedback})
+    fresh = st.get("policy_chunks") or []
+    fresh_ids = {c["id"] for c in fresh}
+    kept = [c for c in (state.get("policy_chunks") or [])
+            if c["id"] not in fresh_ids and c.get("risk") not in touched]
+    chunks = kept + fresh
+
+    # === 영향 항목만 재평가 (해당 근거 청크만 문맥으로 사용) ===
+    st = evaluate_risks({"policy_chunks": fresh, "policy_context": st.get("policy_context"),
+                         "human_feedback": feedback},
+                        use_cache=use_cache, on_score=on_score, categories=categories)
+    final_assessment = merge_assessment(prior, st.get("risk_assessment") or {}, categories)
+    return {
+        "final_assessment": final_assessment,
+        "policy_chunks": chunks,
+        "policy_context": "\n\n".join(c["content"] for c in chunks),
+        "reevaluated_categories": categories,
+    }
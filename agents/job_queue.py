@@ -0,0 +1,228 @@
+# agents/job_queue.py
+# SQLite 기반 영속 작업 큐 — 여러 워커 프로세스(같은 큐 파일을 보는 여러 호스트 포함)가 진단 작업을 임대(lease)해 처리
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join("data", "queue", "jobs.sqlite"))
+# WAL은 같은 호스트의 프로세스끼리만 안전 — 여러 호스트가 공유 파일 시스템의 큐를 볼 때는 DELETE 사용
+JOURNAL_MODE = os.getenv("JOB_QUEUE_JOURNAL", "WAL")
+LEASE_SEC = float(os.getenv("JOB_LEASE_SEC", "300"))          # 하트비트 없이 이 시간이 지나면 다른 워커가 가져감
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+RETRY_BASE_SEC = float(os.getenv("JOB_RETRY_BASE_SEC", "10"))  # 실패 후 재시도 대기 (지수 증가 + 지터)
+RETRY_MAX_SEC = float(os.getenv("JOB_RETRY_MAX_SEC", "600"))
+
+QUEUED, LEASED, SUCCEEDED, DEAD = "queued", "leased", "succeeded", "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id               TEXT PRIMARY KEY,
+    idempotency_key  TEXT UNIQUE,
+    service_name     TEXT NOT NULL,
+    payload          TEXT NOT NULL,
+    status           TEXT NOT NULL,
+    priority         INTEGER NOT NULL DEFAULT 0,
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    max_attempts     INTEGER NOT NULL,
+    lease_owner      TEXT,
+    lease_expires_at REAL,
+    available_at     REAL NOT NULL,
+    created_at       REAL NOT NULL,
+    updated_at       REAL NOT NULL,
+    finished_at      REAL,
+    result           TEXT,
+    error            TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, available_at, priority);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(status, lease_expires_at);
+"""
+
+
+class Job:
+    """큐에서 꺼낸 작업 1건 (payload: run_audit 인자)"""
+
+    def __init__(self, row: sqlite3.Row):
+        self.id = row["id"]
+        self.service_name = row["service_name"]
+        self.payload: Dict[str, Any] = json.loads(row["payload"])
+        self.status = row["status"]
+        self.attempts = row["attempts"]
+        self.max_attempts = row["max_attempts"]
+        self.lease_owner = row["lease_owner"]
+        self.lease_expires_at = row["lease_expires_at"]
+        self.result = json.loads(row["result"]) if row["result"] else None
+        self.error = row["error"]
+        self.created_at = row["created_at"]
+        self.finished_at = row["finished_at"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in (
+            "id", "service_name", "status", "attempts", "max_attempts", "lease_owner",
+            "lease_expires_at", "created_at", "finished_at", "error", "result")}
+
+
+class JobQueue:
+    """
+    영속 작업 큐
+    - enqueue(): idempotency_key가 같은 작업은 한 번만 등록 (같은 매니페스트를 다시 넣어도 중복 없음)
+    - lease(): 준비된 작업 1건을 원자적으로 임대 (만료된 임대도 회수), 시도 횟수 증가
+    - heartbeat(): 임대 연장 — 임대를 잃었으면 False
+    - complete()/fail(): 현재 임대 소유자만 결과를 기록 (늦게 끝난 이전 워커의 결과는 무시)
+    - 실패는 지수 백오프 + 지터 후 재시도, max_attempts를 다 쓰면 dead
+    """
+
+    def __init__(self, path: str = QUEUE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _tx(self, fn):
+        """BEGIN IMMEDIATE 트랜잭션 안에서 fn(conn) 실행 (다른 프로세스의 임대와 직렬화)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return out
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # === 등록 ===
+    def enqueue(self, service_name: str, payload: Dict[str, Any] = None, idempotency_key: str = None,
+                max_attempts: int = MAX_ATTEMPTS, priority: int = 0) -> str:
+        """작업 등록 후 id 반환 (같은 idempotency_key가 이미 있으면 기존 작업 id)"""
+        now = time.time()
+        job_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+        def _insert(conn):
+            if idempotency_key:
+                row = conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?",
+                                   (idempotency_key,)).fetchone()
+                if row:
+                    return row["id"]
+            conn.execute(
+                "INSERT INTO jobs (id, idempotency_key, service_name, payload, status, priority, "
+                "max_attempts, available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, idempotency_key, service_name, json.dumps(payload or {}, ensure_ascii=False),
+                 QUEUED, priority, max_attempts, now, now, now))
+            return job_id
+
+        return self._tx(_insert)
+
+    # === 임대/처리 ===
+    def lease(self, worker_id: str, lease_sec: float = LEASE_SEC) -> Optional[Job]:
+        """준비된(또는 임대가 만료된) 작업 1건을 worker_id에게 임대"""
+        def _lease(conn):
+            now = time.time()
+            # 임대가 만료된 채 시도 횟수를 다 쓴 작업은 dead로 정리
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, '임대 만료'), finished_at = ?, "
+                "updated_at = ?, lease_owner = NULL WHERE status = ? AND lease_expires_at < ? "
+                "AND attempts >= max_attempts", (DEAD, now, now, LEASED, now))
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE (status = ? AND available_at <= ?) "
+                "OR (status = ? AND lease_expires_at < ?) "
+                "ORDER BY priority DESC, created_at ASC LIMIT 1",
+                (QUEUED, now, LEASED, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires_at = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (LEASED, worker_id, now + lease_sec, now, row["id"]))
+            return Job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+        return self._tx(_lease)
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_sec: float = LEASE_SEC) -> bool:
+        now = time.time()
+        return self._tx(lambda conn: conn.execute(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (now + lease_sec, now, job_id, LEASED, worker_id)).rowcount == 1)
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any] = None) -> bool:
+        """성공 기록 — 임대를 잃은 워커면 False (다른 워커가 이미 처리 중/완료)"""
+        now = time.time()
+        return self._tx(lambda conn: conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ?, updated_at = ?, "
+            "lease_owner = NULL, lease_expires_at = NULL WHERE id = ? AND status = ? AND lease_owner = ?",
+            (SUCCEEDED, json.dumps(result or {}, ensure_ascii=False), now, now,
+             job_id, LEASED, worker_id)).rowcount == 1)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[str]:
+        """실패 기록 — 재시도 가능하면 queued(백오프 후), 아니면 dead. 임대를 잃었으면 None"""
+        def _fail(conn):
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? "
+                               "AND lease_owner = ?", (job_id, LEASED, worker_id)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row["attempts"] >= row["max_attempts"]:
+                status, available_at, finished_at = DEAD, now, now
+            else:
+                delay = min(RETRY_MAX_SEC, RETRY_BASE_SEC * 2 ** (row["attempts"] - 1))
+                status, available_at, finished_at = QUEUED, now + random.uniform(delay / 2, delay), None
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, finished_at = ?, updated_at = ?, "
+                "lease_owner = NULL, lease_expires_at = NULL WHERE id = ?",
+                (status, error, available_at, finished_at, now, job_id))
+            return status
+
+        return self._tx(_fail)
+
+    def requeue(self, job_ids: List[str] = None) -> int:
+        """dead 작업(또는 지정한 작업)을 시도 횟수를 초기화해 다시 대기열로"""
+        now = time.time()
+
+        def _requeue(conn):
+            if job_ids:
+                marks = ",".join("?" * len(job_ids))
+                return conn.execute(
+                    f"UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ?, "
+                    f"finished_at = NULL WHERE id IN ({marks}) AND status != ?",
+                    (QUEUED, now, now, *job_ids, LEASED)).rowcount
+            return conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ?, "
+                "finished_at = NULL WHERE status = ?", (QUEUED, now, now, DEAD)).rowcount
+
+        return self._tx(_requeue)
+
+    # === 조회 ===
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(row) if row else None
+
+    def list(self, status: str = None, limit: int = 50) -> List[Job]:
+        sql, args = "SELECT * FROM jobs", []
+        if status:
+            sql, args = sql + " WHERE status = ?", [status]
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY created_at DESC LIMIT ?", (*args, limit)).fetchall()
+        return [Job(r) for r in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def pending(self) -> int:
+        """아직 끝나지 않은 작업 수 (queued + leased)"""
+        c = self.counts()
+        return c.get(QUEUED, 0) + c.get(LEASED, 0)
@@ -0,0 +1,105 @@
+# agents/llm_cache.py
+# (모델, temperature, 전체 프롬프트 해시) 기준 LLM 응답 디스크 캐시 — 모든 에이전트 공용
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+from agents import tracing
+from agents.disk_cache import DiskCache
+
+CACHE_PATH = os.path.join("data", "cache", "llm_responses.sqlite")
+TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+# LLM_CACHE=off 이면 전역적으로 캐시 비활성화
+ENABLED = os.getenv("LLM_CACHE", "on").lower() not in ("0", "off", "false", "no")
+
+_LOCK = threading.Lock()
+_CACHE = None
+
+
+def get_llm_cache() -> DiskCache:
+    """프로세스 공용 LLM 응답 캐시"""
+    global _CACHE
+    with _LOCK:
+        if _CACHE is None:
+            _CACHE = DiskCache(CACHE_PATH, max_entries=MAX_ENTRIES, ttl=TTL_SEC)
+        return _CACHE
+
+
+def cache_key(model: str, temperature: float, prompt: str) -> str:
+    payload = json.dumps([model, float(temperature), prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_completion(model: str, temperature: float, prompt: str,
+                      call: Callable[[], str], bypass: bool = False,
+                      span_name: str = "llm") -> str:
+    """
+    캐시에 같은 (모델, temperature, 프롬프트) 응답이 있으면 재사용, 없으면 call() 결과를 저장
+    - bypass=True: 캐시 조회를 건너뛰고 새로 호출 (결과는 캐시에 갱신)
+    - span_name: 트레이스에 기록할 호출 이름 (call() 안에서 tracing.record_usage로 토큰 기록)
+    """
+    with tracing.span(span_name, "llm", model=model, prompt_chars=len(prompt)) as sp:
+        if not ENABLED:
+            return call()
+
+        cache = get_llm_cache()
+        key = cache_key(model, temperature, prompt)
+        if not bypass:
+            hit = cache.get(key)
+            if hit is not None:
+                if sp:
+                    sp.set(cache_hit=True)
+                return hit.decode("utf-8")
+
+        text = call()
+        if text:
+            cache.set(key, text.encode("utf-8"))
+        return text
+
+
+def cached_stream_completion(model: str, temperature: float, prompt: str,
+                             stream_call: Callable[[Callable[[str], None]], str],
+                             on_delta: Callable[[str], None], bypass: bool = False,
+                             span_name: str = "llm") -> str:
+    """
+    스트리밍 호출용 cached_completion — 응답 조각이 도착할 때마다 on_delta(조각) 호출
+    - stream_call(on_delta): 스트림을 소비하며 조각마다 on_delta를 부르고 전체 텍스트를 반환
+    - 캐시 적중 시 저장된 전체 응답을 조각 1개로 전달 (키는 cached_completion과 동일)
+    - 첫 조각까지의 시간은 span의 ttft_sec에 기록
+    """
+    with tracing.span(span_name, "llm", model=model, prompt_chars=len(prompt), stream=True) as sp:
+        started = time.perf_counter()
+        first = []
+
+        def _delta(text: str):
+            if not first:
+                first.append(time.perf_counter() - started)
+                if sp:
+                    sp.set(ttft_sec=round(first[0], 4))
+            on_delta(text)
+
+        key = cache_key(model, temperature, prompt)
+        if ENABLED and not bypass:
+            hit = get_llm_cache().get(key)
+            if hit is not None:
+                if sp:
+                    sp.set(cache_hit=True)
+                text = hit.decode("utf-8")
+                _delta(text)
+                return text
+
+        text = stream_call(_delta)
+        if ENABLED and text:
+            get_llm_cache().set(key, text.encode("utf-8"))
+        return text
+
+
+def llm_cache_stats() -> dict:
+    """적중률 등 LLM 캐시 통계"""
+    if not ENABLED:
+        return {"enabled": False}
+    return get_llm_cache().stats()
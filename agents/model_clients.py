@@ -0,0 +1,317 @@
+# agents/model_clients.py
+# 프로세스 공용 모델 클라이언트 — keep-alive 연결 풀 + 모델별 토큰 버킷(RPM/TPM) + 지터 재시도 + 동일 요청 합치기
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from agents import tracing
+
+load_dotenv()
+
+POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "16"))             # 연결 풀 크기 (keep-alive 포함)
+TIMEOUT_SEC = float(os.getenv("OPENAI_TIMEOUT_SEC", "60"))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))           # 재시도 횟수 (첫 시도 제외)
+BACKOFF_BASE_SEC = float(os.getenv("OPENAI_BACKOFF_BASE_SEC", "0.5"))
+BACKOFF_MAX_SEC = float(os.getenv("OPENAI_BACKOFF_MAX_SEC", "20"))
+EXPECTED_OUTPUT_TOKENS = int(os.getenv("OPENAI_EXPECTED_OUTPUT_TOKENS", "600"))  # 응답 토큰 사전 예약량
+# 모델별 분당 요청/토큰 한도 (RPM, TPM) — OPENAI_RPM / OPENAI_TPM은 표에 없는 모델의 기본값
+DEFAULT_LIMITS = (int(os.getenv("OPENAI_RPM", "500")), int(os.getenv("OPENAI_TPM", "200000")))
+MODEL_LIMITS = {
+    "gpt-4o-mini": DEFAULT_LIMITS,
+    "text-embedding-3-small": (int(os.getenv("OPENAI_EMBED_RPM", "3000")),
+                               int(os.getenv("OPENAI_EMBED_TPM", "1000000"))),
+}
+
+_LOCK = threading.Lock()
+_HTTP_CLIENT = None
+_OPENAI_CLIENT = None
+_LIMITERS = {}
+_INFLIGHT: Dict[str, Future] = {}
+STATS = {"calls": 0, "retries": 0, "coalesced": 0, "rate_wait_sec": 0.0}
+
+
+class TokenBucket:
+    """
+    분당 rate만큼 채워지는 토큰 버킷 (용량 = 분당 한도)
+    - acquire(n): n개를 꺼낼 수 있을 때까지 대기, 대기 시간(초) 반환 (용량보다 큰 요청은 용량으로 제한)
+    - adjust(n): 실제 사용량과 예약량의 차이 반영 (음수면 반환, 잔량은 음수까지 내려갈 수 있음)
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, n: float = 1.0) -> float:
+        n = min(float(n), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.level >= n:
+                    self.level -= n
+                    return waited
+                delay = (n - self.level) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, n: float):
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level - n)
+
+
+class RateLimiter:
+    """모델 1개의 요청 수(RPM) + 토큰 수(TPM) 버킷"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def acquire(self, tokens: int) -> float:
+        return self.requests.acquire(1) + self.tokens.acquire(tokens)
+
+    def settle(self, reserved: int, used: Optional[int]):
+        """응답의 실제 토큰 사용량으로 예약량 정산"""
+        if used is not None:
+            self.tokens.adjust(used - reserved)
+
+    def penalize(self, seconds: float):
+        """429 응답 시 버킷을 비워 같은 모델의 다른 요청도 seconds만큼 쉬게 함"""
+        self.requests.adjust(self.requests.rate * seconds)
+
+
+def get_limiter(model: str) -> RateLimiter:
+    with _LOCK:
+        if model not in _LIMITERS:
+            _LIMITERS[model] = RateLimiter(*MODEL_LIMITS.get(model, DEFAULT_LIMITS))
+        return _LIMITERS[model]
+
+
+def get_http_client():
+    """keep-alive 연결을 재사용하는 공용 동기 httpx 클라이언트 (OpenAI 채팅/임베딩 공용)"""
+    global _HTTP_CLIENT
+    with _LOCK:
+        if _HTTP_CLIENT is None:
+            import httpx
+
+            _HTTP_CLIENT = httpx.Client(
+                timeout=TIMEOUT_SEC,
+                limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            )
+        return _HTTP_CLIENT
+
+
+def get_openai_client():
+    """프로세스 공용 OpenAI 클라이언트 (재시도는 SDK가 아닌 call_model이 담당)"""
+    global _OPENAI_CLIENT
+    http_client = get_http_client()
+    with _LOCK:
+        if _OPENAI_CLIENT is None:
+            from openai import OpenAI
+
+            _OPENAI_CLIENT = OpenAI(api_key=os.getenv("OPENAI_API_KEY"),
+                                    http_client=http_client, max_retries=0)
+        return _OPENAI_CLIENT
+
+
+def get_embeddings_client(model: str):
+    """공용 연결 풀을 쓰는 langchain OpenAIEmbeddings (재시도/속도 제한은 call_model이 담당)"""
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=model, http_client=get_http_client(), max_retries=0)
+
+
+def _retry_after(exc) -> Optional[float]:
+    """429/5xx 응답의 Retry-After 헤더 (초)"""
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(exc) -> bool:
+    """속도 제한(429), 서버 오류(5xx), 연결/타임아웃 오류만 재시도"""
+    import httpx
+    import openai
+
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError,
+                        openai.InternalServerError, httpx.TransportError)):
+        return True
+    status = getattr(exc, "status_code", None) or 0
+    return status in (408, 409, 429) or status >= 500
+
+
+def backoff_delay(attempt: int, exc=None) -> float:
+    """full jitter 지수 백오프 — Retry-After가 있으면 그 이상 대기"""
+    delay = random.uniform(0, min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** attempt))
+    hint = _retry_after(exc) if exc is not None else None
+    return max(delay, min(hint, BACKOFF_MAX_SEC)) if hint else delay
+
+
+def _run_with_retry(model: str, fn: Callable, tokens: int, usage_of: Callable) -> object:
+    limiter = get_limiter(model)
+    sp = tracing.current_span()
+    waited = 0.0
+    for attempt in range(MAX_RETRIES + 1):
+        wait = limiter.acquire(tokens)
+        waited += wait
+        with _LOCK:
+            STATS["calls"] += 1
+            STATS["rate_wait_sec"] += wait
+        try:
+            result = fn()
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            if getattr(e, "status_code", None) == 429:
+                limiter.penalize(delay)
+            with _LOCK:
+                STATS["retries"] += 1
+            print(f"   ⏳ {model} 호출 재시도 {attempt + 1}/{MAX_RETRIES} "
+                  f"({type(e).__name__}, {delay:.2f}s 후)")
+            if sp:
+                sp.set(retries=attempt + 1)
+            time.sleep(delay)
+            continue
+        limiter.settle(tokens, usage_of(result))
+        if sp and waited:
+            sp.set(rate_wait_sec=round(waited, 4))
+        return result
+
+
+def call_model(model: str, fn: Callable, tokens: int = 0, key: Optional[str] = None,
+               usage_of: Callable = lambda r: None):
+    """
+    모델 호출 공통 경로: 동일 요청 합치기 → 토큰 버킷 대기 → 지터 백오프 재시도
+    - tokens: 요청 1회에 예약할 토큰 수 (응답 후 usage_of(결과)로 실제 사용량 정산)
+    - key: 지정하면 같은 key로 진행 중인 호출이 있을 때 새로 호출하지 않고 그 결과를 함께 받음
+    """
+    if key is None:
+        return _run_with_retry(model, fn, tokens, usage_of)
+
+    with _LOCK:
+        future = _INFLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = _INFLIGHT[key] = Future()
+        else:
+            STATS["coalesced"] += 1
+    if not leader:
+        sp = tracing.current_span()
+        if sp:
+            sp.set(coalesced=True)
+        return future.result()
+
+    try:
+        result = _run_with_retry(model, fn, tokens, usage_of)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _LOCK:
+            _INFLIGHT.pop(key, None)
+
+
+def _estimate_tokens(model: str, prompt: str, max_tokens: Optional[int]) -> int:
+    from agents.context_packer import count_tokens
+
+    return count_tokens(prompt, model) + (max_tokens or EXPECTED_OUTPUT_TOKENS)
+
+
+def _total_tokens(usage) -> Optional[int]:
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+def chat(prompt: str, model: str = "gpt-4o-mini", temperature: float = 0.4,
+         max_tokens: Optional[int] = None) -> str:
+    """
+    단일 사용자 메시지 chat completion → 응답 텍스트
+    - 같은 (모델, temperature, 프롬프트) 요청이 진행 중이면 합쳐서 1회만 호출
+    - 토큰 사용량은 호출한 쪽의 현재 span에 기록 (합쳐진 요청은 기록하지 않음)
+    """
+    kwargs = {"max_tokens": max_tokens} if max_tokens else {}
+
+    def _call():
+        response = get_openai_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            **kwargs,
+        )
+        tracing.record_usage(response)
+        return response
+
+    key = hashlib.sha256(json.dumps(["chat", model, float(temperature), max_tokens, prompt],
+                                    ensure_ascii=False).encode("utf-8")).hexdigest()
+    response = call_model(model, _call, _estimate_tokens(model, prompt, max_tokens), key=key,
+                          usage_of=lambda r: _total_tokens(r.usage))
+    return response.choices[0].message.content
+
+
+def stream_chat(prompt: str, on_delta: Callable[[str], None], model: str = "gpt-4o-mini",
+                temperature: float = 0.4) -> str:
+    """
+    스트리밍 chat completion — 조각마다 on_delta(조각) 호출 후 전체 텍스트 반환
+    - 첫 조각을 받기 전 실패만 재시도 (이미 전달한 조각을 다시 보내지 않음)
+    """
+    usage = {}
+
+    def _call():
+        stream = get_openai_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        parts = []
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    tracing.record_usage(chunk)
+                    usage["total"] = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    on_delta(parts[-1])
+        except Exception as e:
+            if parts:  # 이미 조각을 전달했으면 재시도 불가 오류로 바꿔 올림
+                raise RuntimeError(f"스트림 중단: {e}") from e
+            raise
+        return "".join(parts)
+
+    return call_model(model, _call, _estimate_tokens(model, prompt, None),
+                      usage_of=lambda r: usage.get("total"))
+
+
+def embed(model: str, texts, fn: Callable):
+    """임베딩 호출 fn()을 속도 제한/재시도 경로로 실행 (문자 4개 ≈ 1토큰으로 예약)"""
+    tokens = sum(len(t) for t in texts) // 4 + 1
+    return call_model(model, fn, tokens)
+
+
+def client_stats() -> dict:
+    """호출/재시도/합치기 횟수와 속도 제한 대기 누적 시간"""
+    with _LOCK:
+        stats = dict(STATS)
+    stats["rate_wait_sec"] = round(stats["rate_wait_sec"], 4)
+    return stats
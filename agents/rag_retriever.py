@@ -1,50 +1,292 @@
 import os
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
+import threading
+import time
+
+from agents import tracing
+from agents.embedding_cache import get_cached_embeddings
 
 VECTOR_DIR = os.path.join("data", "vectorstore")
+NP_INDEX_DIR = os.path.join("data", "vectorstore_np")
+EMBEDDING_MODEL = "text-embedding-3-small"
+BM25_DIR = os.path.join("data", "bm25")
+# 검색 백엔드: "chroma" (기본) | "numpy" (tools/build_numpy_index.py로 생성한 메모리 맵 인덱스)
+#            | "bm25" (임베딩 호출 없는 어휘 검색) | "hybrid" (벡터 + BM25 점수 융합)
+DEFAULT_BACKEND = os.getenv("RAG_BACKEND", "chroma")
+HYBRID_VECTOR_BACKEND = os.getenv("RAG_HYBRID_VECTOR_BACKEND", "chroma")
+HYBRID_ALPHA = float(os.getenv("RAG_HYBRID_ALPHA", "0.5"))
+
+# === 프로세스 전역 retriever 캐시 (스레드 안전) ===
+_LOCK = threading.Lock()
+_EMBEDDINGS = None
+_CACHE = {"vectorstore": None, "retriever": None, "fingerprint": None}
+_NP_CACHE = {"index": None, "fingerprint": None}
+_BM25_CACHE = {"index": None, "fingerprint": None}
+RETRIEVER_STATS = {
+    "builds": 0,             # cold start 횟수 (최초 + 벡터스토어 변경 시)
+    "cold_start_sec": None,  # 마지막 cold start 소요 시간
+    "queries": 0,
+    "warm_query_sec": None,  # 마지막 warm 일괄 검색 소요 시간
+}
+
+
+def _get_embeddings():
+    """임베딩 클라이언트는 프로세스당 1회만 생성 (디스크 임베딩 캐시 경유)"""
+    global _EMBEDDINGS
+    if _EMBEDDINGS is None:
+        _EMBEDDINGS = get_cached_embeddings(EMBEDDING_MODEL)
+    return _EMBEDDINGS
+
+
+def _store_fingerprint(path: str = VECTOR_DIR):
+    """벡터스토어 디렉터리의 (상대경로, 크기, mtime) 목록 — 디스크 변경 감지용"""
+    entries = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            fp = os.path.join(root, name)
+            try:
+                st = os.stat(fp)
+            except OSError:
+                continue
+            entries.append((os.path.relpath(fp, path), st.st_size, st.st_mtime_ns))
+    return tuple(sorted(entries))
+
 
 def ensure_retriever():
-    """Chroma retriever 초기화"""
-    embedding = OpenAIEmbeddings(model="text-embedding-3-small")
-    retriever = Chroma(
+    """Chroma retriever 초기화 (langchain_chroma/chromadb는 첫 검색 시점에 로드)"""
+    from langchain_chroma import Chroma
+
+    vectorstore = Chroma(
         persist_directory=VECTOR_DIR,
-        embedding_function=embedding
-    ).as_retriever(search_kwargs={"k": 5})
-    return retriever
+        embedding_function=_get_embeddings()
+    )
+    return vectorstore.as_retriever(search_kwargs={"k": 5})
+
+
+def get_retriever():
+    """
+    프로세스 전역에서 재사용되는 warm retriever 반환
+    - 최초 호출 시 1회 생성 (cold start 시간 기록)
+    - 디스크의 벡터스토어가 바뀌면 자동으로 다시 생성
+    """
+    fingerprint = _store_fingerprint()
+    with _LOCK:
+        if _CACHE["retriever"] is not None and _CACHE["fingerprint"] == fingerprint:
+            return _CACHE["retriever"]
+
+        if _CACHE["retriever"] is not None:
+            print("♻️ 벡터스토어 변경 감지 → retriever 재생성")
+
+        started = time.perf_counter()
+        retriever = ensure_retriever()
+        elapsed = time.perf_counter() - started
+
+        _CACHE["retriever"] = retriever
+        _CACHE["vectorstore"] = retriever.vectorstore
+        # Chroma가 열리면서 파일을 건드릴 수 있으므로 생성 이후 상태를 기준으로 삼음
+        _CACHE["fingerprint"] = _store_fingerprint()
+        RETRIEVER_STATS["builds"] += 1
+        RETRIEVER_STATS["cold_start_sec"] = round(elapsed, 4)
+        print(f"🧊 retriever cold start: {elapsed:.3f}s")
+        return retriever
+
+
+def reset_retriever():
+    """캐시된 retriever를 버림 (다음 호출 시 재생성)"""
+    with _LOCK:
+        _CACHE.update({"vectorstore": None, "retriever": None, "fingerprint": None})
+        _NP_CACHE.update({"index": None, "fingerprint": None})
+        _BM25_CACHE.update({"index": None, "fingerprint": None})
+
+
+def retriever_stats() -> dict:
+    """cold start / warm 검색 소요 시간 및 임베딩 캐시 통계"""
+    stats = dict(RETRIEVER_STATS)
+    if _EMBEDDINGS is not None:
+        stats["embedding_cache"] = _EMBEDDINGS.stats()
+    return stats
+
+
+def get_vectorstore():
+    """warm retriever가 감싸고 있는 Chroma 벡터스토어"""
+    get_retriever()
+    return _CACHE["vectorstore"]
+
+
+class ChromaBackend:
+    """Chroma 컬렉션 검색 백엔드 — 질의 벡터 묶음을 1회 query로 검색"""
+
+    def __init__(self, vectorstore):
+        self.vectorstore = vectorstore
+
+    def search_by_vectors(self, vectors, k: int = 5):
+        res = self.vectorstore._collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        hits = []
+        for qi in range(len(vectors)):
+            rows = []
+            for cid, doc, meta, dist in zip(res["ids"][qi], res["documents"][qi],
+                                            res["metadatas"][qi], res["distances"][qi]):
+                rows.append({"id": cid, "content": doc or "", "metadata": meta or {}, "distance": dist})
+            hits.append(rows)
+        return hits
+
+
+def get_numpy_index():
+    """메모리 맵 NumPy 인덱스 (프로세스당 1회 로드, 디스크 변경 시 재로드)"""
+    fingerprint = _store_fingerprint(NP_INDEX_DIR)
+    with _LOCK:
+        if _NP_CACHE["index"] is not None and _NP_CACHE["fingerprint"] == fingerprint:
+            return _NP_CACHE["index"]
 
+        from agents.vector_index import NumpyVectorIndex
 
-def retrieve_guidelines(state):
-    """state 기반 윤리 가이드라인 검색"""
-    retriever = ensure_retriever()
-    results = []
+        started = time.perf_counter()
+        index = NumpyVectorIndex(NP_INDEX_DIR)
+        elapsed = time.perf_counter() - started
+
+        _NP_CACHE.update({"index": index, "fingerprint": fingerprint})
+        RETRIEVER_STATS["builds"] += 1
+        RETRIEVER_STATS["cold_start_sec"] = round(elapsed, 4)
+        print(f"🧊 numpy index cold start: {elapsed:.3f}s ({len(index)} chunks)")
+        return index
+
+
+def get_bm25_index():
+    """BM25 역색인 (프로세스당 1회 로드, 디스크 변경 시 재로드)"""
+    fingerprint = _store_fingerprint(BM25_DIR)
+    with _LOCK:
+        if _BM25_CACHE["index"] is not None and _BM25_CACHE["fingerprint"] == fingerprint:
+            return _BM25_CACHE["index"]
+
+        from agents.bm25_index import BM25Index, BM25_PATH
+
+        started = time.perf_counter()
+        index = BM25Index.load(BM25_PATH)
+        elapsed = time.perf_counter() - started
+
+        _BM25_CACHE.update({"index": index, "fingerprint": fingerprint})
+        RETRIEVER_STATS["builds"] += 1
+        RETRIEVER_STATS["cold_start_sec"] = round(elapsed, 4)
+        print(f"🧊 bm25 index cold start: {elapsed:.3f}s ({len(index)} chunks)")
+        return index
+
+
+def get_backend(name: str = None):
+    """이름으로 벡터 검색 백엔드 선택 ("chroma" | "numpy")"""
+    name = name or DEFAULT_BACKEND
+    if name == "chroma":
+        return ChromaBackend(get_vectorstore())
+    if name == "numpy":
+        return get_numpy_index()
+    raise ValueError(f"알 수 없는 RAG 백엔드: {name}")
+
+
+def warm_backend(name: str = None):
+    """검색 전에 백엔드에 필요한 인덱스를 미리 로드 (cold start 분리)"""
+    name = name or DEFAULT_BACKEND
+    if name in ("bm25", "hybrid"):
+        get_bm25_index()
+    if name == "hybrid":
+        get_backend(HYBRID_VECTOR_BACKEND)
+    elif name != "bm25":
+        get_backend(name)
+
+
+def search_batch(queries, k: int = 5, backend: str = None):
+    """
+    여러 질의를 한 번에 검색
+    - 임베딩 API 1회 호출로 모든 질의 벡터화
+    - 선택한 백엔드에 질의 벡터를 묶어서 1회 검색
+    - bm25: 임베딩 호출 없이 로컬 역색인만 사용
+    - hybrid: 벡터 결과와 BM25 결과를 점수 융합
+    - 반환: 질의별 [{"id", "content", "metadata", "distance"}] 목록
+    """
+    if not queries:
+        return []
+    name = backend or DEFAULT_BACKEND
+    if name == "bm25":
+        return get_bm25_index().search_batch(queries, k)
+
+    if name == "hybrid":
+        from agents.bm25_index import fuse_hits
+
+        lexical = get_bm25_index().search_batch(queries, k * 2)
+        vectors = _get_embeddings().embed_documents(list(queries))
+        dense = get_backend(HYBRID_VECTOR_BACKEND).search_by_vectors(vectors, k * 2)
+        return [fuse_hits(d, l, k, HYBRID_ALPHA) for d, l in zip(dense, lexical)]
+
+    engine = get_backend(name)
+    vectors = _get_embeddings().embed_documents(list(queries))
+    return engine.search_by_vectors(vectors, k)
+
+
+def merge_hits(terms, hits, per_term: int):
+    """
+    질의별 검색 결과를 청크 id 기준으로 병합/중복 제거
+    - risk: 처음 해당 청크를 찾은 리스크 키워드
+    - risks: 해당 청크를 찾은 모든 리스크 키워드
+    """
+    merged = {}
+    for term, rows in zip(terms, hits):
+        for r in rows[:per_term]:
+            item = merged.get(r["id"])
+            if item is None:
+                merged[r["id"]] = {
+                    "id": r["id"],
+                    "risk": term,
+                    "risks": [term],
+                    "content": r["content"].strip(),
+                    "metadata": r["metadata"],
+                    "distance": r["distance"],
+                }
+            else:
+                if term not in item["risks"]:
+                    item["risks"].append(term)
+                item["distance"] = min(item["distance"], r["distance"])
+    return list(merged.values())
+
+
+def retrieve_guidelines(state, backend: str = None):
+    """
+    state 기반 윤리 가이드라인 검색 (질의 일괄 임베딩 + 일괄 검색 + 중복 제거)
+    - backend: "chroma" | "numpy" | "bm25" | "hybrid" (기본값은 환경 변수 RAG_BACKEND)
+    """
     query_terms = state.get("risk_factors", [])
     feedback = state.get("human_feedback", None)
 
     print("\n📚 윤리 가이드라인 근거 검색 중...")
 
     if isinstance(query_terms, list):
-        for term in query_terms:
-            query = f"{term} {feedback}" if feedback else term
-            print(f"🔍 [RAG 검색] {query}")
-            docs = retriever.get_relevant_documents(query)
-            for d in docs[:2]:
-                results.append({
-                    "risk": term,
-                    "content": d.page_content.strip()
-                })
+        terms, per_term = [t for t in query_terms if t], 2
     else:
-        query = f"{query_terms} {feedback}" if feedback else query_terms
-        print(f"🔍 [RAG 검색] {query}")
-        docs = retriever.get_relevant_documents(query)
-        for d in docs[:3]:
-            results.append({
-                "risk": query_terms,
-                "content": d.page_content.strip()
-            })
+        terms, per_term = ([query_terms] if query_terms else []), 3
+
+    queries = [f"{t} {feedback}" if feedback else t for t in terms]
+    for q in queries:
+        print(f"🔍 [RAG 검색] {q}")
+
+    with tracing.span("warm_backend", "retrieve", backend=backend or DEFAULT_BACKEND):
+        warm_backend(backend)  # cold start는 검색 시간 측정에서 제외
+    started = time.perf_counter()
+    with tracing.span("search_batch", "retrieve", backend=backend or DEFAULT_BACKEND,
+                      queries=len(queries)):
+        hits = search_batch(queries, k=5, backend=backend)
+    elapsed = time.perf_counter() - started
+    with _LOCK:
+        RETRIEVER_STATS["queries"] += len(queries)
+        RETRIEVER_STATS["warm_query_sec"] = round(elapsed, 4)
+
+    results = merge_hits(terms, hits, per_term)
+    raw = sum(min(len(h), per_term) for h in hits)
 
-    print(f"✅ 총 검색된 문서 수: {len(results)}")
+    print(f"✅ 총 검색된 문서 수: {len(results)} (중복 제거 전 {raw}) — "
+          f"질의 {len(queries)}건 일괄 검색 {elapsed:.3f}s, "
+          f"cold start {RETRIEVER_STATS['cold_start_sec']}s")
 
     # ✅ 검색 결과를 state에 저장
+    state["policy_chunks"] = results
     state["policy_context"] = "\n\n".join([r["content"] for r in results])
     return state
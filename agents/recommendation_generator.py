@@ -20,24 +20,27 @@ def _guideline_hint(category: str) -> str:
     }
     return mapping.get(category, "OECD/UNESCO General Principle")
 
-def generate_recommendations(risk_assessment, guideline_contexts=None):
+def generate_recommendations(risk_assessment, guideline_contexts=None, use_cache: bool = True):
     """
     윤리 리스크 평가 결과 및 RAG 근거 문맥을 기반으로 개선안 생성
+    - guideline_contexts: 검색 청크 목록(policy_chunks) 또는 문맥 문자열
+    - use_cache=False: LLM 응답 캐시를 건너뛰고 새로 생성
     """
-    # RAG 문맥 문자열화
-    if isinstance(guideline_contexts, list):
-        context_text = "\n\n".join(
+    import os
+    from agents import model_clients
+    from agents.context_packer import pack_context, truncate_to_tokens
+    from agents.llm_cache import cached_completion
+    budget = int(os.getenv("RECOMMEND_CONTEXT_TOKENS", "1200"))  # 참고 문맥 토큰 예산
+
+    # RAG 문맥 문자열화 (청크면 중복 제거 + 리스크 균형 + 토큰 예산으로 구성)
+    if isinstance(guideline_contexts, list) and guideline_contexts and isinstance(guideline_contexts[0], dict):
+        context_text = pack_context(guideline_contexts, budget)["text"]
+    elif isinstance(guideline_contexts, list):
+        context_text = truncate_to_tokens("\n\n".join(
             [getattr(doc, "page_content", str(doc)) for doc in guideline_contexts]
-        )
+        ), budget)
     else:
-        context_text = str(guideline_contexts or "")
-
-    from openai import OpenAI
-    import os
-    from dotenv import load_dotenv
-    load_dotenv()
-
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        context_text = truncate_to_tokens(str(guideline_contexts or ""), budget)
 
     base_prompt = (
         "다음은 AI 서비스의 윤리 리스크 평가 결과입니다.\n"
@@ -48,14 +51,12 @@ def generate_recommendations(risk_assessment, guideline_contexts=None):
     prompt = (
         f"{base_prompt}\n\n"
         f"=== 리스크 평가 ===\n{risk_assessment}\n\n"
-        f"=== 참고 문맥 ===\n{context_text[:3000]}"
+        f"=== 참고 문맥 ===\n{context_text}"
     )
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4
-    )
+    def _call():
+        return model_clients.chat(prompt, model="gpt-4o-mini", temperature=0.4)
 
-    return response.choices[0].message.content
+    return cached_completion("gpt-4o-mini", 0.4, prompt, _call, bypass=not use_cache,
+                             span_name="llm.recommend")
 
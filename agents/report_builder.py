@@ -1,88 +1,89 @@
 # agents/report_builder.py
 import os, json, datetime
-from reportlab.lib.pagesizes import A4
-# [수정] Preformatted (코드 블록용), colors (색상용) 임포트
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Preformatted
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, mm
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
-from reportlab.lib.colors import HexColor
-from reportlab.pdfbase import ttfonts
-from reportlab.pdfbase.pdfmetrics import registerFont
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
 import re
 
-# --- [수정됨] 폰트 설정 (나눔고딕) ---
+from agents import tracing
+
+REPORT_DIR = os.path.join("outputs", "reports")
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))  # 백그라운드 보고서 렌더링 프로세스 수
+
+# --- 폰트/스타일 설정 (나눔고딕) — reportlab과 폰트는 처음 PDF를 만들 때 1회만 로드 ---
 # 프로젝트 내 report_builder.py 파일 기준으로 절대경로 설정
-try:
-    # 현재 파일(report_builder.py)의 실제 디렉터리 경로
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    FONT_DIR = os.path.join(BASE_DIR, "fonts")
-
-    REGULAR_FONT_PATH = os.path.join(FONT_DIR, "NanumGothic-Regular.ttf")
-    BOLD_FONT_PATH = os.path.join(FONT_DIR, "NanumGothic-Bold.ttf")
-
-    # print(f"[DEBUG] 폰트 경로 확인: {REGULAR_FONT_PATH}")  # ← 디버깅용, 나중에 지워도 됨
-
-    if os.path.exists(REGULAR_FONT_PATH) and os.path.exists(BOLD_FONT_PATH):
-        registerFont(ttfonts.TTFont('NanumGothic', REGULAR_FONT_PATH))
-        registerFont(ttfonts.TTFont('NanumGothicBold', BOLD_FONT_PATH))
-
-        # 기본 스타일시트 로드
-        styles = getSampleStyleSheet()
-
-        # [개선] 스타일 세분화
-        styles.add(ParagraphStyle(
-            name='TitleKor',
-            parent=styles['Title'],
-            fontName='NanumGothicBold',
-            fontSize=24,
-            alignment=TA_CENTER,
-            spaceAfter=18
-        ))
-        styles.add(ParagraphStyle(
-            name='MetaInfo',
-            parent=styles['Normal'],
-            fontName='NanumGothic',
-            fontSize=10,
-            alignment=TA_LEFT,
-            spaceAfter=6
-        ))
-        styles.add(ParagraphStyle(
-            name='Heading1Kor',
-            parent=styles['h1'],
-            fontName='NanumGothicBold',
-            fontSize=16,
-            spaceBefore=12,
-            spaceAfter=8,
-            textColor=HexColor('#1A237E')
-        ))
-        styles.add(ParagraphStyle(
-            name='NormalKor',
-            parent=styles['Normal'],
-            fontName='NanumGothic',
-            fontSize=10,
-            leading=14,
-            alignment=TA_LEFT,
-            spaceAfter=6
-        ))
-        styles.add(ParagraphStyle(
-            name='CodeKor',
-            parent=styles['Code'],
-            fontName='NanumGothic',
-            fontSize=9,
-            leading=12,
-            alignment=TA_LEFT,
-            backColor=HexColor('#F5F5F5'),
-            borderPadding=(5, 5, 5, 5),
-            leftIndent=6,
-            rightIndent=6,
-            spaceBefore=4,
-            spaceAfter=10
-        ))
-        styles.add(ParagraphStyle(
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_DIR = os.path.join(BASE_DIR, "fonts")
+REGULAR_FONT_PATH = os.path.join(FONT_DIR, "NanumGothic-Regular.ttf")
+BOLD_FONT_PATH = os.path.join(FONT_DIR, "NanumGothic-Bold.ttf")
+
+_STYLE_LOCK = threading.Lock()
+_STYLES = None
+_FONTS = {"regular": "Helvetica", "bold": "Helvetica-Bold"}  # 헤더/푸터용 (나눔고딕 등록 시 교체)
+
+
+def _build_styles(regular: str, bold: str):
+    """보고서 스타일시트 (regular/bold: 등록된 폰트 이름)"""
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    styles = getSampleStyleSheet()
+
+    # [개선] 스타일 세분화
+    styles.add(ParagraphStyle(
+        name='TitleKor',
+        parent=styles['Title'],
+        fontName=bold,
+        fontSize=24,
+        alignment=TA_CENTER,
+        spaceAfter=18
+    ))
+    styles.add(ParagraphStyle(
+        name='MetaInfo',
+        parent=styles['Normal'],
+        fontName=regular,
+        fontSize=10,
+        alignment=TA_LEFT,
+        spaceAfter=6
+    ))
+    styles.add(ParagraphStyle(
+        name='Heading1Kor',
+        parent=styles['h1'],
+        fontName=bold,
+        fontSize=16,
+        spaceBefore=12,
+        spaceAfter=8,
+        textColor=HexColor('#1A237E')
+    ))
+    styles.add(ParagraphStyle(
+        name='NormalKor',
+        parent=styles['Normal'],
+        fontName=regular,
+        fontSize=10,
+        leading=14,
+        alignment=TA_LEFT,
+        spaceAfter=6
+    ))
+    styles.add(ParagraphStyle(
+        name='CodeKor',
+        parent=styles['Code'],
+        fontName=regular,
+        fontSize=9,
+        leading=12,
+        alignment=TA_LEFT,
+        backColor=HexColor('#F5F5F5'),
+        borderPadding=(5, 5, 5, 5),
+        leftIndent=6,
+        rightIndent=6,
+        spaceBefore=4,
+        spaceAfter=10
+    ))
+    styles.add(ParagraphStyle(
         name='QuoteKor',
         parent=styles['Normal'],
-        fontName='NanumGothicItalic' if 'NanumGothicItalic' in styles else 'NanumGothic',
+        fontName=regular,
         fontSize=10,
         leading=14,
         leftIndent=12,
@@ -93,42 +94,39 @@ try:
         spaceBefore=6,
         spaceAfter=6,
         italic=True
-        ))
-
-        styles.add(ParagraphStyle(
-            name='FooterKor',
-            parent=styles['Normal'],
-            fontName='NanumGothic',
-            fontSize=8,
-            alignment=TA_CENTER,
-            textColor=HexColor('#9E9E9E'),
-            spaceBefore=12,
-        ))
-
-    else:
-        raise FileNotFoundError(f"❌ NanumGothic 폰트를 찾을 수 없습니다. ({REGULAR_FONT_PATH})")
-
-except Exception as e:
-    print(f"⚠️ 폰트 로드 실패: {e}")
-    print("→ 'fonts/NanumGothic-Regular.ttf'와 'fonts/NanumGothic-Bold.ttf' 파일이 필요합니다.")
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Heading1Kor', parent=styles['Title']))
-    styles.add(ParagraphStyle(name='MetaInfo', parent=styles['Normal']))
-    styles.add(ParagraphStyle(name='Heading1Kor', parent=styles['h1']))
-    styles.add(ParagraphStyle(name='NormalKor', parent=styles['Normal']))
-    styles.add(ParagraphStyle(name='CodeKor', parent=styles['Code']))
-
-
-except Exception as e:
-    print(f"⚠️ 폰트 로드 실패: {e}. PDF 한글이 깨질 수 있습니다.")
-    print("-> 'fonts/NanumGothic-Regular.ttf'와 'fonts/NanumGothic-Bold.ttf' 파일이 필요합니다.")
-    styles = getSampleStyleSheet()
-    # 영문 스타일 별칭 (Fallback)
-    styles.add(ParagraphStyle(name='TitleKor', parent=styles['Title']))
-    styles.add(ParagraphStyle(name='MetaInfo', parent=styles['Normal']))
-    styles.add(ParagraphStyle(name='Heading1Kor', parent=styles['h1']))
-    styles.add(ParagraphStyle(name='NormalKor', parent=styles['Normal']))
-    styles.add(ParagraphStyle(name='CodeKor', parent=styles['Code']))
+    ))
+    styles.add(ParagraphStyle(
+        name='FooterKor',
+        parent=styles['Normal'],
+        fontName=regular,
+        fontSize=8,
+        alignment=TA_CENTER,
+        textColor=HexColor('#9E9E9E'),
+        spaceBefore=12,
+    ))
+    return styles
+
+
+def get_styles():
+    """폰트 등록 + 스타일시트 생성은 프로세스당 1회 (import 시점이 아닌 첫 PDF 생성 시)"""
+    global _STYLES
+    with _STYLE_LOCK:
+        if _STYLES is not None:
+            return _STYLES
+        from reportlab.pdfbase import ttfonts
+        from reportlab.pdfbase.pdfmetrics import registerFont
+
+        try:
+            if not (os.path.exists(REGULAR_FONT_PATH) and os.path.exists(BOLD_FONT_PATH)):
+                raise FileNotFoundError(f"❌ NanumGothic 폰트를 찾을 수 없습니다. ({REGULAR_FONT_PATH})")
+            registerFont(ttfonts.TTFont('NanumGothic', REGULAR_FONT_PATH))
+            registerFont(ttfonts.TTFont('NanumGothicBold', BOLD_FONT_PATH))
+            _FONTS.update({"regular": "NanumGothic", "bold": "NanumGothicBold"})
+        except Exception as e:
+            print(f"⚠️ 폰트 로드 실패: {e}. PDF 한글이 깨질 수 있습니다.")
+            print("→ 'fonts/NanumGothic-Regular.ttf'와 'fonts/NanumGothic-Bold.ttf' 파일이 필요합니다.")
+        _STYLES = _build_styles(_FONTS["regular"], _FONTS["bold"])
+        return _STYLES
 
 
 def _pp(d):  # pretty print
@@ -156,44 +154,47 @@ def _format_text_for_pdf(text: str) -> str:
 # --- [신규] PDF 헤더/푸터 그리는 함수 ---
 def header_footer(canvas, doc):
     """PDF 페이지의 헤더와 푸터를 그립니다."""
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.units import mm
+
     canvas.saveState()
     page_width = doc.width + doc.leftMargin + doc.rightMargin
     page_height = doc.height + doc.topMargin + doc.bottomMargin
     
     # 헤더 (보고서 제목)
-    canvas.setFont('NanumGothicBold', 10)
+    canvas.setFont(_FONTS["bold"], 10)
     canvas.setFillColor(HexColor('#424242'))
     canvas.drawString(doc.leftMargin, page_height - 15 * mm, "AI 윤리 리스크 진단 보고서")
     
     # 푸터 (페이지 번호)
     page_num_text = f"Page {canvas.getPageNumber()}"
-    canvas.setFont('NanumGothic', 9)
+    canvas.setFont(_FONTS["regular"], 9)
     canvas.setFillColor(HexColor('#616161'))
     canvas.drawRightString(page_width - doc.rightMargin, 15 * mm, page_num_text)
     
     canvas.restoreState()
 
 
-def generate_report(service_info: dict,
-                    initial_assessment: dict,
-                    final_assessment: dict,
-                    recommendations: str,
-                    feedback: str = None):
-    """
-    개선된 보고서 생성기
-    - initial_assessment: 최초 평가 결과
-    - final_assessment: 피드백 반영 후 재평가 결과
-    - feedback: 사용자가 입력한 피드백 내용
-    """
-    os.makedirs("outputs/reports", exist_ok=True)
-    ts = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+def _report_paths(service_info: dict, report_id: str = None):
+    """report_id가 있으면 시각 대신 사용 — 같은 작업을 다시 렌더링해도 같은 파일을 덮어씀 (멱등)"""
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    suffix = report_id or datetime.datetime.now().strftime("%Y%m%d_%H%M")
     service_name = service_info.get("name", "UnknownService").replace(" ", "_")
-    md_path = f"outputs/reports/report_{service_name}_{ts}.md"
-    pdf_path = f"outputs/reports/report_{service_name}_{ts}.pdf"
+    md_path = os.path.join(REPORT_DIR, f"report_{service_name}_{suffix}.md")
+    pdf_path = os.path.join(REPORT_DIR, f"report_{service_name}_{suffix}.pdf")
+    return md_path, pdf_path
+
+
+def _tmp_path(path: str) -> str:
+    """같은 디렉터리의 임시 파일 (완성 후 os.replace로 교체 → 반쯤 쓴 보고서가 보이지 않음)"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
 
-    # Markdown 버전 생성
+
+def _write_markdown(md_path, service_info, initial_assessment, final_assessment, recommendations, feedback) -> bool:
+    """Markdown 버전 생성 — 실패하면 False"""
+    tmp = _tmp_path(md_path)
     try:
-        with open(md_path, "w", encoding="utf-8") as f:
+        with open(tmp, "w", encoding="utf-8") as f:
             f.write(f"# 🤖 AI 윤리 리스크 진단 보고서\n\n")
             f.write(f"**진단 대상:** {service_info.get('name')}\n")
             f.write(f"**진단 일시:** {datetime.datetime.now():%Y-%m-%d %H:%M}\n\n")
@@ -217,18 +218,32 @@ def generate_report(service_info: dict,
             for k, v in final_assessment.items():
                 old = initial_assessment.get(k, {}).get("score", "-")
                 new = v.get("score", "-")
-                delta = (new - old) if isinstance(new, (int, float)) and isinstance(old, (int, float)) else "-"
-                f.write(f"| {k} | {old} | {new} | {delta:+} |\n")
+                delta = f"{new - old:+}" if isinstance(new, (int, float)) and isinstance(old, (int, float)) else "-"
+                f.write(f"| {k} | {old} | {new} | {delta} |\n")
             f.write("\n")
 
             f.write("## 💡 최종 개선 권고안\n\n")
             f.write(recommendations + "\n")
+        os.replace(tmp, md_path)
         print(f"📝 Markdown 리포트 생성 완료: {md_path}")
+        return True
     except Exception as e:
         print(f"🚨 Markdown 생성 중 오류: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+
+
+def _build_pdf(pdf_path, service_info, initial_assessment, final_assessment, recommendations, feedback):
+    """PDF 버전 생성 (폰트/스타일은 첫 호출 시 1회 로드)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch, mm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 
-    # PDF 버전
-    doc = SimpleDocTemplate(pdf_path, pagesize=A4,
+    styles = get_styles()
+    tmp = _tmp_path(pdf_path)
+    doc = SimpleDocTemplate(tmp, pagesize=A4,
                             leftMargin=inch/2, rightMargin=inch/2,
                             topMargin=25*mm, bottomMargin=25*mm)
 
@@ -292,42 +307,92 @@ def generate_report(service_info: dict,
         Paragraph("※ 본 보고서는 Human-in-the-loop 기반 AI 윤리 평가 결과입니다.", styles["FooterKor"])
     ]
 
-    doc.build(elems, onFirstPage=header_footer, onLaterPages=header_footer)
+    try:
+        with tracing.span("pdf.build", "render", flowables=len(elems)):
+            doc.build(elems, onFirstPage=header_footer, onLaterPages=header_footer)
+        os.replace(tmp, pdf_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
     print(f"📄 PDF 리포트 생성 완료: {pdf_path}")
 
- 
 
-    # --- 2. PDF 리포트 생성 [수정] ---
+def generate_report(service_info: dict,
+                    initial_assessment: dict,
+                    final_assessment: dict,
+                    recommendations: str,
+                    feedback: str = None,
+                    report_id: str = None):
+    """
+    개선된 보고서 생성기
+    - initial_assessment: 최초 평가 결과
+    - final_assessment: 피드백 반영 후 재평가 결과
+    - feedback: 사용자가 입력한 피드백 내용
+    - report_id: 파일명에 시각 대신 쓸 식별자 (작업 재시도 시 같은 파일을 원자적으로 덮어씀)
+    - 반환: (md_path, pdf_path) — 생성에 실패한 형식은 None
+    """
+    md_path, pdf_path = _report_paths(service_info, report_id)
+    if not _write_markdown(md_path, service_info, initial_assessment, final_assessment, recommendations, feedback):
+        md_path = None
     try:
-        # [수정] 헤더/푸터 공간 확보를 위해 topMargin, bottomMargin 증가
-        doc = SimpleDocTemplate(pdf_path, pagesize=A4,
-                                rightMargin=inch/2, leftMargin=inch/2,
-                                topMargin=25 * mm, bottomMargin=25 * mm) # A4 높이 297mm
-        
-        elems = [
-            Paragraph(f"AI 윤리 리스크 진단 보고서", styles["TitleKor"]),
-            Spacer(1, 6),
-            Paragraph(f"<b>진단 대상:</b> {_format_text_for_pdf(service_name_display)}", styles["MetaInfo"]),
-            Paragraph(f"<b>진단 일시:</b> {report_date}", styles["MetaInfo"]),
-            Spacer(1, 12),
-            
-            Paragraph("1. 서비스 개요", styles["Heading1Kor"]),
-            Paragraph(f"<b>서비스 유형:</b> {_format_text_for_pdf(service_type)}", styles["NormalKor"]),
-            Paragraph(f"<b>주요 목적:</b> {_format_text_for_pdf(service_purpose)}", styles["NormalKor"]),
-            Spacer(1, 10),
-            
-            Paragraph("2. 윤리 리스크 평가 (최종)", styles["Heading1Kor"]),
-            # [수정] JSON을 Preformatted와 CodeKor 스타일로 표시
-            Preformatted(_pp(risk_assessment), styles["CodeKor"]),
-            Spacer(1, 10),
-            
-            Paragraph("3. 종합 개선 권고안", styles["Heading1Kor"]),
-            Paragraph(_format_text_for_pdf(recommendations), styles["NormalKor"]),
-        ]
-        
-        # [수정] build 시 헤더/푸터 함수 적용
-        doc.build(elems, onFirstPage=header_footer, onLaterPages=header_footer)
-        print(f"📄 PDF 리포트 생성 완료: {pdf_path}")
-        
+        _build_pdf(pdf_path, service_info, initial_assessment, final_assessment, recommendations, feedback)
     except Exception as e:
-        print(f"🚨 PDF 리포트 생성 중 오류 발생: {e}")
\ No newline at end of file
+        print(f"🚨 PDF 리포트 생성 중 오류 발생: {e}")
+        pdf_path = None
+    return md_path, pdf_path
+
+
+def reports_ready(paths) -> bool:
+    """보고서 경로가 모두 있고 실제 파일로 존재하는지 (렌더링 실패로 None이거나 지워진 파일이면 False)"""
+    return bool(paths) and all(p and os.path.exists(p) for p in paths)
+
+
+# === 백그라운드 보고서 렌더링 (프로세스 풀) ===
+# PDF 조판은 순수 파이썬 CPU 작업이라 스레드로는 병렬화되지 않으므로 별도 프로세스에서 실행
+_POOL_LOCK = threading.Lock()
+_POOL = None
+
+
+def _render_job(cwd, service_info, initial_assessment, final_assessment, recommendations, feedback,
+                report_id=None):
+    """작업 프로세스에서 실행 — 반환: (md_path, pdf_path, 소요 시간)"""
+    os.chdir(cwd)  # 상대 경로(outputs/reports)를 제출한 프로세스와 같게
+    started = time.perf_counter()
+    md_path, pdf_path = generate_report(service_info, initial_assessment, final_assessment,
+                                        recommendations, feedback, report_id)
+    return md_path, pdf_path, round(time.perf_counter() - started, 3)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # 스레드가 여럿 도는 프로세스에서 fork하면 잠금 상태가 복제될 수 있어 spawn 사용
+            _POOL = ProcessPoolExecutor(max_workers=max(1, REPORT_WORKERS),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def submit_report(service_info: dict,
+                  initial_assessment: dict,
+                  final_assessment: dict,
+                  recommendations: str,
+                  feedback: str = None,
+                  report_id: str = None) -> Future:
+    """
+    generate_report를 백그라운드 렌더링 프로세스에 제출하고 완료 핸들(Future) 반환
+    - future.result() → (md_path, pdf_path, 렌더링 소요 시간)
+    - 작업 프로세스는 재사용되므로 폰트/스타일 로드는 프로세스당 1회
+    """
+    with tracing.span("report.submit", "render"):
+        return _get_pool().submit(_render_job, os.getcwd(), dict(service_info), initial_assessment,
+                                  final_assessment, recommendations, feedback, report_id)
+
+
+def shutdown_report_pool(wait: bool = True):
+    """렌더링 프로세스 풀 종료 (제출된 작업은 wait=True면 끝까지 처리)"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=wait)
+            _POOL = None
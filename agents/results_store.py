@@ -0,0 +1,325 @@
+# agents/results_store.py
+# 진단 결과 저장소 (SQLite) — run마다 서비스 정보/초기·최종 평가/피드백/권고안을 색인된 테이블에 기록해
+# "이번 분기 프라이버시 4점 이상 서비스", "서비스별 점수 추이" 같은 질의를 보고서 파싱 없이 바로 처리
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from agents.categories import canonical
+
+RESULTS_PATH = os.getenv("RESULTS_DB_PATH", os.path.join("data", "results", "audits.sqlite"))
+# RESULTS_STORE=off 이면 진단 결과를 저장소에 기록하지 않음
+ENABLED = os.getenv("RESULTS_STORE", "on").lower() not in ("0", "off", "false", "no")
+
+PHASES = ("initial", "final")
+SCHEMA_VERSION = 2  # 2: category를 완전 일치 동의어 표로 정규화 (이전 부분 문자열 매칭 결과는 label에서 다시 계산)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id          TEXT PRIMARY KEY,
+    service_name    TEXT NOT NULL,
+    service_type    TEXT,
+    avg_score       REAL,
+    final_avg_score REAL,
+    human_feedback  TEXT,
+    recommendations TEXT,
+    service_info    TEXT,
+    risk_factors    TEXT,
+    report_md       TEXT,
+    report_pdf      TEXT,
+    created_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_service ON runs(service_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_score ON runs(final_avg_score);
+
+-- 항목별 점수 (질의 시 join이 없도록 service_name/created_at을 함께 저장)
+-- category: 대표 항목 이름 ("프라이버시 (Privacy)" → "프라이버시", 모르는 항목은 원래 이름), label: 평가 응답에 나온 원래 항목 이름
+CREATE TABLE IF NOT EXISTS scores (
+    run_id       TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    phase        TEXT NOT NULL,
+    category     TEXT NOT NULL,
+    label        TEXT,
+    score        REAL,
+    comment      TEXT,
+    service_name TEXT NOT NULL,
+    created_at   REAL NOT NULL,
+    PRIMARY KEY (run_id, phase, category)
+);
+CREATE INDEX IF NOT EXISTS idx_scores_category ON scores(phase, category, score);
+CREATE INDEX IF NOT EXISTS idx_scores_created ON scores(phase, created_at);
+CREATE INDEX IF NOT EXISTS idx_scores_service ON scores(service_name, category, created_at);
+"""
+
+_LOCK = threading.Lock()
+_STORE = None
+
+
+def _score(v) -> Optional[float]:
+    try:
+        return float(v.get("score") if isinstance(v, dict) else v)
+    except (TypeError, ValueError):
+        return None
+
+
+def canonical_category(label: str) -> str:
+    """평가 항목 이름 → 대표 항목 이름 (동의어 표는 agents.categories, 모르는 항목은 원래 이름 그대로)"""
+    label = str(label).strip()
+    return canonical(label) or label
+
+
+def _categories(labels: Iterable[str]) -> List[str]:
+    """
+    한 run/단계의 항목 이름들 → 저장할 category 목록 (순서 유지)
+    - 대표 이름과 똑같은 항목이 대표 이름을 먼저 차지하고, 이미 쓰인 대표 이름이면 원래 이름으로 저장
+      → 같은 대표 항목으로 보이는 두 줄이 서로의 점수를 덮어쓰지 않음
+    """
+    labels = [str(label).strip() for label in labels]
+    wanted = [canonical_category(label) for label in labels]
+    out = [c if c == label else None for c, label in zip(wanted, labels)]
+    used = set(c for c in out if c)
+    for i, (category, label) in enumerate(zip(wanted, labels)):
+        if out[i] is not None:
+            continue
+        category = label if category in used else category
+        n = 2
+        while category in used:  # 공백만 다른 이름 등
+            category, n = f"{label} #{n}", n + 1
+        used.add(category)
+        out[i] = category
+    return out
+
+
+def _dumps(v) -> Optional[str]:
+    return None if v is None else json.dumps(v, ensure_ascii=False, default=str)
+
+
+def _row(row: sqlite3.Row) -> Dict[str, Any]:
+    out = dict(row)
+    for k in ("service_info", "risk_factors"):
+        if out.get(k):
+            out[k] = json.loads(out[k])
+    return out
+
+
+class ResultsStore:
+    """
+    진단 결과 저장소
+    - record(): run 1건을 run_id 기준으로 덮어씀 (재개/재시도로 같은 run이 다시 끝나도 1건만 유지)
+    - query_scores(): 항목/점수/기간/서비스 조건으로 항목별 점수 검색 (idx_scores_* 색인 사용)
+    - history(): 서비스의 run별 점수 추이, category_stats(): 기간 내 항목별 평균/최고/고위험 수
+    """
+
+    def __init__(self, path: str = RESULTS_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self):
+        """
+        이전 저장소 갱신 (PRAGMA user_version)
+        - label 컬럼이 없던 저장소 → 컬럼 추가 후 기존 항목 이름을 label로 옮김
+        - category를 label에서 다시 계산 (부분 문자열 매칭으로 잘못 묶인 항목 복구, 겹치면 원래 이름 유지)
+        """
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(scores)")}
+        if "label" not in columns:
+            self._conn.execute("ALTER TABLE scores ADD COLUMN label TEXT")
+            self._conn.execute("UPDATE scores SET label = category")
+        rows = self._conn.execute("SELECT rowid, run_id, phase, label FROM scores ORDER BY rowid").fetchall()
+        groups = {}
+        for r in rows:
+            groups.setdefault((r["run_id"], r["phase"]), []).append(r)
+        updates = [(category, r["rowid"]) for group in groups.values()
+                   for r, category in zip(group, _categories(r["label"] for r in group))]
+        # 기본 키 충돌을 피하려고 임시 이름을 거쳐 갱신
+        self._conn.execute("UPDATE scores SET category = '~' || rowid")
+        self._conn.executemany("UPDATE scores SET category = ? WHERE rowid = ?", updates)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # === 기록 ===
+    def record(self, state: Dict[str, Any], run_id: str = None, created_at: float = None) -> str:
+        """run_audit가 반환한 state(또는 같은 키를 가진 dict) 저장 후 run_id 반환"""
+        run_id = run_id or state.get("run_id")
+        if not run_id:
+            raise ValueError("run_id가 필요합니다.")
+        info = state.get("service_info") if isinstance(state.get("service_info"), dict) else {}
+        name = state.get("service_name") or info.get("name") or "UnknownService"
+        paths = [p for p in state.get("report_paths") or [] if p]  # 렌더링에 실패한 형식은 None
+        created_at = created_at or time.time()
+        rows = {}
+        for phase, key in zip(PHASES, ("initial_assessment", "final_assessment")):
+            assessment = state.get(key) or {}
+            for (label, v), category in zip(assessment.items(), _categories(assessment)):
+                comment = v.get("comment") if isinstance(v, dict) else None
+                rows[(phase, category)] = (run_id, phase, category, label, _score(v), comment, name, created_at)
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM scores WHERE run_id = ?", (run_id,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO runs (run_id, service_name, service_type, avg_score, final_avg_score, "
+                    "human_feedback, recommendations, service_info, risk_factors, report_md, report_pdf, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, name, info.get("type"), state.get("avg_score"), state.get("final_avg_score"),
+                     state.get("human_feedback"), state.get("recommendations"), _dumps(info or None),
+                     _dumps(state.get("risk_factors")),
+                     next((p for p in paths if p.endswith(".md")), None),
+                     next((p for p in paths if p.endswith(".pdf")), None), created_at))
+                self._conn.executemany(
+                    "INSERT INTO scores (run_id, phase, category, label, score, comment, service_name, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", list(rows.values()))
+        return run_id
+
+    def set_report_paths(self, run_id: str, paths: List[str]) -> bool:
+        """백그라운드 렌더링이 끝난 뒤 보고서 경로만 갱신"""
+        md = next((p for p in paths if p and p.endswith(".md")), None)
+        pdf = next((p for p in paths if p and p.endswith(".pdf")), None)
+        with self._lock:
+            with self._conn:
+                return self._conn.execute("UPDATE runs SET report_md = ?, report_pdf = ? WHERE run_id = ?",
+                                          (md, pdf, run_id)).rowcount == 1
+
+    # === 조회 ===
+    def _query(self, sql: str, args) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        if not rows:
+            return None
+        run = _row(rows[0])
+        for phase in PHASES:
+            run[f"{phase}_assessment"] = {
+                r["category"]: {"score": r["score"], "comment": r["comment"], "label": r["label"]}
+                for r in self._query("SELECT category, label, score, comment FROM scores WHERE run_id = ? AND phase = ? "
+                                     "ORDER BY category", (run_id, phase))}
+        return run
+
+    def list_runs(self, service: str = None, since: float = None, until: float = None,
+                  min_avg: float = None, limit: int = 50) -> List[Dict[str, Any]]:
+        where, args = [], []
+        if service:
+            where.append("service_name = ?")
+            args.append(service)
+        if since is not None:
+            where.append("created_at >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("created_at < ?")
+            args.append(until)
+        if min_avg is not None:
+            where.append("final_avg_score >= ?")
+            args.append(min_avg)
+        sql = ("SELECT run_id, service_name, service_type, avg_score, final_avg_score, report_md, report_pdf, "
+               "created_at FROM runs" + (" WHERE " + " AND ".join(where) if where else "")
+               + " ORDER BY created_at DESC LIMIT ?")
+        return [dict(r) for r in self._query(sql, (*args, limit))]
+
+    def query_scores(self, category: str = None, min_score: float = None, max_score: float = None,
+                     service: str = None, since: float = None, until: float = None, phase: str = "final",
+                     latest_only: bool = False, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        항목별 점수 검색 (점수 높은 순)
+        - category: 대표 이름으로 정규화해 비교 ("프라이버시", "Privacy", "개인정보" 모두 같은 항목)
+        - latest_only=True: 조건에 맞는 run 중 서비스마다 가장 최근 run만 (재진단된 서비스 중복 제거)
+        """
+        category = canonical_category(category) if category else None
+        where, args = ["phase = ?"], [phase]
+        for cond, val in (("category = ?", category), ("score >= ?", min_score), ("score <= ?", max_score),
+                          ("service_name = ?", service), ("created_at >= ?", since), ("created_at < ?", until)):
+            if val is not None:
+                where.append(cond)
+                args.append(val)
+        sql = ("SELECT service_name, category, label, score, comment, run_id, created_at FROM scores WHERE "
+               + " AND ".join(where))
+        if latest_only:
+            sql = (f"SELECT * FROM ({sql}) s WHERE created_at = (SELECT MAX(created_at) FROM scores t "
+                   "WHERE t.service_name = s.service_name AND t.category = s.category AND t.phase = ?"
+                   + (" AND t.created_at >= ?" if since is not None else "")
+                   + (" AND t.created_at < ?" if until is not None else "") + ")")
+            args += [phase] + [v for v in (since, until) if v is not None]
+        sql += " ORDER BY score DESC, created_at DESC LIMIT ?"
+        return [dict(r) for r in self._query(sql, (*args, limit))]
+
+    def history(self, service: str, category: str = None, phase: str = "final",
+                limit: int = 100) -> List[Dict[str, Any]]:
+        """서비스의 점수 추이 (오래된 순) — category를 주면 해당 항목만"""
+        if category:
+            rows = self._query(
+                "SELECT run_id, created_at, category, label, score FROM scores WHERE service_name = ? "
+                "AND category = ? AND phase = ? ORDER BY created_at DESC LIMIT ?",
+                (service, canonical_category(category), phase, limit))
+            return [dict(r) for r in reversed(rows)]
+        rows = self._query(
+            "SELECT run_id, created_at, avg_score, final_avg_score FROM runs WHERE service_name = ? "
+            "ORDER BY created_at DESC LIMIT ?", (service, limit))
+        return [dict(r) for r in reversed(rows)]
+
+    def category_stats(self, since: float = None, until: float = None, phase: str = "final",
+                       high_risk: float = 4.0) -> List[Dict[str, Any]]:
+        """기간 내 항목별 run 수 / 평균 / 최고 점수 / 고위험(high_risk 이상) 수"""
+        where, args = ["phase = ?"], [phase]
+        if since is not None:
+            where.append("created_at >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("created_at < ?")
+            args.append(until)
+        rows = self._query(
+            "SELECT category, COUNT(score) AS runs, ROUND(AVG(score), 2) AS avg_score, MAX(score) AS max_score, "
+            "SUM(score >= ?) AS high_risk FROM scores WHERE " + " AND ".join(where)
+            + " GROUP BY category ORDER BY avg_score DESC", (high_risk, *args))
+        return [dict(r) for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._query("SELECT COUNT(*) AS runs, COUNT(DISTINCT service_name) AS services, "
+                           "MIN(created_at) AS first, MAX(created_at) AS last FROM runs", ())
+        return dict(rows[0])
+
+
+def get_results_store() -> ResultsStore:
+    """프로세스 공용 결과 저장소"""
+    global _STORE
+    with _LOCK:
+        if _STORE is None:
+            _STORE = ResultsStore(RESULTS_PATH)
+        return _STORE
+
+
+def record_audit(state: Dict[str, Any]) -> bool:
+    """진단 결과를 저장소에 기록 — 저장 실패는 경고만 남기고 진단 결과에는 영향 없음"""
+    if not ENABLED:
+        return False
+    try:
+        get_results_store().record(state)
+        return True
+    except Exception as e:
+        print(f"⚠️ 결과 저장소 기록 실패: {e}")
+        return False
+
+
+def record_report_paths(run_id: str, paths: List[str]) -> bool:
+    if not (ENABLED and run_id):
+        return False
+    try:
+        return get_results_store().set_report_paths(run_id, paths)
+    except Exception as e:
+        print(f"⚠️ 결과 저장소 보고서 경로 갱신 실패: {e}")
+        return False
@@ -1,18 +1,23 @@
 import os
 import re
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from agents import model_clients
+from agents.context_packer import pack_context, truncate_to_tokens
+from agents.llm_cache import cached_completion, cached_stream_completion
 
 load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+CONTEXT_TOKENS = int(os.getenv("EVAL_CONTEXT_TOKENS", "1000"))  # 평가 프롬프트의 가이드라인 문맥 토큰 예산 (이전 4000자 절단과 같은 크기)
 
 
-def evaluate_risks(state):
+def evaluate_risks(state, use_cache: bool = True, on_score=None, categories=None):
     """
     RAG 문맥 기반 윤리 리스크 평가
-    - 입력: state (policy_context, human_feedback)
+    - 입력: state (policy_chunks 또는 policy_context, human_feedback)
     - 출력: state["risk_assessment"]
+    - use_cache=False: LLM 응답 캐시를 건너뛰고 새로 평가
+    - on_score(항목, {"score", "comment"}): 지정하면 스트리밍으로 평가하며 항목 점수가 완성되는 즉시 호출
+    - categories: 지정하면 해당 항목만 평가 (피드백 기반 부분 재평가)
     """
     policy_context = state.get("policy_context", "")
     feedback = state.get("human_feedback", None)
@@ -22,29 +27,46 @@ def evaluate_risks(state):
         "이 내용을 바탕으로 각 항목(공정성, 편향성, 투명성, 설명가능성, 프라이버시 등)에 대해 "
         "1~5점으로 평가하고, 간단한 코멘트를 제공하세요.\n"
     )
+    if categories:
+        base_prompt = (
+            "다음은 AI 윤리 가이드라인 문맥입니다.\n"
+            f"이 내용을 바탕으로 다음 항목만 1~5점으로 평가하고, 간단한 코멘트를 제공하세요: "
+            f"{', '.join(categories)}\n"
+        )
 
     if feedback:
         base_prompt += f"\n사용자 피드백: {feedback}\n"
         print("💡 사용자 피드백을 반영한 재평가 수행 중...")
 
-    # === 문맥 처리 ===
-    if isinstance(policy_context, list):
+    # === 문맥 처리 (청크가 있으면 중복 제거 + 리스크 균형 + 토큰 예산으로 구성) ===
+    chunks = state.get("policy_chunks")
+    if chunks:
+        packed = pack_context(chunks, CONTEXT_TOKENS)
+        policy_text = packed["text"]
+        print(f"📦 평가 문맥: 청크 {len(chunks)}개 중 {len(packed['chunk_ids'])}개 "
+              f"(근접 중복 {packed['duplicates']}개 제외), {packed['tokens']}/{CONTEXT_TOKENS} 토큰")
+    elif isinstance(policy_context, list):
         policy_text = "\n\n".join(
             [getattr(doc, "page_content", str(doc)) for doc in policy_context]
         )
     else:
         policy_text = str(policy_context)
+    if not chunks:
+        policy_text = truncate_to_tokens(policy_text, CONTEXT_TOKENS)
 
-    prompt = f"{base_prompt}\n=== 문맥 ===\n{policy_text[:4000]}"
+    prompt = f"{base_prompt}\n=== 문맥 ===\n{policy_text}"
 
-    # === LLM 호출 ===
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4
-    )
+    if on_score is not None:
+        state["risk_assessment"] = _stream_evaluation(prompt, on_score, use_cache)
+        print("✅ 윤리 리스크 평가 완료.")
+        return state
+
+    # === LLM 호출 (동일 프롬프트는 캐시 재사용) ===
+    def _call():
+        return model_clients.chat(prompt, model="gpt-4o-mini", temperature=0.4)
 
-    result = response.choices[0].message.content
+    result = cached_completion("gpt-4o-mini", 0.4, prompt, _call, bypass=not use_cache,
+                               span_name="llm.evaluate")
 
     # ✅ 평가 결과 파싱
     state["risk_assessment"] = _parse_evaluation(result)
@@ -52,38 +74,91 @@ def evaluate_risks(state):
     return state
 
 
-def _parse_evaluation(result_text: str):
-    """LLM 출력 결과를 dict 형태로 파싱 (Markdown, 번호, 별표, 잡음 줄 무시)"""
-    assessment = {}
-    lines = result_text.strip().split("\n")
+def _stream_evaluation(prompt: str, on_score, use_cache: bool = True) -> dict:
+    """응답을 토큰 스트림으로 받으며 완성된 줄마다 점수를 파싱해 on_score로 전달"""
+    parser = EvaluationStreamParser(on_score)
 
-    for line in lines:
-        clean_line = line.strip()
+    def _stream(on_delta):
+        return model_clients.stream_chat(prompt, on_delta, model="gpt-4o-mini", temperature=0.4)
 
-        # ① "점수:" "평균:" "Summary" 등 불필요한 줄은 건너뜀
-        if not clean_line or any(x in clean_line for x in ["점수:", "평균", "Summary", "총점", "평가"]):
-            continue
+    cached_stream_completion("gpt-4o-mini", 0.4, prompt, _stream, parser.feed,
+                             bypass=not use_cache, span_name="llm.evaluate")
+    return parser.close()
 
-        # ② Markdown 기호 제거 (###, ** 등)
-        clean_line = re.sub(r"[*#]+", "", clean_line)
-        clean_line = re.sub(r"^\s*\d+\.\s*", "", clean_line)  # "1. ", "2." 제거
 
-        # ③ "공정성 (Fairness): 4점" 또는 "Privacy: 3/5" 등 인식
-        match = re.search(
-            r"([가-힣A-Za-z\s\(\)]+)\s*[:\-]?\s*(\d+(?:\.\d+)?)(?:\s*/\s*[1-5]|점)?",
-            clean_line
-        )
-        if match:
-            key = match.group(1).strip()
-            score = float(match.group(2))
-            assessment[key] = {"score": score, "comment": clean_line}
+def _parse_line(line: str):
+    """평가 응답 1줄 → (항목, {"score", "comment"}) 또는 None"""
+    clean_line = line.strip()
 
-    # ④ 아무 항목도 잡히지 않으면 Summary로 저장
-    if not assessment:
-        assessment["Summary"] = {"comment": result_text}
+    # ① "점수:" "평균:" "Summary" 등 불필요한 줄은 건너뜀
+    if not clean_line or any(x in clean_line for x in ["점수:", "평균", "Summary", "총점", "평가"]):
+        return None
 
-    return assessment
+    # ② Markdown 기호 제거 (###, ** 등)
+    clean_line = re.sub(r"[*#]+", "", clean_line)
+    clean_line = re.sub(r"^\s*\d+\.\s*", "", clean_line)  # "1. ", "2." 제거
+
+    # ③ "공정성 (Fairness): 4점" 또는 "Privacy: 3/5" 등 인식
+    match = re.search(
+        r"([가-힣A-Za-z\s\(\)]+)\s*[:\-]?\s*(\d+(?:\.\d+)?)(?:\s*/\s*[1-5]|점)?",
+        clean_line
+    )
+    if not match:
+        return None
+    return match.group(1).strip(), {"score": float(match.group(2)), "comment": clean_line}
 
 
+class EvaluationStreamParser:
+    """
+    _parse_evaluation의 점진적 버전 — 응답 조각을 feed()로 넣으면 줄이 완성될 때마다 파싱
+    - on_score(항목, 결과)는 항목 점수가 파싱되는 즉시 호출 (같은 항목이 다시 나오면 갱신값으로 재호출)
+    - close()는 마지막 줄까지 처리한 최종 assessment dict 반환 (_parse_evaluation과 동일한 결과)
+    """
 
+    def __init__(self, on_score=None):
+        self.on_score = on_score
+        self.assessment = {}
+        self._buf = ""
+        self._raw = []
+
+    def feed(self, delta: str):
+        self._raw.append(delta)
+        *lines, self._buf = (self._buf + delta).split("\n")
+        for line in lines:
+            self._handle(line)
+
+    def _handle(self, line: str):
+        parsed = _parse_line(line)
+        if parsed:
+            key, entry = parsed
+            self.assessment[key] = entry
+            if self.on_score:
+                self.on_score(key, entry)
+
+    def close(self) -> dict:
+        if self._buf:
+            self._handle(self._buf)
+            self._buf = ""
+        # ④ 아무 항목도 잡히지 않으면 Summary로 저장
+        if not self.assessment:
+            self.assessment["Summary"] = {"comment": "".join(self._raw)}
+        return self.assessment
+
+
+def iter_scores(chunks):
+    """텍스트 조각 이터러블(스트림)에서 (항목, 결과)를 완성되는 순서대로 생성"""
+    found = []
+    parser = EvaluationStreamParser(lambda k, v: found.append((k, v)))
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from found
+        found.clear()
+    parser.close()
+    yield from found
 
+
+def _parse_evaluation(result_text: str):
+    """LLM 출력 결과를 dict 형태로 파싱 (Markdown, 번호, 별표, 잡음 줄 무시)"""
+    parser = EvaluationStreamParser()
+    parser.feed(result_text)
+    return parser.close()
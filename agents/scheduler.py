@@ -0,0 +1,98 @@
+# agents/scheduler.py
+# state dict 위에서 동작하는 의존성 기반(DAG) 단계 스케줄러 — 선행 단계가 끝난 단계들을 스레드로 동시 실행
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from agents import tracing
+
+
+class Stage:
+    """
+    파이프라인 단계 1개
+    - fn(state) -> 갱신할 키만 담은 dict (또는 None)
+    - deps: 먼저 끝나야 하는 단계 이름 목록
+    - when(state) -> False면 실행하지 않고 완료로 간주 (선택)
+    - complete(updates) -> False면 단계는 끝났지만 결과를 완료로 기록하지 않음 (체크포인트 재개 시 다시 실행, 선택)
+    """
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                 deps: List[str] = None, when: Callable[[Dict[str, Any]], bool] = None,
+                 complete: Callable[[Dict[str, Any]], bool] = None):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps or [])
+        self.when = when
+        self.complete = complete
+
+
+def _check_graph(stages: List[Stage]):
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("단계 이름이 중복되었습니다.")
+    for s in stages:
+        missing = [d for d in s.deps if d not in names]
+        if missing:
+            raise ValueError(f"'{s.name}' 단계의 선행 단계가 없습니다: {missing}")
+
+
+def run_stages(stages: List[Stage], state: Dict[str, Any], max_workers: int = 4,
+               skip: Callable[[Stage], bool] = None,
+               on_done: Callable[[Stage, Dict[str, Any]], None] = None) -> Dict[str, Any]:
+    """
+    실행 가능한(선행 단계 완료) 단계를 모두 동시에 제출하고, 끝나는 대로 다음 단계를 제출
+    - 단계 결과 dict는 스케줄러 스레드에서만 state에 병합 (단계 함수는 state를 읽기만 함)
+    - skip(stage) -> True면 실행 없이 완료 처리 (체크포인트 재개 등)
+    - on_done(stage, updates): 단계 완료 직후 호출
+    - 각 단계 소요 시간은 state["stage_timings"]에 기록 (활성 trace가 있으면 stage span도 기록)
+    - 한 단계라도 예외가 나면 남은 단계를 취소하고 예외를 다시 던짐
+    """
+    _check_graph(stages)
+    timings = state.setdefault("stage_timings", {})
+    done, started = set(), set()
+    lock = threading.Lock()
+    ctx = tracing.carry()  # 호출한 스레드의 trace를 작업 스레드로 전달
+
+    def _run(stage: Stage):
+        t0 = time.perf_counter()
+        with tracing.carried(ctx), tracing.span(stage.name, "stage"):
+            updates = stage.fn(state) or {}
+        return updates, time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+        running = {}
+        while len(done) < len(stages):
+            progressed = False
+            for s in stages:
+                if s.name in started or not all(d in done for d in s.deps):
+                    continue
+                started.add(s.name)
+                progressed = True
+                if (skip and skip(s)) or (s.when and not s.when(state)):
+                    done.add(s.name)
+                    continue
+                running[pool.submit(_run, s)] = s
+
+            if not running:
+                if progressed:
+                    continue  # 건너뛴 단계 때문에 새로 실행 가능해진 단계 확인
+                raise ValueError(f"순환 의존성: {[s.name for s in stages if s.name not in done]}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                s = running.pop(fut)
+                try:
+                    updates, elapsed = fut.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                with lock:
+                    state.update(updates)
+                    timings[s.name] = round(elapsed, 3)
+                done.add(s.name)
+                if on_done:
+                    on_done(s, updates)
+
+    return state
@@ -1,54 +1,227 @@
 # agents/service_crawler.py
+import asyncio
 import os
-import requests
-from bs4 import BeautifulSoup
-from langchain_community.tools import TavilySearchResults
-from langchain_openai import ChatOpenAI
+import threading
+import time
+from urllib.parse import urlsplit
+
 from dotenv import load_dotenv
 
+from agents import crawl_cache, model_clients, tracing
+from agents.html_extract import SNIFF_BYTES, ParagraphExtractor, sniff_encoding
+from agents.llm_cache import cached_completion
+
 load_dotenv()
 
-def crawl_service_info(service_name: str, max_results: int = 3) -> str:
+TEXT_BUDGET = 15000        # 요약에 넘길 최대 본문 길이 (문자)
+FETCH_TIMEOUT = 5.0        # 페이지 1개 요청 타임아웃 (초)
+FETCH_DEADLINE = 8.0       # 전체 페이지 수집 마감 시간 (초)
+PER_HOST_LIMIT = 2         # 호스트당 동시 요청 수
+MAX_PAGE_BYTES = 4 * 1024 * 1024  # 문단이 없어도 페이지당 이 이상은 읽지 않음
+USER_AGENT = "Mozilla/5.0 (compatible; AIEthicsAuditAgent/1.0)"
+
+# === 프로세스 공용 비동기 수집기 (백그라운드 이벤트 루프 + 연결 풀) ===
+_LOOP_LOCK = threading.Lock()
+_LOOP = None
+_CLIENT = None
+_HOST_SEMAPHORES = {}
+
+
+def _get_loop():
+    """수집 전용 이벤트 루프를 데몬 스레드에서 1회 기동 (어느 스레드에서 호출해도 공유)"""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="crawler-loop", daemon=True).start()
+            _LOOP = loop
+        return _LOOP
+
+
+def _get_client() -> "httpx.AsyncClient":
+    """keep-alive 연결을 재사용하는 공용 AsyncClient (수집 루프 안에서만 호출, httpx는 첫 수집 시 로드)"""
+    global _CLIENT
+    if _CLIENT is None:
+        import httpx
+
+        _CLIENT = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+    return _CLIENT
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    if host not in _HOST_SEMAPHORES:
+        _HOST_SEMAPHORES[host] = asyncio.Semaphore(PER_HOST_LIMIT)
+    return _HOST_SEMAPHORES[host]
+
+
+async def _fetch_page(url: str, cap, use_cache: bool = True):
+    """
+    페이지 본문 수집 — 반환: (본문, 출처)
+    - cap(): 지금 남은 본문 예산 (전체 예산 - 이미 수집한 글자 수) — 먼저 끝난 페이지가 예산을 많이 채울 수 있음
+    - 응답을 스트리밍으로 읽으며 <p> 문단만 추출하고, 남은 예산을 채우면 연결을 끊음
+    - 인코딩: Content-Type의 charset → 없으면 <meta charset> / 바이트 내용으로 추정 (EUC-KR/CP949 페이지)
+    - 출처 "cache": 신선도 기간 안이라 요청 없이 캐시 사용
+    - 출처 "304": ETag/Last-Modified 재검증 결과 변경 없음 (본문 다운로드 없음)
+    - 출처 "fetched": 새로 다운로드
+    """
+    share = max(cap(), 1)
+    cached = crawl_cache.get_page(url) if use_cache else None
+    if cached and not crawl_cache.covers(cached, share):
+        cached = None  # 지난번에 더 작은 몫만 읽고 끊은 본문이면 다시 받아야 함
+    if cached and crawl_cache.is_fresh(cached):
+        return cached["text"][:share], "cache"
+
+    async with _host_semaphore(url):
+        share = max(cap(), 1)  # 호스트 대기 중 다른 페이지가 예산을 채웠을 수 있음
+        async with _get_client().stream("GET", url, timeout=FETCH_TIMEOUT,
+                                        headers=crawl_cache.conditional_headers(cached)) as res:
+            if res.status_code == 304 and cached:
+                crawl_cache.touch_page(url, cached)
+                return cached["text"][:share], "304"
+            res.raise_for_status()
+            parser = ParagraphExtractor(share, res.charset_encoding) if res.charset_encoding else None
+            head = b""
+            truncated = False
+            async for chunk in res.aiter_bytes():
+                if parser is None:
+                    head += chunk  # charset 헤더가 없으면 앞부분을 모아 인코딩을 추정한 뒤 파싱 시작
+                    if len(head) < SNIFF_BYTES:
+                        continue
+                    parser, chunk = ParagraphExtractor(share, sniff_encoding(head)), head
+                parser.feed_bytes(chunk)
+                if parser.done or parser.bytes_read >= MAX_PAGE_BYTES:
+                    truncated = True  # 예산을 채웠거나 바이트 상한 도달 → 페이지 끝까지 읽지 않음
+                    break  # 블록을 빠져나가면 응답이 닫히며 나머지는 받지 않음
+            if parser is None:  # 본문 전체가 SNIFF_BYTES보다 짧은 페이지
+                parser = ParagraphExtractor(share, sniff_encoding(head))
+                parser.feed_bytes(head)
+            text = parser.text()
+            etag, last_modified = res.headers.get("ETag"), res.headers.get("Last-Modified")
+    # 중간에 끊은 본문은 이번 몫까지만 유효 — 더 큰 몫을 요청하면 다시 받음
+    crawl_cache.put_page(url, text, etag, last_modified, budget=share if truncated else None)
+    return text, "fetched"
+
+
+async def _fetch_page_traced(url: str, cap, use_cache: bool = True):
+    """페이지 1개 수집을 fetch_page span으로 감쌈 (취소되면 span.error에 CancelledError 기록)"""
+    with tracing.span("fetch_page", "http", url=url) as sp:
+        text, source = await _fetch_page(url, cap, use_cache)
+        if sp:
+            sp.set(source=source, cache_hit=source != "fetched", chars=len(text))
+        return text, source
+
+
+_SOURCE_LABEL = {"cache": " (캐시)", "304": " (변경 없음, 304)", "fetched": ""}
+
+
+async def _fetch_pages(urls, budget: int, deadline: float, use_cache: bool = True):
+    """
+    모든 페이지를 동시에 요청하고, 본문이 budget만큼 모이거나 마감 시간이 지나면 나머지를 취소
+    - 페이지마다 고정 몫을 나누지 않고 남은 예산(budget - 수집량)까지 읽게 함 → 빨리 끝난 페이지가 예산을 채우면 나머지 요청은 취소
+    - 반환: 검색 결과 순서를 유지한 본문 목록
+    """
+    texts = {}
+    collected = 0
+
+    def cap() -> int:
+        return budget - collected
+
+    tasks = {asyncio.create_task(_fetch_page_traced(u, cap, use_cache)): i for i, u in enumerate(urls)}
+    end = time.monotonic() + deadline
+    pending = set(tasks)
+    while pending:
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            print(f"   ⏱️ 수집 마감 시간 초과 → {len(pending)}개 요청 취소")
+            break
+        done, pending = await asyncio.wait(pending, timeout=remaining,
+                                           return_when=asyncio.FIRST_COMPLETED)
+        for t in done:
+            url = urls[tasks[t]]
+            try:
+                text, source = t.result()
+            except Exception as e:
+                print(f"   ⚠️ {url} 수집 실패: {e}")
+                continue
+            texts[tasks[t]] = text
+            collected += len(text)
+            print(f"   📄 {url} 수집 완료{_SOURCE_LABEL[source]}")
+        if collected >= budget and pending:
+            print(f"   ✂️ 본문 {collected}자 확보 → 남은 {len(pending)}개 요청 조기 취소")
+            break
+    for t in pending:
+        t.cancel()
+    return [texts[i] for i in sorted(texts)]
+
+
+def fetch_page_texts(urls, budget: int = TEXT_BUDGET, deadline: float = FETCH_DEADLINE,
+                     use_cache: bool = True):
+    """동기 코드에서 호출하는 페이지 동시 수집 진입점"""
+    if not urls:
+        return []
+    with tracing.span("crawl.fetch_pages", "http", pages=len(urls)):
+        ctx = tracing.carry()  # 수집 루프의 태스크들도 같은 trace에 span을 남기도록
+
+        async def _run():
+            with tracing.carried(ctx):
+                return await _fetch_pages(list(urls), budget, deadline, use_cache)
+
+        future = asyncio.run_coroutine_threadsafe(_run(), _get_loop())
+        return future.result()
+
+
+def crawl_service_info(service_name: str, max_results: int = 3, use_cache: bool = True) -> str:
     """
     AI 서비스 이름을 입력받아 Tavily API로 검색 후, 웹페이지를 크롤링하고 요약 반환
+    - use_cache=False: 검색/페이지 캐시와 LLM 응답 캐시(요약)를 모두 건너뜀
     """
     print(f"🌐 '{service_name}' 관련 웹 정보 수집 중...")
 
-    # 1️⃣ Tavily API로 검색 (langchain community tool)
-    search = TavilySearchResults(max_results=max_results)
-    results = search.run(f"{service_name} AI 서비스 설명 OR 기술 구조 OR product overview")
+    # 1️⃣ Tavily API로 검색 (langchain community tool, 신선도 기간 안이면 캐시 재사용)
+    query = f"{service_name} AI 서비스 설명 OR 기술 구조 OR product overview"
+    with tracing.span("tavily.search", "http", max_results=max_results) as sp:
+        results = crawl_cache.get_search(query, max_results) if use_cache else None
+        if results is not None:
+            print("   🗃️ 캐시된 검색 결과 사용")
+            if sp:
+                sp.set(cache_hit=True)
+        else:
+            from langchain_community.tools import TavilySearchResults
+
+            search = TavilySearchResults(max_results=max_results)
+            results = search.run(query)
+            if isinstance(results, list) and results:
+                crawl_cache.put_search(query, max_results, results)
 
     if not results:
         print("⚠️ 검색 결과가 없습니다.")
         return ""
 
-    # 2️⃣ 각 페이지에서 본문 추출
-    texts = []
-    for r in results:
-        try:
-            url = r["url"]
-            res = requests.get(url, timeout=5)
-            soup = BeautifulSoup(res.text, "html.parser")
-            paragraphs = " ".join([p.get_text() for p in soup.find_all("p")])
-            texts.append(paragraphs)
-            print(f"   📄 {url} 수집 완료")
-        except Exception as e:
-            print(f"   ⚠️ {r['url']} 수집 실패: {e}")
-            continue
+    # 2️⃣ 각 페이지에서 본문 추출 (동시 요청, 마감 시간/본문 예산 도달 시 조기 종료)
+    urls = [r["url"] for r in results if isinstance(r, dict) and r.get("url")]
+    texts = [t for t in fetch_page_texts(urls, use_cache=use_cache) if t]
 
     if not texts:
         return ""
 
-    combined_text = " ".join(texts)[:15000]  # 너무 긴 텍스트는 잘라냄
+    combined_text = " ".join(texts)[:TEXT_BUDGET]  # 너무 긴 텍스트는 잘라냄
 
-    # 3️⃣ LLM 요약
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
+    # 3️⃣ LLM 요약 (본문이 지난번과 같으면 프롬프트도 같으므로 LLM 응답 캐시에서 재사용 — LLM_CACHE/TTL 설정을 따름)
     prompt = f"""
     다음은 '{service_name}'에 대한 웹에서 수집한 설명입니다.
     기술적 구조, 서비스 목적, 주요 기능 중심으로 간결하게 요약해줘.
     -----
     {combined_text}
     """
-    summary = llm.invoke(prompt)
+    def _call():
+        return model_clients.chat(prompt, model="gpt-4o-mini", temperature=0.3)
+
+    summary = cached_completion("gpt-4o-mini", 0.3, prompt, _call, bypass=not use_cache,
+                                span_name="llm.summarize")
     print("✅ 요약 완료")
-    return summary.content
+    return summary
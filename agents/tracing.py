@@ -0,0 +1,255 @@
+# agents/tracing.py
+# 실행 단위 트레이싱 — 파이프라인 단계/외부 호출마다 span(소요 시간, 토큰, 예상 비용, 캐시 적중) 기록
+# JSONL 및 Chrome trace-event(chrome://tracing, Perfetto) 형식으로 내보내고 집계표 출력
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+LOG_DIR = os.path.join("outputs", "logs")
+# TRACING=off 이면 span 기록을 전역적으로 끔
+ENABLED = os.getenv("TRACING", "on").lower() not in ("0", "off", "false", "no")
+
+# 모델별 100만 토큰당 USD (입력, 출력) — 예상 비용 계산용
+PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+_TRACE = contextvars.ContextVar("audit_trace", default=None)
+_SPAN = contextvars.ContextVar("audit_span", default=None)
+_IDS = iter(range(1, 1 << 62))
+_ID_LOCK = threading.Lock()
+
+
+def _next_id() -> int:
+    with _ID_LOCK:
+        return next(_IDS)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1e6
+
+
+class Span:
+    """단계 또는 외부 호출 1건 (attrs에 model, tokens, cache_hit 등 자유롭게 기록)"""
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[int], attrs: Dict[str, Any]):
+        self.id = _next_id()
+        self.name = name
+        self.kind = kind
+        self.parent_id = parent_id
+        self.attrs = dict(attrs)
+        self.thread = threading.current_thread().name
+        self.tid = threading.get_ident()
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add_usage(self, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.attrs["prompt_tokens"] = self.attrs.get("prompt_tokens", 0) + (prompt_tokens or 0)
+        self.attrs["completion_tokens"] = self.attrs.get("completion_tokens", 0) + (completion_tokens or 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id, "parent_id": self.parent_id, "name": self.name, "kind": self.kind,
+            "start": round(self.start, 6), "duration_sec": round(self.duration or 0.0, 6),
+            "thread": self.thread, "error": self.error, **self.attrs,
+        }
+
+
+class Trace:
+    """진단 1회(run)의 span 모음 — 여러 스레드에서 동시에 추가 가능"""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started = time.time()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_jsonl(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for s in sorted(self.spans, key=lambda s: s.start):
+                f.write(json.dumps({"run_id": self.run_id, **s.to_dict()}, ensure_ascii=False) + "\n")
+
+    def chrome_events(self, pid: int = 1) -> List[dict]:
+        """Chrome trace-event 'X'(complete) 이벤트 목록 (단위: μs)"""
+        events = [{"name": "process_name", "ph": "M", "pid": pid,
+                   "args": {"name": self.run_id}}]
+        for s in self.spans:
+            events.append({
+                "name": s.name, "cat": s.kind, "ph": "X", "pid": pid, "tid": s.tid,
+                "ts": int((s.start - self.started) * 1e6), "dur": int((s.duration or 0.0) * 1e6),
+                "args": {k: v for k, v in s.to_dict().items() if k not in ("name", "kind", "start")},
+            })
+        return events
+
+    def to_chrome(self, path: str):
+        write_chrome_trace([self], path)
+
+    def export(self, log_dir: str = LOG_DIR, prefix: str = None) -> Dict[str, str]:
+        """outputs/logs/<prefix>.jsonl, <prefix>.trace.json 저장 후 경로 반환"""
+        prefix = prefix or f"trace_{self.run_id}"
+        paths = {
+            "jsonl": os.path.join(log_dir, f"{prefix}.jsonl"),
+            "chrome": os.path.join(log_dir, f"{prefix}.trace.json"),
+        }
+        self.to_jsonl(paths["jsonl"])
+        self.to_chrome(paths["chrome"])
+        return paths
+
+
+def write_chrome_trace(traces: List[Trace], path: str):
+    """여러 run을 프로세스(pid)별로 나눠 한 파일에 저장 (배치 진단용)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    events = []
+    for i, t in enumerate(traces, start=1):
+        events.extend(t.chrome_events(pid=i))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+
+# === 현재 실행 문맥 ===
+def start_trace(run_id: str) -> Optional[Trace]:
+    """현재 문맥(스레드/태스크)에 새 trace를 연결"""
+    if not ENABLED:
+        return None
+    trace = Trace(run_id)
+    _TRACE.set(trace)
+    _SPAN.set(None)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _TRACE.get()
+
+
+def current_span() -> Optional[Span]:
+    return _SPAN.get()
+
+
+def carry():
+    """다른 스레드/이벤트 루프로 넘길 현재 (trace, span)"""
+    return _TRACE.get(), _SPAN.get()
+
+
+@contextmanager
+def carried(ctx):
+    """carry()로 받은 문맥을 이 블록 안에서 현재 문맥으로 사용"""
+    t1 = _TRACE.set(ctx[0])
+    t2 = _SPAN.set(ctx[1])
+    try:
+        yield
+    finally:
+        _SPAN.reset(t2)
+        _TRACE.reset(t1)
+
+
+@contextmanager
+def span(name: str, kind: str = "stage", **attrs):
+    """
+    with span("evaluate", "stage"): ... — 활성 trace가 없으면 기록하지 않음 (None 반환)
+    - 블록 안의 예외는 span.error에 기록하고 그대로 다시 던짐
+    - attrs에 model과 토큰 수가 있으면 종료 시 cost_usd를 계산
+    """
+    trace = _TRACE.get()
+    if trace is None:
+        yield None
+        return
+    parent = _SPAN.get()
+    s = Span(name, kind, parent.id if parent else None, attrs)
+    token = _SPAN.set(s)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.duration = time.perf_counter() - t0
+        _SPAN.reset(token)
+        if "prompt_tokens" in s.attrs and s.attrs.get("model"):
+            s.attrs["cost_usd"] = round(estimate_cost(
+                s.attrs["model"], s.attrs.get("prompt_tokens", 0), s.attrs.get("completion_tokens", 0)
+            ), 8)
+        trace.add(s)
+
+
+def record_usage(response):
+    """
+    LLM 응답 객체의 토큰 사용량을 현재 span에 기록
+    - openai ChatCompletion: response.usage.prompt_tokens / completion_tokens
+    - langchain AIMessage: response.usage_metadata["input_tokens"/"output_tokens"]
+    """
+    s = _SPAN.get()
+    if s is None or response is None:
+        return
+    usage = getattr(response, "usage", None)
+    if usage is not None and hasattr(usage, "prompt_tokens"):
+        s.add_usage(usage.prompt_tokens, usage.completion_tokens)
+        return
+    meta = getattr(response, "usage_metadata", None)
+    if isinstance(meta, dict):
+        s.add_usage(meta.get("input_tokens", 0), meta.get("output_tokens", 0))
+
+
+# === 집계 ===
+def summarize(traces: List[Trace]) -> List[dict]:
+    """(kind, name)별 호출 수, 총/평균/최대 시간, 토큰, 비용, 캐시 적중 집계"""
+    rows = {}
+    for t in traces:
+        for s in t.spans:
+            r = rows.setdefault((s.kind, s.name), {
+                "kind": s.kind, "name": s.name, "count": 0, "total_sec": 0.0, "max_sec": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+                "cache_hits": 0, "errors": 0,
+            })
+            d = s.duration or 0.0
+            r["count"] += 1
+            r["total_sec"] += d
+            r["max_sec"] = max(r["max_sec"], d)
+            r["prompt_tokens"] += s.attrs.get("prompt_tokens", 0)
+            r["completion_tokens"] += s.attrs.get("completion_tokens", 0)
+            r["cost_usd"] += s.attrs.get("cost_usd", 0.0)
+            r["cache_hits"] += bool(s.attrs.get("cache_hit"))
+            r["errors"] += s.error is not None
+    out = sorted(rows.values(), key=lambda r: -r["total_sec"])
+    for r in out:
+        r["avg_sec"] = round(r["total_sec"] / r["count"], 4)
+        r["total_sec"] = round(r["total_sec"], 4)
+        r["max_sec"] = round(r["max_sec"], 4)
+        r["cost_usd"] = round(r["cost_usd"], 6)
+    return out
+
+
+def print_summary(traces: List[Trace], title: str = "실행 트레이스 요약"):
+    rows = summarize([t for t in traces if t])
+    if not rows:
+        return
+    print(f"\n⏱️ {title}")
+    print("-" * 104)
+    print(f"{'kind':<8} {'name':<28} {'calls':>5} {'total(s)':>9} {'avg(s)':>8} {'max(s)':>8} "
+          f"{'tok in':>8} {'tok out':>8} {'cost($)':>9} {'cache':>6}")
+    print("-" * 104)
+    for r in rows:
+        print(f"{r['kind']:<8} {r['name'][:28]:<28} {r['count']:>5} {r['total_sec']:>9.3f} "
+              f"{r['avg_sec']:>8.3f} {r['max_sec']:>8.3f} {r['prompt_tokens']:>8} "
+              f"{r['completion_tokens']:>8} {r['cost_usd']:>9.5f} {r['cache_hits']:>6}")
+    print("-" * 104)
+    total_cost = sum(r["cost_usd"] for r in rows)
+    total_tok = sum(r["prompt_tokens"] + r["completion_tokens"] for r in rows)
+    print(f"💰 토큰 {total_tok}개, 예상 비용 ${total_cost:.5f}\n")
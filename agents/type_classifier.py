@@ -1,7 +1,6 @@
 # AI 서비스 유형 분류
 # agents/type_classifier.py
 import json
-from langchain_openai import ChatOpenAI
 
 def classify_service(purpose: str) -> dict:
     """AI 서비스 목적을 기반으로 유형 분류"""
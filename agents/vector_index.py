@@ -0,0 +1,114 @@
+# agents/vector_index.py
+# 메모리 맵 NumPy 행렬 기반 벡터 인덱스 — 수천 개 청크 규모에서 Chroma 대체용 검색 백엔드
+import json
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+NP_INDEX_DIR = os.path.join("data", "vectorstore_np")
+_BLOCK_ROWS = 65536  # 한 번에 내적 계산할 행 수 (float16 → float32 변환 메모리 제한)
+
+
+class NumpyVectorIndex:
+    """
+    디렉터리 구조
+    - embeddings.npy : (N, dim) float32/float16 행렬 (np.load mmap_mode="r")
+    - norms.npy      : 각 행의 제곱 노름 (float32) — L2 거리 계산용
+    - meta.jsonl     : 행 순서대로 {"id", "content", "metadata"}
+    - index.json     : {"count", "dim", "dtype", "model"}
+    """
+
+    def __init__(self, path: str = NP_INDEX_DIR):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            self.info = json.load(f)
+        self.matrix = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.sq_norms = np.load(os.path.join(path, "norms.npy"))
+        self.ids, self.contents, self.metadatas = [], [], []
+        with open(os.path.join(path, "meta.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                self.ids.append(row["id"])
+                self.contents.append(row["content"])
+                self.metadatas.append(row.get("metadata") or {})
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def build(path: str, ids: Sequence[str], vectors, contents: Sequence[str],
+              metadatas: Sequence[dict], dtype: str = "float32", model: str = ""):
+        """청크 id/벡터/본문/메타데이터로 인덱스 디렉터리 생성 (임시 파일 후 교체)"""
+        os.makedirs(path, exist_ok=True)
+        mat = np.asarray(vectors, dtype=np.float32)
+        sq_norms = np.einsum("ij,ij->i", mat, mat).astype(np.float32)
+
+        np.save(os.path.join(path, "embeddings.tmp.npy"), mat.astype(dtype))
+        np.save(os.path.join(path, "norms.tmp.npy"), sq_norms)
+        with open(os.path.join(path, "meta.tmp.jsonl"), "w", encoding="utf-8") as f:
+            for cid, content, meta in zip(ids, contents, metadatas):
+                f.write(json.dumps({"id": cid, "content": content or "", "metadata": meta or {}},
+                                   ensure_ascii=False) + "\n")
+        with open(os.path.join(path, "index.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": int(mat.shape[0]), "dim": int(mat.shape[1]) if mat.size else 0,
+                       "dtype": dtype, "model": model}, f, indent=2)
+        # index.json은 마지막에 교체 — 읽는 쪽이 부분 기록된 index.json을 보지 않음
+        for name in ("embeddings.npy", "norms.npy", "meta.jsonl", "index.json"):
+            stem, ext = os.path.splitext(name)
+            os.replace(os.path.join(path, f"{stem}.tmp{ext}"), os.path.join(path, name))
+
+    def search_by_vectors(self, vectors, k: int = 5) -> List[List[Dict]]:
+        """
+        질의 벡터 묶음에 대한 top-k 검색 (행렬 내적 1회 + argpartition)
+        - distance: 제곱 L2 거리 (Chroma 기본 l2 공간과 같은 척도)
+        """
+        if len(self) == 0 or not len(vectors):
+            return [[] for _ in vectors]
+        q = np.asarray(vectors, dtype=np.float32)            # (B, dim)
+        q_sq = np.einsum("ij,ij->i", q, q)                   # (B,)
+        k = min(k, len(self))
+
+        # 블록 단위로 내적 → 블록별 top-k 후보를 모아 최종 top-k 선택
+        cand_idx, cand_dist = [], []
+        for start in range(0, len(self), _BLOCK_ROWS):
+            block = np.asarray(self.matrix[start:start + _BLOCK_ROWS], dtype=np.float32)
+            dots = q @ block.T                               # (B, rows)
+            dist = q_sq[:, None] + self.sq_norms[None, start:start + block.shape[0]] - 2.0 * dots
+            kk = min(k, block.shape[0])
+            part = np.argpartition(dist, kk - 1, axis=1)[:, :kk]
+            cand_idx.append(part + start)
+            cand_dist.append(np.take_along_axis(dist, part, axis=1))
+        idx = np.concatenate(cand_idx, axis=1)
+        dist = np.concatenate(cand_dist, axis=1)
+        order = np.argsort(dist, axis=1)[:, :k]
+        idx = np.take_along_axis(idx, order, axis=1)
+        dist = np.take_along_axis(dist, order, axis=1)
+
+        hits = []
+        for row_idx, row_dist in zip(idx, dist):
+            hits.append([{
+                "id": self.ids[i],
+                "content": self.contents[i],
+                "metadata": self.metadatas[i],
+                "distance": float(max(d, 0.0)),
+            } for i, d in zip(row_idx, row_dist)])
+        return hits
+
+
+def export_chroma_collection(collection, page_size: int = 1000, with_embeddings: bool = True):
+    """Chroma 컬렉션 전체를 (ids, embeddings, documents, metadatas)로 내보내기"""
+    ids, vectors, docs, metas = [], [], [], []
+    include = ["documents", "metadatas"] + (["embeddings"] if with_embeddings else [])
+    offset = 0
+    while True:
+        page = collection.get(include=include, limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        ids += page["ids"]
+        if with_embeddings:
+            vectors += list(page["embeddings"])
+        docs += page["documents"]
+        metas += page["metadatas"]
+        offset += len(page["ids"])
+    return ids, vectors, docs, metas
@@ -0,0 +1,261 @@
+# batch_audit.py
+# 매니페스트(CSV/JSONL)에 나열된 여러 AI 서비스를 비대화형으로 동시에 진단
+#
+# 사용 예:
+#   python batch_audit.py services.csv --concurrency 8 --feedback-policy auto
+#   python batch_audit.py services.csv --resume 20251101_120000   # 중단/실패한 배치를 체크포인트에서 재개
+#
+# CSV 컬럼: service_name(필수), purpose, features(; 구분), data_input, data_output, model, type
+# JSONL 라인: {"service_name": "...", "service_info": {...}}
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+from agents import checkpoint, tracing
+from agents.llm_cache import llm_cache_stats
+from agents.model_clients import client_stats
+from agents.report_builder import reports_ready
+from agents.results_store import record_report_paths
+from main import run_audit
+
+BATCH_DIR = os.path.join("outputs", "batch")
+SERVICE_INFO_FIELDS = ["purpose", "features", "data_input", "data_output", "model", "type"]
+
+
+def _slug(name: str) -> str:
+    """파일명으로 안전한 서비스 식별자"""
+    return re.sub(r"[^\w\-]+", "_", name).strip("_") or "service"
+
+
+def service_key(name: str) -> str:
+    """
+    결과 파일명/run_id용 서비스 키 — slug + 원래 이름의 짧은 해시
+    ("Chat GPT"와 "Chat_GPT"처럼 slug가 같은 서비스도 결과 파일과 체크포인트를 따로 가짐)
+    """
+    return f"{_slug(name)}_{hashlib.sha1(name.strip().encode('utf-8')).hexdigest()[:6]}"
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """매니페스트 파일을 [{"service_name", "service_info"}] 목록으로 로드 (같은 서비스 이름이 다시 나오면 건너뜀)"""
+    entries = []
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                name = row.get("service_name") or row.get("name")
+                if name:
+                    entries.append({"service_name": name, "service_info": row.get("service_info")})
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                name = (row.get("service_name") or row.get("name") or "").strip()
+                if not name:
+                    continue
+                info = {k: row[k].strip() for k in SERVICE_INFO_FIELDS if (row.get(k) or "").strip()}
+                if "features" in info:
+                    info["features"] = [x.strip() for x in info["features"].split(";") if x.strip()]
+                entries.append({"service_name": name, "service_info": info or None})
+
+    # 같은 이름이 두 번 나오면 결과 파일/체크포인트를 공유하며 동시에 실행되므로 첫 항목만 사용
+    seen, unique = set(), []
+    for entry in entries:
+        name = entry["service_name"].strip()
+        if name in seen:
+            print(f"⚠️ 매니페스트에 중복된 서비스 '{name}' → 첫 항목만 진단합니다.")
+            continue
+        seen.add(name)
+        unique.append(entry)
+    return unique
+
+
+def _write_result(result: Dict[str, Any], out_dir: str):
+    with open(os.path.join(out_dir, f"{service_key(result['service_name'])}.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def _audit_one(entry: Dict[str, Any], out_dir: str, feedback_policy: str,
+               use_cache: bool = True, batch_id: str = None, resume: bool = False) -> Dict[str, Any]:
+    """
+    서비스 1건 진단 후 결과 JSON 저장 (보고서는 백그라운드 렌더링, report_paths는 완료 후 기록)
+    - run_id는 <batch_id>_<service_key(서비스)> 로 고정되어 resume=True면 같은 서비스의 체크포인트에서 이어서 실행
+    """
+    name = entry["service_name"]
+    started = time.perf_counter()
+    run_id = f"{batch_id}_{service_key(name)}" if batch_id else None
+    result: Dict[str, Any] = {"service_name": name, "run_id": run_id}
+    trace = future = None
+    try:
+        state = run_audit(name, entry.get("service_info"),
+                          interactive=False, feedback_policy=feedback_policy,
+                          use_cache=use_cache, background_report=True,
+                          run_id=run_id, resume=resume)
+        result.update({
+            "status": "ok",
+            "resumed_stages": state.get("resumed_stages"),
+            "service_info": state.get("service_info"),
+            "risk_factors": state.get("risk_factors"),
+            "initial_assessment": state.get("initial_assessment"),
+            "final_assessment": state.get("final_assessment"),
+            "avg_score": state.get("avg_score"),
+            "final_avg_score": state.get("final_avg_score"),
+            "human_feedback": state.get("human_feedback"),
+            "recommendations": state.get("recommendations"),
+            "report_paths": state.get("report_paths"),
+            "trace_paths": state.get("trace_paths"),
+            "stage_timings": state.get("stage_timings"),
+        })
+        trace = state.get("trace")
+        future = state.get("report_future")
+    except Exception as e:
+        print(f"🚨 [{name}] 진단 실패: {e}")
+        result.update({"status": "error", "error": str(e)})
+
+    result["elapsed_sec"] = round(time.perf_counter() - started, 2)
+    _write_result(result, out_dir)
+    result["_trace"] = trace  # 배치 집계용 (JSON에는 저장하지 않음)
+    result["_report_future"] = future
+    return result
+
+
+def _collect_reports(results: List[Dict[str, Any]], out_dir: str):
+    """백그라운드 보고서 렌더링 완료를 기다려 서비스별 JSON에 report_paths 기록"""
+    pending = [(r, r.pop("_report_future", None)) for r in results]
+    pending = [(r, f) for r, f in pending if f is not None]
+    if not pending:
+        return
+    print(f"\n🖨️ 보고서 렌더링 완료 대기 중... ({len(pending)}건)")
+    for r, future in pending:
+        try:
+            md_path, pdf_path, render_sec = future.result()
+            r.update({"report_paths": [md_path, pdf_path], "report_render_sec": render_sec})
+            _record_report(r.get("run_id"), [md_path, pdf_path], render_sec)
+        except Exception as e:
+            print(f"🚨 [{r['service_name']}] 보고서 렌더링 실패: {e}")
+            r["report_error"] = str(e)
+        _write_result({k: v for k, v in r.items() if not k.startswith("_")}, out_dir)
+
+
+def _record_report(run_id: str, paths: List[str], render_sec: float):
+    """
+    백그라운드 렌더링이 끝난 보고서를 결과 저장소에 기록하고, 모든 파일이 만들어졌으면 체크포인트의 report 단계로도 기록
+    (재개 시 다시 렌더링하지 않음 — 실패한 형식이 있으면 재개 때 다시 렌더링)
+    """
+    record_report_paths(run_id, paths)
+    if not reports_ready(paths):
+        return
+    ckpt = checkpoint.Checkpoint.load(run_id) if run_id else None
+    if ckpt is None:
+        return
+    ckpt.record("report", {"report_paths": paths}, render_sec)
+
+
+def run_batch(entries: List[Dict[str, Any]],
+              concurrency: int = 4,
+              feedback_policy: str = "auto",
+              out_dir: str = None,
+              use_cache: bool = True,
+              resume: str = None) -> Dict[str, Any]:
+    """
+    여러 서비스를 최대 concurrency개씩 동시에 진단하고 요약 저장
+    - resume: 이전 배치 id — 서비스별 체크포인트에서 완료된 단계를 건너뛰고 이어서 실행 (결과는 같은 디렉터리에 갱신)
+    """
+    checkpoint.prune_checkpoints()
+    batch_id = resume or datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_dir = out_dir or os.path.join(BATCH_DIR, batch_id)
+    os.makedirs(out_dir, exist_ok=True)
+
+    print(f"\n🗂️ 배치 진단 {'재개' if resume else '시작'}: {len(entries)}개 서비스 (동시 실행 {concurrency})\n")
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(_audit_one, e, out_dir, feedback_policy, use_cache, batch_id, bool(resume))
+                   for e in entries]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            print(f"   {'✅' if r['status'] == 'ok' else '❌'} [{len(results)}/{len(entries)}] "
+                  f"{r['service_name']} ({r['elapsed_sec']}s)")
+
+    _collect_reports(results, out_dir)  # 진단은 끝났고 남은 렌더링만 기다림
+    traces = [t for t in (r.pop("_trace", None) for r in results) if t]
+    wall = round(time.perf_counter() - started, 2)
+    serial = round(sum(r["elapsed_sec"] for r in results), 2)
+    summary = {
+        "batch_id": batch_id,
+        "total": len(results),
+        "succeeded": sum(r["status"] == "ok" for r in results),
+        "failed": sum(r["status"] != "ok" for r in results),
+        "concurrency": concurrency,
+        "feedback_policy": feedback_policy,
+        "wall_clock_sec": wall,
+        "sum_of_runs_sec": serial,
+        "llm_cache": llm_cache_stats(),
+        "model_clients": client_stats(),
+        "trace_summary": tracing.summarize(traces),
+        "services": sorted(
+            [{
+                "service_name": r["service_name"],
+                "status": r["status"],
+                "avg_score": r.get("avg_score"),
+                "final_avg_score": r.get("final_avg_score"),
+                "elapsed_sec": r["elapsed_sec"],
+                "error": r.get("error"),
+            } for r in results],
+            key=lambda x: x["service_name"],
+        ),
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    if traces:
+        tracing.write_chrome_trace(traces, os.path.join(out_dir, "trace.json"))
+
+    print("\n" + "-" * 70)
+    print(f"{'서비스':<30} {'상태':<8} {'초기':<6} {'최종':<6} {'소요(s)'}")
+    print("-" * 70)
+    for s in summary["services"]:
+        init = f"{s['avg_score']:.2f}" if s["avg_score"] is not None else "-"
+        final = f"{s['final_avg_score']:.2f}" if s["final_avg_score"] is not None else "-"
+        print(f"{s['service_name']:<30} {s['status']:<8} {init:<6} {final:<6} {s['elapsed_sec']}")
+    print("-" * 70)
+    print(f"📦 성공 {summary['succeeded']} / 실패 {summary['failed']} — "
+          f"총 {wall}s (순차 실행 시 약 {serial}s)")
+    mc = summary["model_clients"]
+    print(f"🔌 모델 호출 {mc['calls']}회 — 재시도 {mc['retries']}회, 중복 요청 합치기 {mc['coalesced']}회, "
+          f"속도 제한 대기 {mc['rate_wait_sec']}s")
+    tracing.print_summary(traces, f"배치 트레이스 요약 ({len(traces)}개 run)")
+    print(f"📁 결과 저장 위치: {out_dir} (trace.json: 전체 run Chrome trace)\n")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 윤리 리스크 배치 진단")
+    parser.add_argument("manifest", help="서비스 목록 파일 (.csv 또는 .jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 진단 서비스 수")
+    parser.add_argument("--feedback-policy", choices=["auto", "skip"], default="auto",
+                        help="휴먼 피드백 단계 대체 정책 (auto: 고위험 항목 자동 피드백, skip: 생략)")
+    parser.add_argument("--out-dir", default=None, help="결과 저장 디렉터리 (기본: outputs/batch/<timestamp>)")
+    parser.add_argument("--no-cache", action="store_true", help="LLM 응답 캐시를 건너뛰고 새로 호출")
+    parser.add_argument("--resume", metavar="BATCH_ID", default=None,
+                        help="이전 배치를 체크포인트에서 재개 (완료된 단계/서비스는 건너뜀)")
+    args = parser.parse_args()
+
+    entries = load_manifest(args.manifest)
+    if not entries:
+        print("🚫 매니페스트에 진단할 서비스가 없습니다.")
+        return
+    run_batch(entries, args.concurrency, args.feedback_policy, args.out_dir,
+              use_cache=not args.no_cache, resume=args.resume)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,24 @@
+import argparse
+import datetime
 import os
-from typing import Any, Dict
+import re
+import uuid
+from typing import Any, Dict, List
 
 from agents.type_classifier import classify_service
 from agents.service_analyzer import analyze_service
 from agents.risk_factor_extractor import extract_risk_factors
-from agents.rag_retriever import retrieve_guidelines
+from agents.rag_retriever import retrieve_guidelines, warm_backend
 from agents.risk_evaluator import evaluate_risks
-from agents.human_feedback import collect_feedback
+from agents.human_feedback import collect_feedback, auto_feedback
+from agents.incremental_eval import affected_categories, reevaluate_incremental
 from agents.recommendation_generator import generate_recommendations
-from agents.report_builder import generate_report
+from agents.report_builder import generate_report, get_styles, reports_ready, submit_report
 from agents.service_crawler import crawl_service_info
+from agents.llm_cache import llm_cache_stats
+from agents.results_store import record_audit
+from agents.scheduler import Stage, run_stages
+from agents import checkpoint, tracing
 
 DEFAULT_FEATURES = ["자동 문장 생성", "문체 변환", "키워드 추출"]
 
@@ -102,12 +111,284 @@ def print_risk_summary_table(title: str, assessment: dict):
 # 🧭 메인 로직
 # -------------------------------------------------------------------
 
-def main():
-    print("\n🧭 [AI 윤리성 리스크 진단 시스템 시작]\n")
+def _score_of(v):
+    if isinstance(v, dict):
+        return _coerce_score(v.get("score", None))
+    return _coerce_score(v)
+
+
+def print_score_live(category: str, entry: dict):
+    """스트리밍 평가 중 항목 점수가 완성되는 즉시 출력 (4점 이상은 고위험 표시)"""
+    score = _score_of(entry)
+    flag = "  ⚠️ 고위험" if score is not None and score >= 4 else ""
+    print(f"   📈 {category}: {score if score is not None else '-'}{flag}")
+
+
+def average_score(assessment: dict) -> float:
+    """평가 결과의 평균 점수 (점수 없는 항목 제외)"""
+    scores = [_score_of(v) for v in (assessment or {}).values() if _score_of(v) is not None]
+    return round(sum(scores) / len(scores), 2) if scores else 0.0
+
+
+def build_audit_stages(service_name: str,
+                       service_info: Any = None,
+                       interactive: bool = True,
+                       feedback_policy: str = "auto",
+                       use_cache: bool = True,
+                       background_report: bool = False,
+                       report_id: str = None) -> List[Stage]:
+    """
+    진단 파이프라인을 state 위의 단계 DAG로 구성
+    - warm(검색 인덱스/보고서 폰트 로드)은 선행 단계 없이 collect/extract(LLM 대기)와 동시에 실행 → retrieve/report의 cold start를 숨김
+    - classify(키워드 매칭)와 extract(LLM)는 service_info만 필요하므로 동시에 실행
+    - recommend_kept(LLM)는 피드백이 건드리지 않는 항목의 권고안을 reevaluate(검색+LLM)와 동시에 생성하고,
+      recommend_rest(LLM)는 재평가된 항목의 권고안만 생성 (권고안 생성 시간은 출력 길이에 비례)
+    - 각 단계는 state를 읽고 갱신할 키만 반환
+    - report_id: 보고서 파일명에 시각 대신 사용 (같은 작업을 재시도해도 보고서 1벌만 남음)
+    """
+
+    # === 0️⃣ 검색 인덱스 / 보고서 폰트 미리 로드 (웹 수집·LLM 호출과 겹쳐 실행) ===
+    def warm(state):
+        for name, fn in (("retriever", warm_backend), ("report_styles", get_styles)):
+            try:
+                fn()
+            except Exception as e:  # 실패해도 진단은 계속 (첫 사용 시 다시 로드)
+                print(f"⚠️ 미리 로드 실패 ({name}): {e}")
+        return {}
+
+    # === 1️⃣ 서비스 정보 세팅 ===
+    def collect(state):
+        prefilled = isinstance(service_info, dict) and service_info.get("purpose")
+        if prefilled:
+            print(f"\n📋 '{service_name}' 사전 입력된 서비스 정보를 사용합니다.\n")
+            return {"service_info": normalize_service_info(service_info, service_name)}
+
+        print(f"\n🌐 '{service_name}' 관련 웹 데이터를 수집하고 있습니다...\n")
+        description = crawl_service_info(service_name, use_cache=use_cache)
+
+        if not description:
+            if interactive:
+                print("⚠️ 서비스 정보를 가져오지 못했습니다. 수동 입력으로 진행합니다.")
+                analyzed = analyze_service()
+            else:
+                print("⚠️ 서비스 정보를 가져오지 못했습니다. 기본 개요로 진행합니다.")
+                analyzed = service_info
+            return {"service_info": normalize_service_info(analyzed, service_name)}
+
+        print("✅ 웹 기반 서비스 요약 완료.\n")
+        raw_info = dict(service_info) if isinstance(service_info, dict) else {}
+        raw_info.update({"name": service_name, "purpose": description})
+        return {"service_info": normalize_service_info(raw_info, service_name)}
+
+    # === 2️⃣ 서비스 유형 분류 ===
+    def classify(state):
+        info = state["service_info"]
+        if not isinstance(info, dict):
+            print("⚠️ service_info 구조 오류 발생 → 자동 복구 시도 중...")
+            info = normalize_service_info(info, service_name)
+        classification = classify_service(info.get("purpose", ""))
+        info = dict(info, type=classification.get("type", "분류 실패"))
+        print(f"\n✅ 서비스 유형: {info['type']}")
+        print(f"📋 주요 기능: {', '.join(info['features'])}")
+        return {"service_info": info}
+
+    # === 3️⃣ 리스크 요인 추출 (분류와 동시 실행 — 분류 결과에 의존하지 않도록 type 제외) ===
+    def extract(state):
+        profile = {k: v for k, v in normalize_service_info(state["service_info"], service_name).items()
+                   if k != "type"}
+        risk_factors = extract_risk_factors(profile, use_cache=use_cache)
+        print(f"\n⚠️ 잠재적 리스크 요인 식별됨: {', '.join(risk_factors)}")
+        return {"risk_factors": risk_factors}
+
+    # === 4️⃣ 윤리 가이드라인 RAG 검색 ===
+    def retrieve(state):
+        st = retrieve_guidelines(dict(state))
+        return {"policy_context": st.get("policy_context"), "policy_chunks": st.get("policy_chunks")}
+
+    # === 5️⃣ 리스크 평가 + 평균 리스크 계산 ===
+    def evaluate(state):
+        try:
+            st = evaluate_risks(dict(state), use_cache=use_cache, on_score=print_score_live)
+        except AttributeError:
+            print("⚠️ 평가 중 state 구조 오류 → 복구 후 재시도")
+            st = evaluate_risks(dict(state, risk_assessment={}), use_cache=use_cache,
+                                on_score=print_score_live)
+        ra = st.get("risk_assessment", {}) or {}
+
+        # ✅ 콘솔에 전체 점수 출력
+        print_risk_summary_table("초기 평가", ra)
+        avg_score = average_score(ra)
+        print(f"\n📊 평균 윤리 리스크 점수: {avg_score:.2f}")
+        return {"risk_assessment": ra, "initial_assessment": ra,
+                "final_assessment": ra, "avg_score": avg_score}
+
+    # === 6️⃣ 피드백 루프 조건 ===
+    def feedback(state):
+        avg_score = state["avg_score"]
+        if avg_score < 3:   # ✅ 평균 3 이상일 때만 루프 실행
+            print(f"✅ 평균 리스크 {avg_score:.2f} (안전) — 피드백 루프 생략")
+            return {"human_feedback": None}
+
+        print(f"⚠️ 평균 리스크 {avg_score:.2f} (중~고위험) — 휴먼 피드백 루프 시작")
+        # === 사용자 피드백 수집 (비대화형이면 정책 적용) ===
+        if interactive:
+            fb = collect_feedback(state["risk_assessment"])
+        elif feedback_policy == "auto":
+            fb = auto_feedback(state["risk_assessment"])
+        else:
+            print("⏭️ 비대화형 모드 — 피드백 단계 생략")
+            fb = None
+        return {"human_feedback": fb}
+
+    # === 7️⃣ 피드백 기반 재검색 및 재평가 ===
+    def reevaluate(state):
+        print(f"\n🧩 피드백 수집 완료 → '{state['human_feedback']}'")
+        print("\n🔁 피드백 기반 재검색 및 재평가 수행 중...")
+        try:
+            # 피드백이 특정 항목을 가리키면 해당 항목만 재검색/재평가 후 병합
+            updates = reevaluate_incremental(dict(state), use_cache=use_cache, on_score=print_score_live)
+            if updates:
+                print_risk_summary_table("재평가(피드백 반영)", updates["final_assessment"])
+                return updates
+
+            st = retrieve_guidelines(dict(state))
+            st = evaluate_risks(st, use_cache=use_cache, on_score=print_score_live)
+            final_assessment = st.get("risk_assessment", {})
+            print_risk_summary_table("재평가(피드백 반영)", final_assessment)
+            return {"final_assessment": final_assessment,
+                    "policy_context": st.get("policy_context"),
+                    "policy_chunks": st.get("policy_chunks")}
+        except Exception as e:
+            print(f"⚠️ 피드백 반영 중 오류 발생: {e}")
+            return {"final_assessment": state["initial_assessment"]}
+
+    # === 8️⃣ 개선 권고안 생성 (최종 평가 기준) ===
+    # 피드백이 건드리지 않는 항목(kept)은 reevaluate와 동시에, 나머지는 reevaluate 직후 생성한 뒤 이어 붙임
+    def kept_categories(state) -> List[str]:
+        initial = state.get("initial_assessment") or {}
+        fb = state.get("human_feedback")
+        if not fb:
+            return list(initial)
+        affected = affected_categories(fb, initial)
+        # 영향 항목을 특정할 수 없으면 전체 재평가 → 미리 만들 권고안 없음
+        return [k for k in initial if k not in affected] if affected else []
+
+    def context_of(state):
+        return state.get("policy_chunks") or state.get("policy_context")
+
+    def recommend_kept(state):
+        initial = state.get("initial_assessment") or {}
+        kept = {k: initial[k] for k in kept_categories(state)}
+        if not kept:
+            return {"kept_recommendations": None}
+        return {"kept_recommendations": generate_recommendations(kept, context_of(state), use_cache=use_cache)}
+
+    def recommend_rest(state):
+        final = state["final_assessment"] or {}
+        initial = state.get("initial_assessment") or {}
+        names = kept_categories(state)
+        # 미리 만드는 권고안은 해당 항목이 최종 평가에서도 그대로일 때만 사용 (아니면 전체를 새로 생성)
+        reuse = bool(names) and all(k in final and final[k] == initial.get(k) for k in names)
+        rest = {k: v for k, v in final.items() if k not in names} if reuse else final
+        if not rest:
+            return {"rest_recommendations": None, "reuse_kept": reuse}
+        if reuse:
+            print(f"♻️ 재평가되지 않은 {len(names)}개 항목의 권고안은 동시 생성분 사용 → 재평가 항목 {len(rest)}개만 생성")
+        return {"rest_recommendations": generate_recommendations(rest, context_of(state), use_cache=use_cache),
+                "reuse_kept": reuse}
+
+    def recommend(state):
+        parts = [state.get("kept_recommendations") if state.get("reuse_kept") else None,
+                 state.get("rest_recommendations")]
+        return {"recommendations": "\n\n".join(p for p in parts if p) or "개선 권고안 없음"}
+
+    # === 9️⃣ 보고서 생성 ===
+    def report(state):
+        info = state.get("service_info")
+        if not isinstance(info, dict):
+            print("⚠️ service_info가 문자열로 변환되어 복구 중...")
+            info = normalize_service_info(info, service_name)
+        args = (
+            info,
+            state["initial_assessment"],   # 초기 평가
+            state["final_assessment"],     # 최종 평가
+            state.get("recommendations", "개선 권고안 없음"),
+            state.get("human_feedback"),
+        )
+        if background_report:
+            # 렌더링은 백그라운드 프로세스에서 — 완료 핸들만 state에 남기고 바로 다음 진단으로
+            print("\n🖨️ 보고서 렌더링을 백그라운드 작업으로 제출했습니다.\n")
+            return {"service_info": info, "report_paths": None,
+                    "report_future": submit_report(*args, report_id=report_id)}
+        try:
+            paths = generate_report(*args, report_id=report_id)
+            if reports_ready(paths):
+                print("\n🎯 윤리성 리스크 진단 완료 — 결과 보고서가 outputs/reports 폴더에 생성되었습니다.\n")
+            else:
+                print("⚠️ 일부 보고서 파일이 생성되지 않았습니다 — 재개 시 보고서 단계를 다시 실행합니다.")
+        except Exception as e:
+            print(f"🚨 보고서 생성 중 오류 발생: {e}")
+            paths = None
+        return {"service_info": info, "report_paths": paths}
+
+    return [
+        Stage("warm", warm),
+        Stage("collect", collect),
+        Stage("classify", classify, ["collect"]),
+        Stage("extract", extract, ["collect"]),
+        Stage("retrieve", retrieve, ["extract", "warm"]),
+        Stage("evaluate", evaluate, ["retrieve"]),
+        Stage("feedback", feedback, ["evaluate"]),
+        Stage("reevaluate", reevaluate, ["feedback"], when=lambda st: bool(st.get("human_feedback"))),
+        # 체크포인트에 권고안이 이미 있으면(이전 버전 체크포인트 재개) 다시 만들지 않음
+        Stage("recommend_kept", recommend_kept, ["feedback"], when=lambda st: not st.get("recommendations")),
+        Stage("recommend_rest", recommend_rest, ["reevaluate"], when=lambda st: not st.get("recommendations")),
+        Stage("recommend", recommend, ["recommend_kept", "recommend_rest"],
+              when=lambda st: not st.get("recommendations")),
+        # 보고서 파일(md/pdf)이 모두 실제로 만들어진 경우에만 완료로 기록 (렌더링 실패/백그라운드 제출은 재개 시 다시 생성)
+        Stage("report", report, ["recommend", "classify"], complete=lambda u: reports_ready(u.get("report_paths"))),
+    ]
+
+
+def run_audit(service_name: str,
+              service_info: Any = None,
+              interactive: bool = True,
+              feedback_policy: str = "auto",
+              use_cache: bool = True,
+              background_report: bool = False,
+              run_id: str = None,
+              resume: bool = False,
+              report_id: str = None) -> Dict[str, Any]:
+    """
+    단일 서비스에 대한 전체 진단 파이프라인 실행 (단계 DAG 스케줄러 사용)
+    - service_info: 미리 채워진 서비스 정보 (purpose가 있으면 웹 크롤링 생략)
+    - interactive: False면 input() 없이 진행 (배치 모드)
+    - feedback_policy: 비대화형일 때 피드백 단계 처리 방식 ("auto" | "skip")
+    - use_cache: False면 LLM 응답 캐시를 건너뛰고 모든 모델 호출을 새로 수행
+    - background_report: True면 보고서를 렌더링 프로세스에 제출하고 state["report_future"]에 완료 핸들 저장
+    - 단계/외부 호출 트레이스는 outputs/logs에 JSONL + Chrome trace로 저장 (state["trace_paths"])
+    - 단계가 끝날 때마다 결과를 outputs/checkpoints/<run_id>.json.gz에 저장
+    - resume=True: run_id의 체크포인트에서 완료된 단계를 복원하고 첫 미완료 단계부터 이어서 실행
+    - 끝난 run은 결과 저장소에 기록 (python tools/query_results.py 로 서비스/항목/점수/기간 질의)
+    - report_id: 보고서 파일명 식별자 (큐 작업은 job id를 넘겨 재시도 시 같은 파일을 원자적으로 덮어씀)
+    """
+    run_id = run_id or "{}_{}_{}".format(
+        re.sub(r"[^\w\-]+", "_", service_name).strip("_") or "service",
+        datetime.datetime.now().strftime("%Y%m%d_%H%M%S"),
+        uuid.uuid4().hex[:6],
+    )
+    ckpt = checkpoint.start_checkpoint(run_id, {
+        "service_name": service_name,
+        "service_info": service_info,
+        "interactive": interactive,
+        "feedback_policy": feedback_policy,
+        "use_cache": use_cache,
+    }, resume=resume)
+    trace = tracing.start_trace(run_id)
 
     # === 0️⃣ state 초기화 ===
     state: Dict[str, Any] = {
-        "service_name": None,
+        "service_name": service_name,
         "service_info": None,
         "risk_factors": None,
         "policy_context": None,
@@ -116,129 +397,98 @@ def main():
         "recommendations": None,
     }
 
-    # === 1️⃣ 서비스명 입력 ===
-    state["service_name"] = input("🔍 분석할 AI 서비스명을 입력하세요: ").strip()
-    if not state["service_name"]:
-        print("🚫 서비스명이 입력되지 않았습니다.")
-        return
+    stages = build_audit_stages(service_name, service_info, interactive, feedback_policy, use_cache,
+                                background_report, report_id)
+    restored = ckpt.restore(state, [s.name for s in stages])
+    state["run_id"] = run_id
+    state["resumed_stages"] = restored
+    if restored:
+        print(f"⏩ 체크포인트에서 재개 ({run_id}): 완료된 단계 {', '.join(restored)} 건너뜀")
 
-    print(f"\n🌐 '{state['service_name']}' 관련 웹 데이터를 수집하고 있습니다...\n")
-    description = crawl_service_info(state["service_name"])
+    unrecorded = []
 
-    # === 2️⃣ 서비스 정보 세팅 ===
-    if not description:
-        print("⚠️ 서비스 정보를 가져오지 못했습니다. 수동 입력으로 진행합니다.")
-        analyzed = analyze_service()
-        state["service_info"] = normalize_service_info(analyzed, state["service_name"])
-    else:
-        print("✅ 웹 기반 서비스 요약 완료.\n")
-        raw_info = {
-            "name": state["service_name"],
-            "purpose": description,
-            "features": DEFAULT_FEATURES,
-            "data_input": "웹 텍스트, 사용자 입력",
-            "data_output": "생성된 문장, 요약 텍스트",
-            "model": "GPT 기반 생성형 언어모델",
-        }
-        state["service_info"] = normalize_service_info(raw_info, state["service_name"])
+    def _on_done(stage, updates):
+        done = stage.complete is None or stage.complete(updates)
+        if not (done and ckpt.record(stage.name, updates, state["stage_timings"].get(stage.name))):
+            unrecorded.append(stage.name)
 
-    # === 3️⃣ 서비스 유형 분류 ===
-    try:
-        classification = classify_service(state["service_info"].get("purpose", ""))
-        state["service_info"]["type"] = classification.get("type", "분류 실패")
-    except AttributeError:
-        print("⚠️ service_info 구조 오류 발생 → 자동 복구 시도 중...")
-        state["service_info"] = normalize_service_info(state["service_info"], state["service_name"])
-        classification = classify_service(state["service_info"].get("purpose", ""))
-        state["service_info"]["type"] = classification.get("type", "분류 실패")
-
-    print(f"\n✅ 서비스 유형: {state['service_info']['type']}")
-    print(f"📋 주요 기능: {', '.join(state['service_info']['features'])}")
-
-    # === 4️⃣ 리스크 요인 추출 ===
-    state["risk_factors"] = extract_risk_factors(state["service_info"])
-    print(f"\n⚠️ 잠재적 리스크 요인 식별됨: {', '.join(state['risk_factors'])}")
-
-    # === 5️⃣ 윤리 가이드라인 RAG 검색 ===
-    try:
-        state = retrieve_guidelines(state)
-    except AttributeError:
-        print("⚠️ RAG 검색 중 state 구조 오류 → 복구 후 재시도")
-        if not isinstance(state, dict):
-            state = {"policy_context": ""}
-        state = retrieve_guidelines(state)
-
-    # === 6️⃣ 리스크 평가 ===
     try:
-        state = evaluate_risks(state)
-    except AttributeError:
-        print("⚠️ 평가 중 state 구조 오류 → 복구 후 재시도")
-        state["risk_assessment"] = {}
-        state = evaluate_risks(state)
-
-    # ✅ 콘솔에 전체 점수 출력
-    print_risk_summary_table("초기 평가", state.get("risk_assessment", {}))
-
-    # === 7️⃣ 평균 리스크 계산 ===
-    ra = state.get("risk_assessment", {}) or {}
-
-    def _score_of(v):
-        if isinstance(v, dict):
-            return _coerce_score(v.get("score", None))
-        return _coerce_score(v)
-
-    scores = [_score_of(v) for v in ra.values() if _score_of(v) is not None]
-    avg_score = round(sum(scores) / len(scores), 2) if scores else 0.0
-
-    print(f"\n📊 평균 윤리 리스크 점수: {avg_score:.2f}")
-
-    # === 8️⃣ 피드백 루프 조건 ===
-    if avg_score >= 3:   # ✅ 평균 3 이상일 때만 루프 실행
-        print(f"⚠️ 평균 리스크 {avg_score:.2f} (중~고위험) — 휴먼 피드백 루프 시작")
+        with tracing.span("run_audit", "run", service=service_name, resumed=len(restored)):
+            run_stages(stages, state, skip=lambda s: s.name in restored, on_done=_on_done)
+        ckpt.finish(unrecorded)  # 완료로 기록되지 않은 단계(보고서 실패/백그라운드 렌더링)는 재개 대상으로 남김
+    except BaseException as e:
+        ckpt.mark("failed", f"{type(e).__name__}: {e}")
+        print(f"💾 체크포인트 저장됨 ({run_id}) — 완료된 단계 {', '.join(ckpt.completed()) or '없음'}, "
+              f"재개: python main.py --resume {run_id}")
+        raise
+    finally:
+        if trace:
+            state["trace"] = trace
+            # 재개 실행의 트레이스는 이전 시도의 트레이스를 덮어쓰지 않도록 시도 번호를 붙임
+            prefix = f"trace_{run_id}" + (f"_attempt{ckpt.attempts}" if ckpt.attempts > 1 else "")
+            state["trace_paths"] = trace.export(prefix=prefix)
+
+    state["final_avg_score"] = average_score(state.get("final_assessment"))
+    record_audit(state)  # 결과 저장소(data/results/audits.sqlite)에 run 단위로 색인 저장
+    print(f"🗃️ LLM 응답 캐시: {llm_cache_stats()}")
+    if trace and interactive:
+        tracing.print_summary([trace])
+        print(f"🧵 트레이스 저장: {state['trace_paths']['chrome']} (chrome://tracing 또는 Perfetto에서 열기)")
+    return state
+
+
+def resume_audit(run_id: str, background_report: bool = False) -> Dict[str, Any]:
+    """체크포인트에 저장된 실행 설정으로 run_id 진단을 이어서 실행"""
+    ckpt = checkpoint.Checkpoint.load(run_id)
+    if ckpt is None:
+        raise ValueError(f"체크포인트가 없습니다: {run_id}")
+    meta = ckpt.meta
+    return run_audit(meta["service_name"], meta.get("service_info"),
+                     interactive=meta.get("interactive", True),
+                     feedback_policy=meta.get("feedback_policy", "auto"),
+                     use_cache=meta.get("use_cache", True),
+                     background_report=background_report,
+                     run_id=run_id, resume=True)
+
+
+def print_checkpoints():
+    """저장된 체크포인트 목록 출력"""
+    items = checkpoint.list_checkpoints()
+    if not items:
+        print("📭 저장된 체크포인트가 없습니다.")
+        return
+    print(f"\n{'run_id':<48} {'상태':<10} {'완료 단계'}")
+    print("-" * 90)
+    for c in items:
+        print(f"{c['run_id']:<48} {c['status']:<10} {', '.join(c['stages']) or '-'}")
+    print("-" * 90)
 
-        # === 사용자 피드백 수집 ===
-        state["human_feedback"] = collect_feedback(state["risk_assessment"])
 
-        if state["human_feedback"]:
-            print(f"\n🧩 피드백 수집 완료 → '{state['human_feedback']}'")
-            print("\n🔁 피드백 기반 재검색 및 재평가 수행 중...")
-            try:
-                state = retrieve_guidelines(state)
-                final_state = evaluate_risks(state)
-                final_assessment = final_state.get("risk_assessment", {})
-                print_risk_summary_table("재평가(피드백 반영)", final_assessment)
-            except Exception as e:
-                print(f"⚠️ 피드백 반영 중 오류 발생: {e}")
-                final_assessment = ra
-    else:
-        print(f"✅ 평균 리스크 {avg_score:.2f} (안전) — 피드백 루프 생략")
-        state["human_feedback"] = None
-        final_assessment = ra
-
-
-    # === 9️⃣ 개선 권고안 생성 (최종 평가 기준) ===
-    state["recommendations"] = generate_recommendations(
-        final_assessment,
-        state.get("policy_context")
-    )
+def main():
+    parser = argparse.ArgumentParser(description="AI 윤리성 리스크 진단")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                        help="체크포인트에서 이어서 실행 (완료된 단계는 건너뜀)")
+    parser.add_argument("--list-checkpoints", action="store_true", help="저장된 체크포인트 목록")
+    args = parser.parse_args()
+
+    checkpoint.prune_checkpoints()
+    if args.list_checkpoints:
+        print_checkpoints()
+        return
+    if args.resume:
+        print(f"\n🧭 [AI 윤리성 리스크 진단 재개: {args.resume}]\n")
+        resume_audit(args.resume)
+        return
 
-    # === 🔟 보고서 생성 ===
-    if not isinstance(state.get("service_info"), dict):
-        print("⚠️ service_info가 문자열로 변환되어 복구 중...")
-        state["service_info"] = normalize_service_info(state["service_info"], state["service_name"])
+    print("\n🧭 [AI 윤리성 리스크 진단 시스템 시작]\n")
 
-    try:
-        generate_report(
-            state["service_info"],
-            ra,                     # 초기 평가
-            final_assessment,        # 최종 평가
-            state.get("recommendations", "개선 권고안 없음"),
-            state.get("human_feedback")
-        )
-        print("\n🎯 윤리성 리스크 진단 완료 — 결과 보고서가 outputs/reports 폴더에 생성되었습니다.\n")
+    # === 서비스명 입력 ===
+    service_name = input("🔍 분석할 AI 서비스명을 입력하세요: ").strip()
+    if not service_name:
+        print("🚫 서비스명이 입력되지 않았습니다.")
+        return
 
-    except Exception as e:
-        print(f"🚨 보고서 생성 중 오류 발생: {e}")
+    run_audit(service_name, interactive=True)
 
 
 if __name__ == "__main__":
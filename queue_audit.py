@@ -0,0 +1,224 @@
+# queue_audit.py
+# 영속 작업 큐(SQLite) 기반 분산 진단 — 매니페스트를 큐에 등록하고, 여러 워커 프로세스(여러 호스트 가능)가 임대해 처리
+#
+# 사용 예:
+#   python queue_audit.py enqueue services.csv                 # 같은 분기에 다시 넣어도 중복 등록 없음 (다음 분기는 새로 등록)
+#   python queue_audit.py enqueue services.csv --batch-id 2026-11-rerun  # 분기 안에서 다시 진단
+#   python queue_audit.py work --processes 4                   # 워커 프로세스 4개 (Ctrl+C: 진행 중 작업을 마치고 종료)
+#   python queue_audit.py work --processes 4 --exit-when-empty # 큐가 비면 종료 (일괄 처리용)
+#   python queue_audit.py status                               # 상태별 작업 수 + 최근 실패
+#   python queue_audit.py requeue                              # dead 작업을 다시 대기열로
+#
+# 다른 호스트의 워커는 같은 큐 파일(JOB_QUEUE_PATH)을 공유 저장소에서 열면 됨 (이때 JOB_QUEUE_JOURNAL=DELETE)
+import argparse
+import datetime
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Any, Dict
+
+from agents.job_queue import DEAD, LEASE_SEC, MAX_ATTEMPTS, QUEUE_PATH, JobQueue
+from batch_audit import _slug, load_manifest
+
+RESULT_FIELDS = ["avg_score", "final_avg_score", "report_paths", "resumed_stages", "stage_timings"]
+
+
+# === 등록 ===
+def default_batch_id(manifest: str) -> str:
+    today = datetime.date.today()
+    return f"{os.path.splitext(os.path.basename(manifest))[0]}_{today.year}Q{(today.month - 1) // 3 + 1}"
+
+
+def enqueue_manifest(manifest: str, queue_path: str = QUEUE_PATH, batch_id: str = None,
+                     feedback_policy: str = "auto", use_cache: bool = True,
+                     max_attempts: int = MAX_ATTEMPTS) -> Dict[str, int]:
+    """
+    매니페스트의 서비스를 작업으로 등록
+    - idempotency_key = <batch_id>:<서비스> → 같은 batch_id로 재등록해도 1건만 유지
+    - batch_id 기본값: <매니페스트 파일 이름>_<연도>Q<분기> — 같은 분기 안의 재등록은 중복 없음, 다음 분기 재진단은 새로 등록
+      (분기 안에서 다시 진단하려면 --batch-id를 새로 지정)
+    """
+    entries = load_manifest(manifest)
+    batch_id = batch_id or default_batch_id(manifest)
+    q = JobQueue(queue_path)
+    before = sum(q.counts().values())
+    for entry in entries:
+        name = entry["service_name"]
+        q.enqueue(name, {"service_info": entry.get("service_info"), "feedback_policy": feedback_policy,
+                         "use_cache": use_cache},
+                  idempotency_key=f"{batch_id}:{_slug(name)}", max_attempts=max_attempts)
+    added = sum(q.counts().values()) - before
+    q.close()
+    print(f"📥 {len(entries)}건 중 {added}건 등록 (batch_id {batch_id}, 중복 {len(entries) - added}건 건너뜀) — 큐: {queue_path}")
+    if entries and not added:
+        print("   ℹ️ 모두 이미 등록된 작업입니다. 다시 진단하려면 --batch-id를 새로 지정하세요.")
+    return {"entries": len(entries), "added": added}
+
+
+# === 워커 ===
+def _run_job(q: JobQueue, job, worker_id: str, lease_sec: float):
+    """임대한 작업 1건 실행 — 하트비트로 임대를 연장하고, 끝나면 성공/실패를 큐에 기록"""
+    from agents.report_builder import reports_ready
+    from main import run_audit
+
+    done = threading.Event()
+
+    def _heartbeat():
+        while not done.wait(lease_sec / 3):
+            if not q.heartbeat(job.id, worker_id, lease_sec):
+                print(f"⚠️ [{worker_id}] 임대를 잃었습니다: {job.id} (결과는 기록되지 않음)")
+                return
+
+    hb = threading.Thread(target=_heartbeat, name=f"heartbeat-{job.id}", daemon=True)
+    hb.start()
+    started = time.perf_counter()
+    print(f"🛠️ [{worker_id}] 작업 시작: {job.id} ({job.service_name}, 시도 {job.attempts}/{job.max_attempts})")
+    try:
+        p = job.payload
+        # job id를 run_id/report_id로 고정 → 재시도는 체크포인트에서 이어가고 보고서는 같은 파일을 덮어씀
+        # 항상 resume=True: requeue가 attempts를 0으로 되돌려도 체크포인트를 덮어쓰지 않음 (없으면 처음부터 실행)
+        state = run_audit(job.service_name, p.get("service_info"), interactive=False,
+                          feedback_policy=p.get("feedback_policy", "auto"),
+                          use_cache=p.get("use_cache", True),
+                          run_id=job.id, resume=True, report_id=job.id)
+        if not reports_ready(state.get("report_paths")):
+            raise RuntimeError(f"보고서 파일이 생성되지 않았습니다: {state.get('report_paths')}")
+        result = {k: state.get(k) for k in RESULT_FIELDS}
+        result.update(worker=worker_id, elapsed_sec=round(time.perf_counter() - started, 2))
+        done.set()
+        if q.complete(job.id, worker_id, result):
+            print(f"✅ [{worker_id}] 작업 완료: {job.id} ({result['elapsed_sec']}s)")
+    except Exception as e:
+        done.set()
+        status = q.fail(job.id, worker_id, f"{type(e).__name__}: {e}")
+        print(f"🚨 [{worker_id}] 작업 실패: {job.id} — {e} → {status or '임대 상실'}")
+    finally:
+        done.set()
+        hb.join()
+
+
+def worker_loop(queue_path: str = QUEUE_PATH, lease_sec: float = LEASE_SEC, poll_sec: float = 2.0,
+                exit_when_empty: bool = False, stop: Any = None, warm: bool = True) -> int:
+    """워커 프로세스 본체 — warm-up 후 큐가 빌 때까지(또는 stop 설정 시까지) 작업을 임대해 처리, 처리 건수 반환"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C는 부모가 stop으로 전달 → 진행 중 작업은 마무리
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    if warm:
+        from agents.audit_service import warm_up
+        warm_up()
+    q = JobQueue(queue_path)
+    handled = 0
+    try:
+        while not (stop is not None and stop.is_set()):
+            job = q.lease(worker_id, lease_sec)
+            if job is None:
+                if exit_when_empty and q.pending() == 0:
+                    break
+                time.sleep(poll_sec)
+                continue
+            _run_job(q, job, worker_id, lease_sec)
+            handled += 1
+    finally:
+        from agents.report_builder import shutdown_report_pool
+        shutdown_report_pool()
+        q.close()
+    print(f"👋 [{worker_id}] 워커 종료 — 처리 {handled}건")
+    return handled
+
+
+def run_workers(processes: int = 2, queue_path: str = QUEUE_PATH, lease_sec: float = LEASE_SEC,
+                poll_sec: float = 2.0, exit_when_empty: bool = False, warm: bool = True) -> Dict[str, Any]:
+    """워커 프로세스 N개 실행 (spawn) 후 종료까지 대기, 처리량 요약 반환"""
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    q = JobQueue(queue_path)
+    succeeded_before = q.counts().get("succeeded", 0)
+    started = time.perf_counter()
+    procs = [ctx.Process(target=worker_loop, name=f"audit-worker-{i}",
+                         args=(queue_path, lease_sec, poll_sec, exit_when_empty, stop, warm))
+             for i in range(max(1, processes))]
+    for p in procs:
+        p.start()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    print(f"\n🚀 워커 {len(procs)}개 시작 — 큐: {queue_path}\n")
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        print("\n🛑 종료 요청 — 진행 중인 작업을 마무리합니다...")
+        stop.set()
+        for p in procs:
+            p.join()
+
+    wall = round(time.perf_counter() - started, 2)
+    counts = q.counts()
+    q.close()
+    done = counts.get("succeeded", 0) - succeeded_before
+    summary = {"processes": len(procs), "succeeded": done, "wall_sec": wall,
+               "jobs_per_min": round(done / wall * 60, 2) if wall else None, "queue": counts}
+    print(f"\n📦 완료 {done}건 — {wall}s ({summary['jobs_per_min']}건/분), 큐 상태: {counts}\n")
+    return summary
+
+
+# === 조회/관리 ===
+def print_status(queue_path: str = QUEUE_PATH, limit: int = 10):
+    q = JobQueue(queue_path)
+    counts = q.counts()
+    print(f"\n📊 큐 상태 ({queue_path}): {counts or '비어 있음'}")
+    failed = [j for j in q.list(limit=200) if j.error][:limit]
+    q.close()
+    if failed:
+        print(f"\n{'job_id':<26} {'서비스':<24} {'상태':<8} {'시도':<6} 오류")
+        print("-" * 90)
+        for j in failed:
+            print(f"{j.id:<26} {j.service_name[:24]:<24} {j.status:<8} "
+                  f"{j.attempts}/{j.max_attempts:<4} {(j.error or '')[:60]}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 윤리 리스크 분산 진단 (영속 작업 큐 + 워커 프로세스)")
+    parser.add_argument("--queue", default=QUEUE_PATH, help=f"큐 파일 경로 (기본: {QUEUE_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("enqueue", help="매니페스트(.csv/.jsonl)의 서비스를 작업으로 등록")
+    p.add_argument("manifest")
+    p.add_argument("--batch-id", default=None, help="중복 등록 판별 키 접두어 (기본: <매니페스트 이름>_<연도>Q<분기>)")
+    p.add_argument("--feedback-policy", choices=["auto", "skip"], default="auto")
+    p.add_argument("--no-cache", action="store_true", help="LLM 응답 캐시를 건너뛰고 새로 호출")
+    p.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="작업당 최대 시도 횟수")
+
+    p = sub.add_parser("work", help="워커 프로세스 실행")
+    p.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    p.add_argument("--lease-sec", type=float, default=LEASE_SEC, help="임대 시간 (하트비트로 연장)")
+    p.add_argument("--poll-sec", type=float, default=2.0, help="큐가 비었을 때 재확인 간격")
+    p.add_argument("--exit-when-empty", action="store_true", help="처리할 작업이 없으면 종료")
+    p.add_argument("--no-warm", action="store_true", help="워커 시작 시 warm-up 생략")
+
+    p = sub.add_parser("status", help="상태별 작업 수와 최근 실패 출력")
+    p.add_argument("--limit", type=int, default=10)
+
+    p = sub.add_parser("requeue", help="dead 작업(또는 지정한 작업)을 다시 대기열로")
+    p.add_argument("job_ids", nargs="*")
+
+    args = parser.parse_args()
+    if args.command == "enqueue":
+        enqueue_manifest(args.manifest, args.queue, args.batch_id, args.feedback_policy,
+                         use_cache=not args.no_cache, max_attempts=args.max_attempts)
+    elif args.command == "work":
+        run_workers(args.processes, args.queue, args.lease_sec, args.poll_sec,
+                    args.exit_when_empty, warm=not args.no_warm)
+    elif args.command == "status":
+        print_status(args.queue, args.limit)
+    elif args.command == "requeue":
+        q = JobQueue(args.queue)
+        n = q.requeue(args.job_ids or None)
+        q.close()
+        target = "지정한 작업" if args.job_ids else f"{DEAD} 작업"
+        print(f"🔁 {target} {n}건을 다시 대기열에 넣었습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# serve.py
+# 상주형 HTTP 진단 서비스 — 진단을 비동기 작업으로 제출/상태 조회/보고서 다운로드 (표준 라이브러리 HTTP 서버)
+#
+# 사용 예:
+#   python serve.py --port 8080 --workers 4
+#   curl -X POST localhost:8080/audits -d '{"service_name": "Gemini"}'        # → 202 {"job_id": ...}
+#   curl localhost:8080/audits/<job_id>                                      # 상태/결과
+#   curl -o report.pdf "localhost:8080/audits/<job_id>/report?format=pdf"    # 보고서 (md | pdf)
+#
+# API
+#   POST /audits                     {"service_name", "service_info"?, "feedback_policy"?, "use_cache"?} → 202
+#   GET  /audits                     최근 작업 목록
+#   GET  /audits/<id>                작업 상태 (queued | running | succeeded | failed) + 결과
+#   GET  /audits/<id>/report         보고서 파일 (?format=md|pdf, 기본 pdf)
+#   POST /audits/<id>/retry          실패한 작업을 체크포인트에서 재개
+#   GET  /health                     워커/큐 상태와 warm-up 소요 시간
+#
+# AUDIT_SERVICE_TOKEN이 설정되어 있으면 모든 요청에 "Authorization: Bearer <token>" 필요
+import argparse
+import hmac
+import json
+import os
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from agents.audit_service import AuditService, QueueFull
+
+MAX_BODY_BYTES = 1024 * 1024
+TOKEN = os.getenv("AUDIT_SERVICE_TOKEN")
+REPORT_TYPES = {"md": "text/markdown; charset=utf-8", "pdf": "application/pdf"}
+
+
+class AuditHandler(BaseHTTPRequestHandler):
+    service: AuditService = None
+    server_version = "AIEthicsAudit/1.0"
+
+    def log_message(self, fmt, *args):
+        print(f"🌐 {self.address_string()} {fmt % args}")
+
+    # === 응답 헬퍼 ===
+    def _send_json(self, status: int, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send_json(status, {"error": message})
+
+    def _authorized(self) -> bool:
+        if not TOKEN:
+            return True
+        header = self.headers.get("Authorization", "")
+        if hmac.compare_digest(header, f"Bearer {TOKEN}"):
+            return True
+        self._error(401, "인증 토큰이 필요합니다.")
+        return False
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("요청 본문이 너무 큽니다.")
+        raw = self.rfile.read(length) if length else b"{}"
+        data = json.loads(raw.decode("utf-8") or "{}")
+        if not isinstance(data, dict):
+            raise ValueError("JSON 객체가 필요합니다.")
+        return data
+
+    def _route(self):
+        parts = [p for p in urlsplit(self.path).path.split("/") if p]
+        return parts, parse_qs(urlsplit(self.path).query)
+
+    # === GET ===
+    def do_GET(self):
+        if not self._authorized():
+            return
+        parts, query = self._route()
+        if parts == ["health"]:
+            return self._send_json(200, {"status": "ok", **self.service.stats()})
+        if parts == ["audits"]:
+            try:
+                limit = int((query.get("limit") or ["50"])[0])
+            except ValueError:
+                return self._error(400, "limit은 정수여야 합니다.")
+            return self._send_json(200, {"jobs": self.service.list_jobs(limit)})
+        if len(parts) in (2, 3) and parts[0] == "audits":
+            job = self.service.get(parts[1])
+            if job is None:
+                return self._error(404, "작업을 찾을 수 없습니다.")
+            if len(parts) == 2:
+                return self._send_json(200, job.to_dict(self.service.position(job)))
+            if parts[2] == "report":
+                return self._send_report(job, (query.get("format") or ["pdf"])[0])
+        self._error(404, "없는 경로입니다.")
+
+    def _send_report(self, job, fmt: str):
+        if fmt not in REPORT_TYPES:
+            return self._error(400, "format은 md 또는 pdf만 가능합니다.")
+        if not job.report_paths:
+            status = 409 if job.status in ("queued", "running") else 404
+            return self._error(status, f"보고서가 아직 없습니다 (상태: {job.status})")
+        path = next((p for p in job.report_paths if p and p.endswith(f".{fmt}")), None)
+        if not path or not os.path.exists(path):
+            return self._error(404, "보고서 파일이 없습니다.")
+        size = os.path.getsize(path)
+        self.send_response(200)
+        self.send_header("Content-Type", REPORT_TYPES[fmt])
+        self.send_header("Content-Length", str(size))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+        self.end_headers()
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+
+    # === POST ===
+    def do_POST(self):
+        if not self._authorized():
+            return
+        parts, _ = self._route()
+        try:
+            if parts == ["audits"]:
+                data = self._read_json()
+                name = str(data.get("service_name") or "").strip()
+                if not name:
+                    return self._error(400, "service_name이 필요합니다.")
+                policy = data.get("feedback_policy", "auto")
+                if policy not in ("auto", "skip"):
+                    return self._error(400, "feedback_policy는 auto 또는 skip만 가능합니다.")
+                job = self.service.submit(name, data.get("service_info"), policy,
+                                          use_cache=_flag(data.get("use_cache"), "use_cache", default=True))
+                return self._send_json(202, dict(job.to_dict(self.service.position(job)),
+                                                 links=_links(job.id)))
+            if len(parts) == 3 and parts[0] == "audits" and parts[2] == "retry":
+                job = self.service.retry(parts[1])
+                return self._send_json(202, dict(job.to_dict(self.service.position(job)),
+                                                 links=_links(job.id)))
+        except QueueFull:
+            return self._error(503, "대기 작업이 가득 찼습니다. 잠시 후 다시 시도하세요.")
+        except KeyError:
+            return self._error(404, "작업을 찾을 수 없습니다.")
+        except ValueError as e:
+            return self._error(400, str(e))
+        self._error(404, "없는 경로입니다.")
+
+
+def _flag(value, field: str, default: bool) -> bool:
+    """JSON 불리언 필드 해석 — true/false 외에 "false", "0", "no", "off" 같은 문자열/숫자도 허용 (bool("false")는 True)"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"{field}는 true 또는 false만 가능합니다.")
+
+
+def _links(job_id: str) -> dict:
+    return {"status": f"/audits/{job_id}", "report": f"/audits/{job_id}/report?format=pdf"}
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, workers: int = None, warm: bool = True):
+    """작업 워커를 warm-up 후 기동하고 HTTP 서버 실행 (SIGINT/SIGTERM 시 진행 중 작업을 마치고 종료)"""
+    service = AuditService(**({"workers": workers} if workers else {})).start(warm=warm)
+    AuditHandler.service = service
+    httpd = ThreadingHTTPServer((host, port), AuditHandler)
+    httpd.daemon_threads = True
+
+    def _shutdown(*_):
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    print(f"\n🚀 진단 서비스 시작: http://{host}:{httpd.server_port} (워커 {service.workers}개)\n")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n🛑 서비스 종료 중 — 진행 중인 작업을 마무리합니다...")
+        httpd.server_close()
+        service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 윤리 리스크 진단 HTTP 서비스")
+    parser.add_argument("--host", default="127.0.0.1", help="바인드 주소 (기본: 로컬만)")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="동시 진단 워커 수 (기본: AUDIT_WORKERS 또는 4)")
+    parser.add_argument("--no-warm", action="store_true", help="시작 시 warm-up 생략")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, warm=not args.no_warm)
+
+
+if __name__ == "__main__":
+    main()
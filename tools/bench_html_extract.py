@@ -0,0 +1,99 @@
+# tools/bench_html_extract.py
+# 크롤러 본문 추출 벤치마크: 기존 BeautifulSoup 전체 파싱 vs 스트리밍 <p> 추출기 (예산 도달 시 중단)
+#
+# 사용 예:
+#   python tools/bench_html_extract.py                        # 합성 HTML 픽스처로 비교
+#   python tools/bench_html_extract.py --fixtures saved_html/  # 저장해 둔 실제 페이지(*.html)로 비교
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.html_extract import extract_paragraphs_stream
+from agents.service_crawler import TEXT_BUDGET
+
+CHUNK_SIZE = 64 * 1024  # httpx aiter_bytes와 비슷한 조각 크기
+
+
+def synthetic_fixtures():
+    """마케팅 페이지 형태(스크립트/내비게이션 + 문단)의 크기별 합성 HTML"""
+    nav = "<nav>" + "".join(f'<a href="/m{i}">메뉴 {i}</a>' for i in range(200)) + "</nav>"
+    script = "<script>" + "var x = 1;" * 5000 + "</script>"
+    para = "<p>본 서비스는 생성형 AI 모델을 활용하여 <b>문서 요약</b>과 번역을 제공합니다. " \
+           "We process user data in accordance with our privacy policy.</p>"
+    fixtures = {}
+    for label, n in (("small", 200), ("medium", 2500), ("large", 25000)):
+        body = "".join(f"<section><div>{para}</div></section>" for _ in range(n))
+        fixtures[label] = f"<html><head>{script}</head><body>{nav}{body}</body></html>".encode("utf-8")
+    return fixtures
+
+
+def load_fixtures(path):
+    fixtures = {}
+    for fp in sorted(glob.glob(os.path.join(path, "*.html"))):
+        with open(fp, "rb") as f:
+            fixtures[os.path.basename(fp)] = f.read()
+    return fixtures
+
+
+def bs4_path(raw: bytes, share: int) -> str:
+    """기존 방식: 전체 다운로드 → 전체 DOM 파싱 → 문단 결합 → 자르기"""
+    soup = BeautifulSoup(raw.decode("utf-8", errors="replace"), "html.parser")
+    return " ".join([p.get_text() for p in soup.find_all("p")])[:share]
+
+
+def stream_path(raw: bytes, share: int) -> str:
+    """새 방식: 조각 단위 파싱, 몫을 채우면 나머지 바이트는 읽지 않음"""
+    chunks = (raw[i:i + CHUNK_SIZE] for i in range(0, len(raw), CHUNK_SIZE))
+    return extract_paragraphs_stream(chunks, budget=share)
+
+
+def measure(fn, raw, share, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn(raw, share)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn(raw, share)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, statistics.median(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 본문 추출 벤치마크")
+    parser.add_argument("--fixtures", default=None, help="*.html 픽스처 디렉터리 (없으면 합성 픽스처)")
+    parser.add_argument("--pages", type=int, default=3, help="본문 예산을 나눌 페이지 수 (crawl max_results)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures()
+    if not fixtures:
+        print("🚫 픽스처가 없습니다.")
+        sys.exit(1)
+    share = TEXT_BUDGET // args.pages
+
+    print(f"\n📏 본문 추출 비교 (페이지당 몫 {share}자, 반복 {args.repeat}회 중앙값)")
+    print("-" * 92)
+    print(f"{'fixture':<22} {'size':>9} | {'bs4 ms':>9} {'bs4 peak':>10} | "
+          f"{'stream ms':>9} {'stream peak':>11} | {'speedup':>7} {'same':>5}")
+    print("-" * 92)
+    for name, raw in fixtures.items():
+        a, ta, ma = measure(bs4_path, raw, share, args.repeat)
+        b, tb, mb = measure(stream_path, raw, share, args.repeat)
+        same = " ".join(a.split()) == " ".join(b.split())
+        print(f"{name[:22]:<22} {len(raw) / 1e3:>7.0f}KB | {ta * 1e3:>9.1f} {ma / 1e6:>8.1f}MB | "
+              f"{tb * 1e3:>9.1f} {mb / 1e6:>9.1f}MB | {ta / max(tb, 1e-9):>6.1f}x {'✅' if same else '⚠️':>4}")
+    print("-" * 92)
+    print("※ same: 공백 정규화 후 두 방식의 추출 결과 일치 여부 (중첩 <p> 등은 bs4가 중복 포함할 수 있음)\n")
+
+
+if __name__ == "__main__":
+    main()
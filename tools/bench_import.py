@@ -0,0 +1,196 @@
+# tools/bench_import.py
+# 시작 시간(import) 벤치마크: `python -X importtime -c "import main"`을 새 프로세스로 반복 실행해
+# 모듈별 누적/자체 import 시간, 최상위 패키지별 합계를 집계하고 이력 파일에 쌓아 이전 측정과 비교
+#
+# 사용 예:
+#   python tools/bench_import.py                          # main import 시간 측정 후 outputs/bench/import_history.jsonl에 기록
+#   python tools/bench_import.py --module batch_audit --repeat 10 --top 20
+#   python tools/bench_import.py --budget-ms 300          # 중앙값이 예산을 넘으면 종료 코드 1 (CI 회귀 감시용)
+import argparse
+import datetime
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PATH = os.path.join("outputs", "bench", "import_history.jsonl")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> list:
+    """-X importtime 출력 → [{"module", "self_us", "cumulative_us", "depth"}] (import 완료 순서)"""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append({
+                "module": m.group(4),
+                "self_us": int(m.group(1)),
+                "cumulative_us": int(m.group(2)),
+                "depth": (len(m.group(3)) - 1) // 2,
+            })
+    return rows
+
+
+def measure_once(module: str) -> dict:
+    """새 인터프리터에서 module을 import하고 importtime 행과 프로세스 전체 소요 시간 반환"""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    process_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["(출력 없음)"]
+        raise RuntimeError(f"import {module} 실패: {tail[0]}")
+    rows = parse_importtime(proc.stderr)
+    target = next((r for r in reversed(rows) if r["module"] == module), None)
+    return {
+        "rows": rows,
+        "import_ms": target["cumulative_us"] / 1000 if target else 0.0,
+        "process_ms": process_ms,
+    }
+
+
+def package_totals(rows: list) -> dict:
+    """최상위 패키지별 자체 import 시간 합계 (ms, 큰 순)"""
+    totals = {}
+    for r in rows:
+        pkg = r["module"].split(".")[0]
+        totals[pkg] = totals.get(pkg, 0) + r["self_us"]
+    return {k: round(v / 1000, 2) for k, v in sorted(totals.items(), key=lambda kv: -kv[1])}
+
+
+def median_rows(samples: list) -> list:
+    """반복 측정의 모듈별 중앙값 (첫 import 위치/깊이는 첫 측정 기준)"""
+    by_module = {}
+    for s in samples:
+        for r in s["rows"]:
+            by_module.setdefault(r["module"], []).append(r)
+    out = []
+    for module, rs in by_module.items():
+        out.append({
+            "module": module,
+            "self_us": int(statistics.median(r["self_us"] for r in rs)),
+            "cumulative_us": int(statistics.median(r["cumulative_us"] for r in rs)),
+            "depth": rs[0]["depth"],
+        })
+    return out
+
+
+def git_revision() -> dict:
+    def _git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        except OSError:
+            return ""
+    return {"commit": _git("rev-parse", "--short", "HEAD") or None,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def load_previous(path: str, module: str):
+    """이력 파일에서 같은 모듈의 마지막 기록"""
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if rec.get("module") == module:
+                last = rec
+    return last
+
+
+def print_report(module: str, samples: list, rows: list, top: int):
+    imports = [s["import_ms"] for s in samples]
+    procs = [s["process_ms"] for s in samples]
+    print(f"\n⏱️ import {module} — {len(samples)}회 측정")
+    print(f"   import 누적: 중앙값 {statistics.median(imports):.1f}ms (최소 {min(imports):.1f}ms, 최대 {max(imports):.1f}ms)")
+    print(f"   프로세스 전체(인터프리터 기동 포함): 중앙값 {statistics.median(procs):.1f}ms")
+
+    print(f"\n📦 누적 시간 상위 {top}개 모듈 (하위 import 포함)")
+    print("-" * 72)
+    for r in sorted((r for r in rows if r["module"] != module),
+                    key=lambda r: -r["cumulative_us"])[:top]:
+        print(f"{r['cumulative_us'] / 1000:>10.1f}ms  {'  ' * min(r['depth'], 6)}{r['module']}")
+
+    print(f"\n🔹 자체 시간 상위 {top}개 모듈")
+    print("-" * 72)
+    for r in sorted(rows, key=lambda r: -r["self_us"])[:top]:
+        print(f"{r['self_us'] / 1000:>10.1f}ms  {r['module']}")
+
+    print(f"\n🗂️ 최상위 패키지별 자체 시간 합계 (상위 {top}개)")
+    print("-" * 72)
+    for pkg, ms in list(package_totals(rows).items())[:top]:
+        print(f"{ms:>10.1f}ms  {pkg}")
+    print("-" * 72)
+
+
+def compare_with_previous(record: dict, prev: dict, top: int):
+    print(f"\n📐 이전 기록 비교: {prev.get('timestamp')} ({prev.get('commit') or '-'})")
+    base, now = prev["import_ms_median"], record["import_ms_median"]
+    delta = (now - base) / base * 100 if base else 0.0
+    print(f"   import {record['module']}: {base:.1f}ms → {now:.1f}ms ({delta:+.1f}%)")
+    changes = []
+    for pkg in set(prev.get("packages", {})) | set(record["packages"]):
+        b, n = prev.get("packages", {}).get(pkg, 0.0), record["packages"].get(pkg, 0.0)
+        if abs(n - b) >= 1.0:
+            changes.append((n - b, pkg, b, n))
+    for d, pkg, b, n in sorted(changes, key=lambda c: -abs(c[0]))[:top]:
+        print(f"   {pkg:<28} {b:>9.1f}ms → {n:>9.1f}ms ({d:+.1f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 import(시작) 시간 벤치마크")
+    parser.add_argument("--module", default="main", help="측정할 모듈 (기본: main)")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--top", type=int, default=15, help="출력할 상위 모듈/패키지 수")
+    parser.add_argument("--history", default=HISTORY_PATH, help="측정 이력 JSONL 경로")
+    parser.add_argument("--no-save", action="store_true", help="이력 파일에 기록하지 않음")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="import 중앙값 예산 (초과 시 종료 코드 1)")
+    args = parser.parse_args()
+
+    measure_once(args.module)  # 워밍업 (.pyc 생성/파일 시스템 캐시)
+    samples = [measure_once(args.module) for _ in range(max(args.repeat, 1))]
+    rows = median_rows(samples)
+    print_report(args.module, samples, rows, args.top)
+
+    packages = package_totals(rows)
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        **git_revision(),
+        "module": args.module,
+        "python": sys.version.split()[0],
+        "repeat": len(samples),
+        "import_ms_median": round(statistics.median(s["import_ms"] for s in samples), 2),
+        "import_ms_min": round(min(s["import_ms"] for s in samples), 2),
+        "process_ms_median": round(statistics.median(s["process_ms"] for s in samples), 2),
+        "modules": len(rows),
+        "packages": dict(list(packages.items())[:40]),
+    }
+
+    history = args.history if os.path.isabs(args.history) else os.path.join(ROOT, args.history)
+    prev = load_previous(history, args.module)
+    if prev:
+        compare_with_previous(record, prev, args.top)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(history), exist_ok=True)
+        with open(history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"💾 이력 기록: {history}")
+
+    if args.budget_ms is not None and record["import_ms_median"] > args.budget_ms:
+        print(f"🚨 import 시간 예산 초과: {record['import_ms_median']:.1f}ms > {args.budget_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
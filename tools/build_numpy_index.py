@@ -0,0 +1,109 @@
+# tools/build_numpy_index.py
+# Chroma 벡터스토어를 메모리 맵 NumPy 인덱스로 내보내고, 검색 재현율/지연시간을 Chroma와 비교
+#
+# 사용 예:
+#   python tools/build_numpy_index.py                  # data/vectorstore_np 생성 (float32)
+#   python tools/build_numpy_index.py --dtype float16  # 절반 용량
+#   python tools/build_numpy_index.py --compare        # 재현율@k / 지연시간 비교 리포트
+#   RAG_BACKEND=numpy python main.py                   # 검색 백엔드로 사용
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.rag_retriever import (
+    EMBEDDING_MODEL, NP_INDEX_DIR, ChromaBackend, _get_embeddings, get_vectorstore,
+)
+from agents.vector_index import NumpyVectorIndex, export_chroma_collection
+
+load_dotenv()
+
+# risk_factor_extractor가 실제로 만들어 내는 형태의 질의
+DEFAULT_QUERIES = [
+    "데이터 편향", "투명성 부족", "설명불가", "프라이버시 위험", "책임 소재 불명확",
+    "인간 감독 부재", "안전성 결함", "차별적 결과", "개인정보 수집", "자동화된 의사결정",
+    "algorithmic bias", "lack of transparency", "human oversight", "data governance",
+]
+
+
+def _timed(fn, repeat: int):
+    times = []
+    out = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - started)
+    return out, times
+
+
+def _fmt_ms(times):
+    times = sorted(times)
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    return f"p50 {statistics.median(times) * 1000:8.2f} ms | p95 {p95 * 1000:8.2f} ms"
+
+
+def compare(index: NumpyVectorIndex, k: int, repeat: int, offline: bool):
+    """동일 질의 벡터로 Chroma(HNSW 근사)와 NumPy(정확 탐색) 결과/지연시간 비교"""
+    chroma = ChromaBackend(get_vectorstore())
+
+    if offline:
+        # 임베딩 API 없이: 저장된 청크 벡터 일부를 질의로 사용
+        rng = np.random.default_rng(0)
+        rows = rng.choice(len(index), size=min(64, len(index)), replace=False)
+        vectors = np.asarray(index.matrix[rows], dtype=np.float32).tolist()
+        label = f"저장된 청크 벡터 {len(vectors)}개"
+    else:
+        vectors = _get_embeddings().embed_documents(DEFAULT_QUERIES)
+        label = f"리스크 키워드 질의 {len(vectors)}개"
+
+    np_hits, np_times = _timed(lambda: index.search_by_vectors(vectors, k), repeat)
+    ch_hits, ch_times = _timed(lambda: chroma.search_by_vectors(vectors, k), repeat)
+
+    overlaps = []
+    for a, b in zip(np_hits, ch_hits):
+        exact = {h["id"] for h in a}
+        approx = {h["id"] for h in b}
+        overlaps.append(len(exact & approx) / max(len(exact), 1))
+
+    print(f"\n📏 검색 비교 ({label}, k={k}, 반복 {repeat}회, 인덱스 {len(index)}개 청크, {index.info['dtype']})")
+    print("-" * 70)
+    print(f"{'numpy (정확 탐색)':<22} {_fmt_ms(np_times)}")
+    print(f"{'chroma (HNSW)':<22} {_fmt_ms(ch_times)}")
+    print("-" * 70)
+    print(f"🎯 recall@{k} (numpy 정확 결과 대비 chroma 일치율): {statistics.mean(overlaps):.3f}")
+    print(f"⚡ 속도비 (chroma / numpy, p50): "
+          f"{statistics.median(ch_times) / max(statistics.median(np_times), 1e-9):.1f}x\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy 벡터 인덱스 생성 및 Chroma 비교")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--out", default=NP_INDEX_DIR)
+    parser.add_argument("--compare", action="store_true", help="생성 후 Chroma와 재현율/지연시간 비교")
+    parser.add_argument("--offline", action="store_true", help="비교 시 임베딩 API 대신 저장된 벡터를 질의로 사용")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print("📦 Chroma 컬렉션 내보내는 중...")
+    ids, vectors, docs, metas = export_chroma_collection(get_vectorstore()._collection)
+    if not ids:
+        print("🚫 Chroma 컬렉션이 비어 있습니다. 먼저 tools/embed_guidelines.py를 실행하세요.")
+        sys.exit(1)
+
+    NumpyVectorIndex.build(args.out, ids, vectors, docs, metas, dtype=args.dtype, model=EMBEDDING_MODEL)
+    index = NumpyVectorIndex(args.out)
+    size_mb = os.path.getsize(os.path.join(args.out, "embeddings.npy")) / 1e6
+    print(f"✅ NumPy 인덱스 저장 완료: {args.out} ({len(index)}개 청크, {args.dtype}, {size_mb:.1f} MB)")
+
+    if args.compare:
+        compare(index, args.k, args.repeat, args.offline)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,182 @@
 # tools/embed_guidelines.py
+import argparse
+import hashlib
+import json
 import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
+from pypdf import PdfReader
+
+# 프로젝트 루트를 import 경로에 추가 (python tools/embed_guidelines.py 실행 지원)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.bm25_index import BM25_PATH, BM25Index
+from agents.embedding_cache import get_cached_embeddings
+from agents.vector_index import NP_INDEX_DIR, NumpyVectorIndex, export_chroma_collection
 
 # === ① 환경 변수 로드 ===
 load_dotenv()
 
 DATA_DIR = "data"
 VECTOR_DIR = os.path.join(DATA_DIR, "vectorstore")
+# 원본 파일/청크 지문 기록 — 변경분만 임베딩하기 위해 사용
+MANIFEST_PATH = os.path.join(VECTOR_DIR, "index_manifest.json")
+# PDF 탐색 시 제외할 하위 디렉터리 (인덱스/캐시 저장소)
+SKIP_DIRS = {"vectorstore", "cache"}
+
+PAGES_PER_TASK = 16      # 워커 1개가 한 번에 처리하는 페이지 수
+UPSERT_BATCH_SIZE = 256  # 임베딩/upsert 1회당 청크 수
+
+_SPLITTER = None
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _chunk_id(source: str, page, content: str) -> str:
+    """청크 내용 기반 id — 같은 내용이면 같은 id (재실행 시 중복 적재 방지)"""
+    return hashlib.sha256(f"{source}\0{page}\0{content}".encode("utf-8")).hexdigest()[:32]
+
+
+def _load_manifest() -> dict:
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    return {"version": 1, "files": {}}
+
+
+def _save_manifest(manifest: dict):
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def discover_pdfs(data_dir: str = DATA_DIR):
+    """data/ 아래의 모든 PDF 경로 (인덱스/캐시 디렉터리 제외, 정렬)"""
+    found = []
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+
+def _split_pages(task):
+    """
+    [워커 프로세스] PDF의 페이지 구간을 추출/분할
+    - 반환: [(chunk_id, text, metadata)] — 프로세스 간 전달이 가벼운 순수 데이터
+    """
+    global _SPLITTER
+    if _SPLITTER is None:
+        _SPLITTER = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+
+    pdf_path, source, file_sha, start, end = task
+    reader = PdfReader(pdf_path)
+    out = []
+    for page in range(start, end):
+        text = reader.pages[page].extract_text() or ""
+        if not text.strip():
+            continue
+        for content in _SPLITTER.split_text(text):
+            cid = _chunk_id(source, page, content)
+            out.append((cid, content, {
+                "source": source, "page": page,
+                "source_sha256": file_sha, "chunk_id": cid,
+            }))
+    return out
+
+
+def iter_chunks(tasks, workers: int):
+    """
+    프로세스 풀로 페이지 구간을 병렬 처리하며 (task, chunks)를 순서대로 흘려보내는 생성기
+    - 동시에 떠 있는 작업 수를 workers * 2로 제한해 메모리 사용량을 일정하게 유지
+    """
+    it = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in it:
+            pending.append((task, pool.submit(_split_pages, task)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            task, fut = pending.popleft()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(_split_pages, nxt)))
+            yield task, fut.result()
+
 
-def embed_guideline_pdfs():
-    """EU / OECD / UNESCO 윤리 가이드라인 PDF를 벡터화하여 Chroma DB로 저장"""
+def build_numpy_index(vectorstore, path: str = NP_INDEX_DIR):
+    """
+    NumPy 벡터 인덱스를 Chroma 컬렉션과 같은 청크로 다시 생성 (RAG_BACKEND=numpy가 낡은 청크를 검색하지 않도록)
+    - 인덱스를 만든 적이 없으면 건너뜀 (처음 생성은 tools/build_numpy_index.py)
+    - 기존 인덱스의 dtype(float32/float16)은 유지
+    """
+    info_path = os.path.join(path, "index.json")
+    if not os.path.exists(info_path):
+        return
+    with open(info_path, encoding="utf-8") as f:
+        info = json.load(f)
+    ids, vectors, docs, metas = export_chroma_collection(vectorstore._collection)
+    if not ids:
+        os.remove(info_path)  # 빈 컬렉션 → 낡은 인덱스를 쓰지 않도록 무효화
+        print(f"🧮 컬렉션이 비어 NumPy 인덱스를 무효화했습니다: {path}")
+        return
+    NumpyVectorIndex.build(path, ids, vectors, docs, metas, dtype=info.get("dtype", "float32"),
+                           model=info.get("model", ""))
+    print(f"🧮 NumPy 인덱스 갱신 완료: {path} ({len(ids)}개 청크, {info.get('dtype', 'float32')})")
+
+
+def adopt_unmanaged_chunks(vectorstore, manifest: dict) -> dict:
+    """
+    manifest 없이 적재된 기존 컬렉션 정리 (이전 버전으로 만든 컬렉션 / manifest 유실)
+    - chunk_id 메타데이터가 없는 레거시 청크(UUID id)는 삭제 → 새 청크와 중복 적재되지 않음
+    - chunk_id가 있는 청크는 원본 파일별로 manifest에 다시 기록 → 지문이 같은 파일은 다시 임베딩하지 않음
+    - 반환: {"deleted", "adopted"}
+    """
+    data = vectorstore._collection.get(include=["metadatas"])
+    legacy, files = [], {}
+    for cid, meta in zip(data["ids"], data["metadatas"]):
+        meta = meta or {}
+        if not meta.get("chunk_id") or not meta.get("source"):
+            legacy.append(cid)
+            continue
+        entry = files.setdefault(meta["source"], {"sha256": meta.get("source_sha256"), "chunk_ids": []})
+        if entry["sha256"] != meta.get("source_sha256"):
+            entry["sha256"] = None  # 여러 버전의 청크가 섞여 있으면 다음 실행에서 다시 처리
+        entry["chunk_ids"].append(cid)
+    for i in range(0, len(legacy), 5000):
+        vectorstore.delete(ids=legacy[i:i + 5000])
+    manifest["files"].update(files)
+    _save_manifest(manifest)
+    return {"deleted": len(legacy), "adopted": sum(len(f["chunk_ids"]) for f in files.values())}
+
+
+def build_bm25_index(vectorstore):
+    """컬렉션의 모든 청크로 BM25 역색인을 다시 만들어 저장 (임베딩 불필요)"""
+    ids, _, docs, metas = export_chroma_collection(vectorstore._collection, with_embeddings=False)
+    index = BM25Index.build(ids, docs, metas)
+    index.save(BM25_PATH)
+    print(f"🔤 BM25 역색인 저장 완료: {BM25_PATH} ({len(index)}개 청크, 어휘 {len(index.postings)}개)")
+
+
+def embed_guideline_pdfs(rebuild: bool = False, workers: int = None):
+    """
+    data/ 아래 윤리 가이드라인 PDF를 벡터화하여 Chroma DB로 저장 (증분 + 병렬 스트리밍 인덱싱)
+    - 파일 지문이 같으면 로드/분할/임베딩 모두 생략
+    - 변경된 파일은 프로세스 풀에서 페이지 단위로 추출/분할하고, 새 청크만 배치 단위로 임베딩/upsert
+    - 사라진 청크/파일은 컬렉션에서 제거
+    """
     os.makedirs(VECTOR_DIR, exist_ok=True)
 
     api_key = os.getenv("OPENAI_API_KEY")
@@ -24,45 +186,138 @@ def embed_guideline_pdfs():
         print("OPENAI_API_KEY=sk-xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx")
         sys.exit(1)
 
-    pdf_files = [
-        os.path.join(DATA_DIR, "EU_AI_Act_Condensed_Summary.pdf"),
-        os.path.join(DATA_DIR, "OECD_AI_Principles.pdf"),
-        os.path.join(DATA_DIR, "UNESCO_AI_Ethics.pdf"),
-    ]
+    workers = workers or os.cpu_count() or 1
 
-    print("📚 윤리 가이드라인 PDF 로딩 중...")
-    docs = []
-    for pdf_path in pdf_files:
-        if os.path.exists(pdf_path):
-            print(f"   📄 {os.path.basename(pdf_path)} 로딩 중...")
-            loader = PyPDFLoader(pdf_path)
-            docs.extend(loader.load())
-        else:
-            print(f"⚠️ {pdf_path} 파일을 찾을 수 없습니다. (건너뜀)")
-
-    if not docs:
-        print("🚫 로드된 문서가 없습니다. PDF 경로를 확인하세요.")
+    # (모델, 텍스트 해시) 캐시를 거쳐 이미 임베딩한 청크는 API 호출 생략
+    embeddings = get_cached_embeddings("text-embedding-3-small")
+    vectorstore = Chroma(persist_directory=VECTOR_DIR, embedding_function=embeddings)
+
+    if rebuild:
+        print("🧹 --rebuild: 기존 컬렉션과 manifest를 초기화합니다.")
+        vectorstore.delete_collection()
+        vectorstore = Chroma(persist_directory=VECTOR_DIR, embedding_function=embeddings)
+        if os.path.exists(MANIFEST_PATH):
+            os.remove(MANIFEST_PATH)
+
+    manifest = _load_manifest()
+    totals = {"skipped": 0, "chunks": 0, "embedded": 0, "deleted": 0}
+    if not manifest["files"] and vectorstore._collection.count() > 0:
+        moved = adopt_unmanaged_chunks(vectorstore, manifest)
+        totals["deleted"] += moved["deleted"]
+        print(f"🧹 manifest 없이 적재된 기존 청크 정리: 레거시 청크 {moved['deleted']}개 삭제, "
+              f"chunk_id가 있는 청크 {moved['adopted']}개는 manifest에 다시 기록")
+
+    # === ② 변경된 파일만 골라 페이지 구간 작업 목록 생성 ===
+    print("📚 윤리 가이드라인 PDF 확인 중...")
+    pdf_files = discover_pdfs()
+    if not pdf_files:
+        print("🚫 data/ 아래에 PDF가 없습니다.")
         sys.exit(1)
 
-    print(f"✅ 총 {len(docs)}개 문서 로드 완료.")
+    present, pending_files, tasks = set(), {}, []
+    for pdf_path in pdf_files:
+        source = os.path.relpath(pdf_path, DATA_DIR)
+        present.add(source)
+        file_sha = _file_sha256(pdf_path)
+        prev = manifest["files"].get(source)
+        if prev and prev.get("sha256") == file_sha:
+            print(f"   ⏭️ {source} 변경 없음 (건너뜀)")
+            totals["skipped"] += 1
+            continue
+
+        n_pages = len(PdfReader(pdf_path).pages)
+        ranges = [(s, min(s + PAGES_PER_TASK, n_pages)) for s in range(0, n_pages, PAGES_PER_TASK)]
+        print(f"   📄 {source} ({n_pages}페이지) 인덱싱 대상")
+        pending_files[source] = {
+            "sha256": file_sha, "remaining": len(ranges), "ids": [], "seen": set(), "new": 0,
+        }
+        tasks += [(pdf_path, source, file_sha, s, e) for s, e in ranges]
+
+    # === ③ 스트리밍 분할 → 배치 임베딩/upsert ===
+    reprocessed = len(pending_files)  # 페이지가 없어 작업이 0개인 파일도 기존 청크는 삭제되므로 함께 셈
+    buffer = []
+
+    def flush():
+        if not buffer:
+            return
+        ids = [b[0] for b in buffer]
+        existing = set(vectorstore._collection.get(ids=ids, include=[])["ids"])
+        new = [b for b in buffer if b[0] not in existing]
+        if new:
+            vectorstore.add_texts(
+                texts=[b[1] for b in new],
+                metadatas=[b[2] for b in new],
+                ids=[b[0] for b in new],
+            )
+            for b in new:
+                pending_files[b[2]["source"]]["new"] += 1
+        totals["embedded"] += len(new)
+        buffer.clear()
+
+    def finish_file(source):
+        info = pending_files.pop(source)
+        prev = manifest["files"].get(source) or {}
+        stale = sorted(set(prev.get("chunk_ids", [])) - info["seen"])
+        if stale:
+            vectorstore.delete(ids=stale)
+        totals["deleted"] += len(stale)
+        manifest["files"][source] = {"sha256": info["sha256"], "chunk_ids": info["ids"]}
+        _save_manifest(manifest)
+        print(f"      🧩 {source}: 청크 {len(info['ids'])}개 (신규 {info['new']}, 삭제 {len(stale)})")
+
+    if tasks:
+        print(f"🔢 {len(tasks)}개 페이지 구간을 워커 {workers}개로 분할 → 임베딩 중...")
+    for task, chunks in iter_chunks(tasks, workers):
+        source = task[1]
+        info = pending_files[source]
+        for cid, text, meta in chunks:
+            if cid in info["seen"]:
+                continue
+            info["seen"].add(cid)
+            info["ids"].append(cid)
+            buffer.append((cid, text, meta))
+            totals["chunks"] += 1
+            if len(buffer) >= UPSERT_BATCH_SIZE:
+                flush()
+
+        info["remaining"] -= 1
+        if info["remaining"] == 0:
+            flush()  # 파일의 모든 청크가 저장된 뒤에 manifest 갱신
+            finish_file(source)
+
+    # 페이지가 없는 PDF 등 작업이 없었던 파일 정리
+    for source in list(pending_files):
+        finish_file(source)
+
+    changed = bool(reprocessed) or totals["deleted"] > 0
 
-    # === ② Chunking ===
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    chunks = text_splitter.split_documents(docs)
-    print(f"🧩 총 {len(chunks)}개 텍스트 청크로 분할됨.")
+    # === ④ 사라진 원본 파일의 청크 제거 ===
+    removed = sorted(set(manifest["files"]) - present)
+    for source in removed:
+        stale = manifest["files"].pop(source).get("chunk_ids", [])
+        if stale:
+            vectorstore.delete(ids=stale)
+        print(f"   🗑️ {source} 삭제됨 → 청크 {len(stale)}개 제거")
+        totals["deleted"] += len(stale)
+    if removed:
+        _save_manifest(manifest)
+        changed = True
 
-    # === ③ Embedding + VectorDB 저장 ===
-    print("🔢 임베딩 생성 및 Chroma DB 저장 중...")
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+    # === ⑤ 같은 청크로 BM25 역색인 / NumPy 인덱스 갱신 (변경이 있거나 아직 없을 때만) ===
+    if changed or not os.path.exists(BM25_PATH):
+        build_bm25_index(vectorstore)
+    if changed:
+        build_numpy_index(vectorstore)
 
-    # 최신 버전에서는 persist_directory를 지정하면 자동으로 저장됨
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=VECTOR_DIR
-    )
+    print(f"✅ Chroma DB 동기화 완료: {VECTOR_DIR} "
+          f"(변경 없음 {totals['skipped']}개 파일, 처리 청크 {totals['chunks']}, "
+          f"신규 임베딩 {totals['embedded']}, 삭제 {totals['deleted']})")
+    print(f"🗃️ 임베딩 캐시: {embeddings.stats()}")
 
-    print(f"✅ Chroma DB 저장 완료: {VECTOR_DIR}")
 
 if __name__ == "__main__":
-    embed_guideline_pdfs()
+    parser = argparse.ArgumentParser(description="윤리 가이드라인 PDF 증분 인덱싱")
+    parser.add_argument("--rebuild", action="store_true", help="컬렉션과 manifest를 지우고 처음부터 재구축")
+    parser.add_argument("--workers", type=int, default=None, help="PDF 추출/분할 프로세스 수 (기본: CPU 수)")
+    args = parser.parse_args()
+    embed_guideline_pdfs(rebuild=args.rebuild, workers=args.workers)
@@ -0,0 +1,175 @@
+# tools/query_results.py
+# 진단 결과 저장소(data/results/audits.sqlite) 질의 CLI — 보고서 Markdown을 다시 파싱하지 않고 색인으로 바로 조회
+#
+# 사용 예:
+#   python tools/query_results.py scores --category 프라이버시 --min 4 --since quarter   # 이번 분기 프라이버시 4점 이상
+#   python tools/query_results.py history "Gemini" --category 편향성                    # 서비스 점수 추이
+#   python tools/query_results.py stats --since 90d                                      # 항목별 평균/최고/고위험 수
+#   python tools/query_results.py runs --service Gemini --limit 20
+#   python tools/query_results.py show <run_id>
+#   python tools/query_results.py backfill                 # 저장소 도입 전 체크포인트에서 결과 가져오기
+#   (모든 명령에 --json 을 붙이면 JSON으로 출력)
+import argparse
+import datetime
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.results_store import RESULTS_PATH, ResultsStore, canonical_category  # noqa: E402
+
+
+def parse_time(value: str):
+    """'2026-07-01' | '2026-07-01T09:00' | '90d' / '12h' (지금부터 이전) | 'quarter' / 'month' (이번 분기/달 시작) → epoch 초"""
+    if value is None:
+        return None
+    now = datetime.datetime.now()
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([dh])", value)
+    if m:
+        return time.time() - float(m.group(1)) * (86400 if m.group(2) == "d" else 3600)
+    if value == "quarter":
+        return now.replace(month=(now.month - 1) // 3 * 3 + 1, day=1, hour=0, minute=0, second=0,
+                           microsecond=0).timestamp()
+    if value == "month":
+        return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"시각 형식 오류: {value} (예: 2026-07-01, 90d, quarter)")
+
+
+def _ts(t) -> str:
+    return datetime.datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M") if t else "-"
+
+
+def _fmt(v) -> str:
+    return f"{v:.2f}" if isinstance(v, (int, float)) else "-"
+
+
+def print_table(rows, columns):
+    """[(헤더, 키, 너비)] 기준 표 출력 (created_at은 날짜로, 실수는 소수 2자리로)"""
+    if not rows:
+        print("📭 조건에 맞는 결과가 없습니다.")
+        return
+    print(" ".join(f"{h:<{w}}" for h, _, w in columns))
+    print("-" * sum(w + 1 for _, _, w in columns))
+    for r in rows:
+        cells = []
+        for _, key, w in columns:
+            v = r.get(key)
+            v = _ts(v) if key == "created_at" else _fmt(v) if isinstance(v, float) else ("-" if v is None else v)
+            cells.append(f"{str(v)[:w]:<{w}}")
+        print(" ".join(cells))
+
+
+def backfill(store: ResultsStore) -> int:
+    """체크포인트(outputs/checkpoints)의 완료된 run을 저장소에 기록 (이미 있는 run_id는 덮어씀)"""
+    from agents import checkpoint
+    from main import average_score
+
+    count = 0
+    for item in checkpoint.list_checkpoints():
+        ckpt = checkpoint.Checkpoint.load(item["run_id"])
+        if ckpt is None or "evaluate" not in ckpt.stages:
+            continue
+        state = {"run_id": ckpt.run_id, "service_name": ckpt.meta.get("service_name")}
+        ckpt.restore(state, list(ckpt.stages))
+        state["final_avg_score"] = average_score(state.get("final_assessment"))
+        store.record(state, created_at=item["mtime"])
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="진단 결과 저장소 질의")
+    parser.add_argument("--db", default=RESULTS_PATH, help=f"저장소 경로 (기본: {RESULTS_PATH})")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def _period(p):
+        p.add_argument("--since", type=parse_time, default=None, help="시작 시각 (2026-07-01 | 90d | quarter | month)")
+        p.add_argument("--until", type=parse_time, default=None, help="종료 시각 (미포함)")
+
+    p = sub.add_parser("scores", help="항목별 점수 검색 (점수 높은 순)")
+    p.add_argument("--category", default=None, help="평가 항목 (예: 프라이버시, Privacy — 대표 이름으로 정규화해 비교)")
+    p.add_argument("--min", dest="min_score", type=float, default=None)
+    p.add_argument("--max", dest="max_score", type=float, default=None)
+    p.add_argument("--service", default=None)
+    p.add_argument("--phase", choices=["initial", "final"], default="final", help="초기 평가 또는 최종(피드백 반영) 평가")
+    p.add_argument("--all-runs", action="store_true", help="서비스마다 최근 run만이 아니라 모든 run 포함")
+    p.add_argument("--limit", type=int, default=100)
+    _period(p)
+
+    p = sub.add_parser("runs", help="run 목록 (최근 순)")
+    p.add_argument("--service", default=None)
+    p.add_argument("--min-avg", type=float, default=None, help="최종 평균 점수 하한")
+    p.add_argument("--limit", type=int, default=50)
+    _period(p)
+
+    p = sub.add_parser("history", help="서비스 점수 추이 (오래된 순)")
+    p.add_argument("service")
+    p.add_argument("--category", default=None, help="지정하면 해당 항목 점수, 없으면 평균 점수")
+    p.add_argument("--phase", choices=["initial", "final"], default="final")
+    p.add_argument("--limit", type=int, default=100)
+
+    p = sub.add_parser("stats", help="항목별 run 수 / 평균 / 최고 / 고위험 수")
+    p.add_argument("--phase", choices=["initial", "final"], default="final")
+    p.add_argument("--high-risk", type=float, default=4.0, help="고위험 기준 점수")
+    _period(p)
+
+    p = sub.add_parser("show", help="run 1건 상세")
+    p.add_argument("run_id")
+
+    sub.add_parser("backfill", help="체크포인트에 남은 이전 run을 저장소로 가져오기")
+
+    args = parser.parse_args()
+    if getattr(args, "category", None):
+        args.category = canonical_category(args.category)  # "Privacy", "프라이버시 (Privacy)" → "프라이버시"
+    store = ResultsStore(args.db)
+    started = time.perf_counter()
+
+    if args.command == "backfill":
+        n = backfill(store)
+        print(f"📥 체크포인트에서 {n}건을 저장소에 기록했습니다 ({args.db})")
+        return
+    if args.command == "scores":
+        rows = store.query_scores(args.category, args.min_score, args.max_score, args.service, args.since,
+                                  args.until, args.phase, latest_only=not args.all_runs, limit=args.limit)
+        columns = [("서비스", "service_name", 24), ("항목", "category", 10), ("원래 항목명", "label", 22),
+                   ("점수", "score", 6), ("일시", "created_at", 16), ("run_id", "run_id", 40)]
+    elif args.command == "runs":
+        rows = store.list_runs(args.service, args.since, args.until, args.min_avg, args.limit)
+        columns = [("서비스", "service_name", 24), ("유형", "service_type", 14), ("초기", "avg_score", 6),
+                   ("최종", "final_avg_score", 6), ("일시", "created_at", 16), ("run_id", "run_id", 40)]
+    elif args.command == "history":
+        rows = store.history(args.service, args.category, args.phase, args.limit)
+        columns = ([("일시", "created_at", 16), ("항목", "category", 14), ("점수", "score", 6)] if args.category else
+                   [("일시", "created_at", 16), ("초기", "avg_score", 6), ("최종", "final_avg_score", 6)])
+        columns.append(("run_id", "run_id", 40))
+    elif args.command == "stats":
+        rows = store.category_stats(args.since, args.until, args.phase, args.high_risk)
+        columns = [("항목", "category", 14), ("run 수", "runs", 8), ("평균", "avg_score", 6),
+                   ("최고", "max_score", 6), (f"{args.high_risk:g}점 이상", "high_risk", 10)]
+    else:
+        rows = store.get_run(args.run_id)
+        if rows is None:
+            print(f"🚫 run을 찾을 수 없습니다: {args.run_id}")
+            sys.exit(1)
+        print(json.dumps(rows, ensure_ascii=False, indent=2, default=str))
+        return
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    print()
+    print_table(rows, columns)
+    total = store.stats()
+    print(f"\n🔎 {len(rows)}건 — {elapsed_ms:.1f}ms (저장소: run {total['runs']}건, 서비스 {total['services']}개)\n")
+
+
+if __name__ == "__main__":
+    main()